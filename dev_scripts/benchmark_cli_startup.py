@@ -0,0 +1,38 @@
+#!/usr/bin/env python
+"""
+Benchmark of the psrdb CLI start up time, which matters for cron jobs that run psrdb many times.
+
+    python dev_scripts/benchmark_cli_startup.py [-n 20] [psrdb arguments ...]
+"""
+import sys
+import time
+import argparse
+import subprocess
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time how long the psrdb CLI takes to start up.")
+    parser.add_argument("-n", type=int, default=20, help="Number of runs")
+    parser.add_argument("psrdb_args", nargs="*", default=["--help"], help="Arguments to pass to psrdb, default is --help")
+    args = parser.parse_args()
+
+    command = [sys.executable, "-m", "psrdb.scripts.psrdb", *args.psrdb_args]
+    times = []
+    for _ in range(args.n):
+        start = time.perf_counter()
+        subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+    times.sort()
+    print(f"psrdb {' '.join(args.psrdb_args)}: median {times[len(times) // 2] * 1e3:.1f} ms, min {times[0] * 1e3:.1f} ms over {args.n} runs")
+
+    # Show the slowest imports of the run
+    result = subprocess.run([sys.executable, "-X", "importtime", *command[1:]], capture_output=True, text=True)
+    imports = [line.split("|") for line in result.stderr.splitlines() if line.startswith("import time:") and "cumulative" not in line]
+    imports.sort(key=lambda columns: int(columns[1]), reverse=True)
+    print("Slowest imports (cumulative us):")
+    for columns in imports[:10]:
+        print(f"  {int(columns[1]):>9} {columns[2].strip()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+"""
+Micro-benchmark of the obs.header parser against the previous regex based parser.
+
+    python dev_scripts/benchmark_header_parse.py [obs.header ...] [-n 10000]
+"""
+import re
+import os
+import time
+import argparse
+
+from psrdb.utils.header import parse_key_values
+
+
+TEST_DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "tests", "test_data")
+
+
+def regex_parse(text):
+    # The previous KeyValueStore.read_file parser
+    cfg = {}
+    for line in text.splitlines():
+        line = line.strip()
+        line = re.sub("#.*", "", line)
+        if line:
+            line = re.sub(r"\s+", " ", line)
+            key, value = line.split(" ", 1)
+            cfg[key] = value.strip()
+    return cfg
+
+
+def time_parser(parser, headers, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for header in headers:
+            parser(header)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the obs.header parser")
+    parser.add_argument("headers", nargs="*", help="obs.header files, by default the headers in tests/test_data")
+    parser.add_argument("-n", "--number", type=int, default=10000, help="number of headers to parse with each parser")
+    args = parser.parse_args()
+
+    header_files = args.headers or [
+        os.path.join(TEST_DATA_DIR, header_file) for header_file in sorted(os.listdir(TEST_DATA_DIR)) if header_file.endswith(".header")
+    ]
+    headers = []
+    for header_file in header_files:
+        with open(header_file, "rb") as f:
+            headers.append(f.read())
+    texts = [header.decode("utf-8") for header in headers]
+    for text, header in zip(texts, headers):
+        assert regex_parse(text) == parse_key_values(header)
+
+    repeats = max(args.number // len(headers), 1)
+    nheaders = repeats * len(headers)
+    for name, parse, data in [
+        ("regex (str)", regex_parse, texts),
+        ("parse_key_values (str)", parse_key_values, texts),
+        ("parse_key_values (bytes)", parse_key_values, headers),
+    ]:
+        duration = time_parser(parse, data, repeats)
+        print(f"{name:<26} {nheaders / duration:10.0f} headers/s  {duration / nheaders * 1e6:8.1f} us/header")
+
+
+if __name__ == "__main__":
+    main()
@@ -90,7 +90,7 @@ def main():
     toa_client = Toa(client)
 
     # Get all pulsars
-    pulsar_data = pulsar_client.list()
+    pulsar_data = pulsar_client.list(fields=["name"])
     pulsars = []
     for pulsar in pulsar_data:
         pulsars.append(pulsar['name'])
@@ -99,6 +99,7 @@ def main():
     project_pulsars = {}
     pfs_data = pfs_client.list(
         main_project="MeerTIME",
+        fields=["pulsar.name", "allProjects"],
     )
     for pfs in pfs_data:
         projects = pfs['allProjects']
@@ -110,24 +111,28 @@ def main():
                 project_pulsars[project].append(pulsar)
 
 
+    if args.test:
+        pulsars = [pulsar for pulsar in pulsars if pulsar in TEST_PULSARS]
+
+    # Get the observations of all pulsars in as few requests as possible
+    pulsar_obs = obs_client.list_by_pulsar(
+        pulsars,
+        main_project="MeerTIME",
+        utce=args.date,
+        obs_type='fold',
+        fields=["utcStart", "beam"],
+    )
+
     os.chdir(base_dir)
     os.makedirs("decimated", exist_ok=True)
 
     # Get the decimated files
     for pulsar in pulsars:
-        if args.test and pulsar not in TEST_PULSARS:
-            continue
         os.chdir(f"{base_dir}/decimated")
         os.makedirs(pulsar, exist_ok=True)
         os.chdir(f"{base_dir}/decimated/{pulsar}")
         print(f"Getting decimated files for {pulsar}")
-        obs_data = obs_client.list(
-            pulsar_name=[pulsar],
-            main_project="MeerTIME",
-            utce=args.date,
-            obs_type='fold',
-        )
-        for obs in obs_data:
+        for obs in pulsar_obs[pulsar]:
             utc = datetime.strptime(
                 obs['utcStart'],
                 '%Y-%m-%dT%H:%M:%S+00:00',
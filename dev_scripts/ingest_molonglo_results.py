@@ -49,6 +49,7 @@ ephemeris_response = ephemeris_client.create(
     f"/fred/oz002/ldunn/meertime_dataportal/data/pars/{args.pulsar}.par",
     project_short="MONSPSR_TIMING",
     comment="",
+    deduplicate=True,
 )
 ephemeris_id = get_graphql_id(ephemeris_response, "ephemeris", logging.getLogger(__name__))
 
@@ -59,6 +60,7 @@ template_response = template_client.create(
     "OTHER",
     f"/fred/oz002/ldunn/meertime_dataportal/data/profiles/{args.pulsar}.std",
     project_short="MONSPSR_TIMING",
+    deduplicate=True,
 )
 template_id = get_rest_api_id(template_response, logging.getLogger(__name__))
 
@@ -95,15 +97,14 @@ image_data.append( (f"{args.pulsar}_{args.date}_pat.png",        'toa-single', '
 
 # Upload images
 pipeline_image_client = PipelineImage(client)
-for image_path, image_type, resolution, cleaned in image_data:
-    image_response = pipeline_image_client.create(
-        pipe_id,
-        f"/fred/oz002/ldunn/meertime_dataportal/data/images/{args.pulsar}/{args.date}/{image_path}",
-        image_type,
-        resolution,
-        cleaned,
-    )
-    content = json.loads(image_response.content)
+image_responses = pipeline_image_client.create_many(
+    pipe_id,
+    [
+        (f"/fred/oz002/ldunn/meertime_dataportal/data/images/{args.pulsar}/{args.date}/{image_path}", image_type, resolution, cleaned)
+        for image_path, image_type, resolution, cleaned in image_data
+    ],
+)
+for image_response in image_responses:
     if image_response.status_code not in (200, 201):
         logger.error("Failed to upload image")
         exit(1)
@@ -14,6 +14,7 @@ class GraphQLClient:
         self.rest_api_url = f"{url}/upload/"
         self.token = token
         self.header = {"Authorization": f"Bearer {token}"}
+        self.rest_session = None
         self.connect(verbose)
 
         if logger is None:
@@ -40,6 +41,26 @@ class GraphQLClient:
         self.graphql_session = r.Session()
         self.graphql_session.mount(self.graphql_url, adapter)
 
+    def get_rest_session(self, pool_size=10):
+        """Return a pooled session for the REST upload URL, creating it on first use.
+
+        The session shares the GraphQL retry strategy and authorization header so
+        file uploads can reuse connections across threads.
+
+        Parameters
+        ----------
+        pool_size : int, optional
+            The maximum number of connections kept open to the upload URL, by default 10
+        """
+        if self.rest_session is None:
+            retry_strategy = Retry(total=3, backoff_factor=1, status_forcelist=[429, 500, 502, 503, 504])
+            adapter = r.adapters.HTTPAdapter(max_retries=retry_strategy, pool_maxsize=pool_size)
+
+            self.rest_session = r.Session()
+            self.rest_session.headers.update(self.header)
+            self.rest_session.mount(self.rest_api_url, adapter)
+        return self.rest_session
+
     def handle_error_msg(self, content):
         """Handle logging of error messages in GraphQL response."""
         if "errors" in content.keys():
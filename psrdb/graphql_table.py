@@ -1,4 +1,6 @@
+import re
 import json
+import time
 import logging
 from base64 import b64decode
 import binascii
@@ -7,6 +9,18 @@ from copy import copy
 from psrdb.utils.other import to_camel_case
 
 
+def graphql_argument_type(value):
+    """Return the GraphQL type of a filter value"""
+    if type(value) == str:
+        return "String"
+    elif type(value) == bool:
+        return "Boolean"
+    elif type(value) == list:
+        return "[String]"
+    else:
+        return "Int"
+
+
 def generate_graphql_query(table_name, filters, conection_fields, node_fields):
     """Generate a GraphQL query for a table"""
 
@@ -18,15 +32,7 @@ def generate_graphql_query(table_name, filters, conection_fields, node_fields):
         value = f["value"]
         if value is not None:
             arguments.append(f'{field}: ${field}')
-            if type(value) == str:
-                argument_definitions.append(f'${field}: String')
-            elif type(value) == bool:
-                argument_definitions.append(f"${field}: Boolean")
-            elif type(value) == list:
-                value_list = '","'.join(value)
-                argument_definitions.append(f'${field}: [String]')
-            else:
-                argument_definitions.append(f"${field}: Int")
+            argument_definitions.append(f'${field}: {graphql_argument_type(value)}')
     # Prepare the argument definitions to the template format
     if len(argument_definitions) > 0:
         argument_definitions = ',\n        '.join(argument_definitions)
@@ -63,6 +69,236 @@ def generate_graphql_query(table_name, filters, conection_fields, node_fields):
 
 
 
+def generate_batch_graphql_query(table_name, aliased_filters, connection_fields, node_fields):
+    """Generate a GraphQL query that packs a query of a table for each alias into one request
+
+    Each aliased query has its own filters and its variables are prefixed by the alias,
+    see `batch_query_variables`. The results are returned under the alias in the response data.
+
+    Parameters
+    ----------
+    table_name : str
+        The name of the table to query
+    aliased_filters : dict
+        The list of filters of each alias, aliases must be valid GraphQL names
+    connection_fields : list
+        A list of fields to return from each connection
+    node_fields : list
+        A list of fields to return from each node
+    """
+    query_name = to_camel_case(table_name)
+    node_fields = "\n                ".join(node_fields)
+    connection_fields = "\n        ".join(connection_fields)
+
+    argument_definitions = []
+    aliased_queries = []
+    for alias, filters in aliased_filters.items():
+        arguments = []
+        for f in filters:
+            if f["value"] is not None:
+                arguments.append(f'{f["field"]}: ${alias}_{f["field"]}')
+                argument_definitions.append(f'${alias}_{f["field"]}: {graphql_argument_type(f["value"])}')
+        query_arguments = f"({', '.join(arguments)})" if arguments else ""
+        aliased_queries.append(f"""    {alias}: {query_name} {query_arguments} {{
+        {connection_fields}
+        edges {{
+            node {{
+                {node_fields}
+            }}
+        }}
+    }}""")
+
+    if len(argument_definitions) > 0:
+        argument_definitions = ',\n    '.join(argument_definitions)
+        query_argument_definitions = f"(\n    {argument_definitions}\n)"
+    else:
+        query_argument_definitions = ""
+    aliased_queries = "\n".join(aliased_queries)
+    return f"""query {query_name}Batch {query_argument_definitions} {{
+{aliased_queries}
+}}
+    """
+
+
+def batch_query_variables(aliased_filters):
+    """Return the variables of a query from `generate_batch_graphql_query`"""
+    variables = {}
+    for alias, filters in aliased_filters.items():
+        for f in filters:
+            if f["value"] is not None:
+                variables[f"{alias}_{f['field']}"] = f["value"]
+    return variables
+
+
+FIELD_NAME_RE = re.compile(r"[A-Za-z0-9]+")
+
+
+def field_path(field):
+    """Return the dotted path of a field, e.g. "pulsar { name }", "pulsar_name" and "pulsar.name" are all "pulsar.name"."""
+    return ".".join(FIELD_NAME_RE.findall(field))
+
+
+def select_fields(field_names, fields):
+    """Project a table's GraphQL field selections onto the requested fields.
+
+    Parameters
+    ----------
+    field_names : list of str
+        The table's GraphQL field selections, e.g. ["id", "pulsar { name }"].
+    fields : list of str or str
+        The requested fields (or a comma separated string of them) as dotted paths, e.g.
+        ["id", "pulsar.name"]. A parent field such as "pulsar" selects all of its sub-fields.
+
+    Returns
+    -------
+    list of str
+        The selections of `field_names` that match the requested fields, in the requested order.
+    """
+    if fields is None:
+        return field_names
+    if isinstance(fields, str):
+        fields = [field for field in fields.split(",") if field.strip()]
+    paths = [(field_path(field_name), field_name) for field_name in field_names]
+    selected = []
+    for field in fields:
+        path = field_path(field)
+        matches = [field_name for name_path, field_name in paths if name_path == path or name_path.startswith(f"{path}.")]
+        if not matches:
+            raise RuntimeError(f"Unknown field {field}, the fields are: {', '.join(name_path for name_path, _ in paths)}")
+        selected.extend(match for match in matches if match not in selected)
+    return selected
+
+
+def get_field_value(node, path):
+    """Return the value of a dotted field path, e.g. "pulsar.name", from a result node."""
+    for key in path.split("."):
+        node = node[key]
+    return node
+
+
+def field_name(path):
+    """Convert a dotted field path (e.g. "pipelineRun.sn") to a GraphQL field name (e.g. "pipelineRun { sn }")"""
+    keys = path.split(".")
+    name = keys[-1]
+    for key in reversed(keys[:-1]):
+        name = f"{key} {{ {name} }}"
+    return name
+
+
+def _filter_value(node, path):
+    # Like get_field_value but None if a parent field is null
+    for key in path.split("."):
+        if node is None:
+            return None
+        node = node.get(key)
+    return node
+
+
+def filter_nodes(nodes, client_filters):
+    """Return the nodes that pass all the client side filters.
+
+    Each filter is evaluated on all nodes at once with a NumPy mask. Nodes where the
+    field is missing (None) do not pass.
+
+    Parameters
+    ----------
+    nodes : list of dict
+        The nodes of a page of a list query.
+    client_filters : list of tuple
+        The (field path, operator, value) of each filter, where the operator is one of
+        "eq", "gte", "lte" or "in".
+    """
+    if not nodes or not client_filters:
+        return nodes
+    import numpy as np
+
+    mask = np.ones(len(nodes), dtype=bool)
+    for path, operator, value in client_filters:
+        column = np.array([_filter_value(node, path) for node in nodes], dtype=object)
+        present = np.array([v is not None for v in column], dtype=bool)
+        if operator == "in":
+            value = set(value)
+            passed = np.fromiter((v in value for v in column), dtype=bool, count=len(column))
+        else:
+            # Compare the present values with the column's natural type (e.g. float or str)
+            passed = np.zeros(len(nodes), dtype=bool)
+            if present.any():
+                values = np.array(column[present].tolist())
+                if operator == "eq":
+                    passed[present] = values == value
+                elif operator == "gte":
+                    passed[present] = values >= value
+                elif operator == "lte":
+                    passed[present] = values <= value
+                else:
+                    raise RuntimeError(f"Unknown filter operator {operator}")
+        mask &= present & passed
+    return [node for node, keep in zip(nodes, mask) if keep]
+
+
+# The default target size and request time of each page of a list query
+PAGE_TARGET_BYTES = 2 * 1024 * 1024
+PAGE_TIME_BUDGET = 20.0
+
+
+class PageSizePlanner:
+    """Picks the number of nodes to request in each page of a list query.
+
+    The first page size is estimated from the selected fields, then each response's size
+    and request time update the bytes and seconds per node so the following pages aim at
+    `target_bytes` and `time_budget` (whichever allows fewer nodes).
+
+    Parameters
+    ----------
+    node_fields : list of str
+        The GraphQL fields selected for each node.
+    target_bytes : int, optional
+        The target payload size of each page, by default `PAGE_TARGET_BYTES`.
+    time_budget : float, optional
+        The target request time of each page in seconds, by default `PAGE_TIME_BUDGET`.
+    min_size : int, optional
+        The smallest page size, by default 10.
+    max_size : int, optional
+        The largest page size, by default 10000.
+    """
+    # Rough size of a field in a JSON response (quoted name, value and punctuation)
+    FIELD_BYTES = 40
+    # Rough size of the edge and node wrapping of each node
+    NODE_BYTES = 30
+    # The most a page can grow by relative to the previous page
+    MAX_GROWTH = 4
+
+    def __init__(self, node_fields, target_bytes=None, time_budget=None, min_size=10, max_size=10000):
+        self.target_bytes = target_bytes or PAGE_TARGET_BYTES
+        self.time_budget = time_budget or PAGE_TIME_BUDGET
+        self.min_size = min_size
+        self.max_size = max_size
+        nfields = sum(len(FIELD_NAME_RE.findall(field)) for field in node_fields)
+        self.bytes_per_node = self.NODE_BYTES + self.FIELD_BYTES * nfields
+        self.seconds_per_node = None
+        self.page_size = self._clamp(self.target_bytes / self.bytes_per_node)
+
+    def _clamp(self, size):
+        return int(max(self.min_size, min(self.max_size, size)))
+
+    def update(self, nnodes, nbytes, seconds):
+        """Update the estimates from a page of `nnodes` nodes and return the next page size."""
+        if nnodes > 0:
+            # Weight the latest page the most as the server load changes during a query
+            bytes_per_node = nbytes / nnodes
+            seconds_per_node = seconds / nnodes
+            self.bytes_per_node = (self.bytes_per_node + 3 * bytes_per_node) / 4
+            if self.seconds_per_node is None:
+                self.seconds_per_node = seconds_per_node
+            else:
+                self.seconds_per_node = (self.seconds_per_node + 3 * seconds_per_node) / 4
+        size = self.target_bytes / self.bytes_per_node
+        if self.seconds_per_node:
+            size = min(size, self.time_budget / self.seconds_per_node)
+        self.page_size = self._clamp(min(size, self.page_size * self.MAX_GROWTH))
+        return self.page_size
+
+
 class GraphQLTable:
     """Abstract base class to perform create, update and select GraphQL queries"""
 
@@ -79,6 +315,15 @@ class GraphQLTable:
         self.get_dicts = False
         self.print_stdout = False
         self.paginate = False
+        # The filters the server accepts for the list query (None to send them all) and the
+        # (field path, operator) of the filters that can be evaluated on the returned nodes instead
+        self.server_filters = None
+        self.client_filters = {}
+        # The target payload size and request time of each page, see PageSizePlanner
+        self.page_target_bytes = None
+        self.page_time_budget = None
+        # The local mirror that answers list queries instead of the server, see set_backend
+        self.mirror = None
         self.quiet = False
 
         self.mutation_name = None
@@ -89,13 +334,86 @@ class GraphQLTable:
         self.table_name = self.__class__.__name__.lower()
         # List of variables to return from list queries which will be overwritten
         self.field_names = []
+        # Fields to project self.field_names onto, see set_fields
+        self.fields = None
+
+    def plan_filters(self, filters):
+        """Split the filters of a list query into those sent to the server and those evaluated client side.
+
+        Filters the server accepts are always sent to the server, the rest are evaluated on the
+        returned nodes with `filter_nodes` if the table declares them in `self.client_filters`.
+
+        Returns
+        -------
+        server_filters : list of dict
+            The filters to send to the server.
+        client_filters : list of tuple
+            The (field path, operator, value) of the filters to evaluate client side.
+        """
+        server_filters = []
+        client_filters = []
+        for f in filters:
+            if f["value"] is None or self.server_filters is None or f["field"] in self.server_filters:
+                server_filters.append(f)
+            elif f["field"] in self.client_filters:
+                path, operator = self.client_filters[f["field"]]
+                client_filters.append((path, operator, f["value"]))
+            else:
+                raise RuntimeError(f"Can not filter {self.table_name} by {f['field']}")
+        return server_filters, client_filters
+
+    def set_page_budget(self, target_bytes=None, time_budget=None):
+        """Set the target payload size (bytes) and request time (seconds) of each page of list queries."""
+        self.page_target_bytes = target_bytes
+        self.page_time_budget = time_budget
+
+    def set_backend(self, backend, mirror=None):
+        """Answer list queries from the server ("remote") or a local mirror ("local") synced with the sync commands.
+
+        Parameters
+        ----------
+        backend : str
+            Either "remote" or "local".
+        mirror : str, optional
+            The location of the local mirror, by default `psrdb.utils.mirror.MIRROR`.
+        """
+        if backend == "local":
+            from psrdb.utils.mirror import Mirror
+
+            self.mirror = Mirror(mirror)
+        elif backend == "remote":
+            self.mirror = None
+        else:
+            raise RuntimeError(f"Unknown backend {backend}, expected remote or local")
 
     def set_use_pagination(self, paginate):
         self.paginate = paginate
 
+    def get_field_names(self, fields=None):
+        """Return `self.field_names` projected onto `fields` (see `select_fields`).
+
+        If `fields` is None the fields from `set_fields` are used, or all of them if it has not been called.
+        """
+        if fields is None:
+            fields = self.fields
+        return select_fields(self.field_names, fields)
+
+    def get_download_columns(self, columns, fields=None):
+        """Return the (header, field path, format function) download file columns whose fields are queried."""
+        queried = {field_path(field_name) for field_name in self.get_field_names(fields)}
+        selected = [column for column in columns if column[1] in queried]
+        if not selected:
+            raise RuntimeError("None of the requested fields can be downloaded")
+        return selected
+
+    def set_fields(self, fields):
+        """Only query the given fields in list and download queries."""
+        self.fields = fields
+
     def set_quiet(self, id_only):
         if id_only:
             self.field_names = ["id"]
+            self.fields = None
             self.quiet = True
 
     def decode_id(self, encoded):
@@ -138,7 +456,7 @@ class GraphQLTable:
         input_filters,
         connection_fields,
         input_node_fields,
-        paginate_num=100,
+        paginate_num=None,
     ):
         """
         Perform a list query on a table
@@ -154,12 +472,67 @@ class GraphQLTable:
         input_node_fields : list
             A list of fields to return from the node
         paginate_num: int, optional
-            The number of records to return per page, default is 100
+            The number of records to return per page, by default each page size is picked by a `PageSizePlanner`
         """
         print_headers = True
-        cursor = None
         connection_fields.append("pageInfo { hasNextPage endCursor }")
+        input_filters, client_filters, input_node_fields = self._plan_list(input_filters, input_node_fields)
+        if self.mirror is not None:
+            return self.list_mirror(table_name, input_filters, client_filters, input_node_fields)
+
         result = []
+        response = None
+        for response, nodes, cursor in self._list_pages(table_name, input_filters, client_filters, connection_fields, input_node_fields, paginate_num):
+            for node in nodes:
+                if self.get_dicts:
+                    result.append(node)
+                self.print_record_set(node, "\t", print_headers=print_headers)
+                print_headers = cursor is None
+
+        if self.get_dicts:
+            return result
+        else:
+            return response
+
+    def list_pages_graphql(
+        self,
+        table_name,
+        input_filters,
+        connection_fields,
+        input_node_fields,
+        paginate_num=None,
+    ):
+        """
+        Perform a list query on a table, yielding the list of nodes of each page as it arrives
+
+        Takes the same parameters as `list_graphql`. The nodes are neither printed nor kept, so
+        callers can reduce each page (e.g. to columns) without holding every node in memory.
+        """
+        connection_fields = connection_fields + ["pageInfo { hasNextPage endCursor }"]
+        input_filters, client_filters, input_node_fields = self._plan_list(input_filters, input_node_fields)
+        if self.mirror is not None:
+            yield filter_nodes(self.mirror.list(table_name, input_filters), client_filters)
+            return
+        for _, nodes, _ in self._list_pages(table_name, input_filters, client_filters, connection_fields, input_node_fields, paginate_num):
+            yield nodes
+
+    def _plan_list(self, input_filters, input_node_fields):
+        """Split the filters of a list query and make sure the fields of the client side filters are queried."""
+        input_filters, client_filters = self.plan_filters(input_filters)
+        selected = {field_path(name) for name in input_node_fields}
+        for path, _, _ in client_filters:
+            if path not in selected:
+                input_node_fields = input_node_fields + [field_name(path)]
+                selected.add(path)
+        return input_filters, client_filters, input_node_fields
+
+    def _list_pages(self, table_name, input_filters, client_filters, connection_fields, input_node_fields, paginate_num):
+        """Yield the response, the client side filtered nodes and the next page cursor of each page of a list query."""
+        planner = None
+        if paginate_num is None:
+            planner = PageSizePlanner(input_node_fields, self.page_target_bytes, self.page_time_budget)
+            paginate_num = planner.page_size
+        cursor = None
         has_next_page = True
         while has_next_page:
             # Append page information to input filters and fields
@@ -177,28 +550,140 @@ class GraphQLTable:
 
             # Send the query
             payload = {"query": query, "variables": json.dumps(variables)}
+            start = time.perf_counter()
             response = self.client.post(payload)
+            seconds = time.perf_counter() - start
             has_next_page = False
+            nodes = []
             if response.status_code == 200:
                 content = json.loads(response.content)
                 self.logger.debug(f"Response content: {content}")
                 if "errors" not in content.keys():
                     data = content["data"][to_camel_case(table_name)]
+                    if planner is not None:
+                        paginate_num = planner.update(len(data["edges"]), len(response.content), seconds)
+                        self.logger.debug(f"Next page size: {paginate_num}")
                     # Get next page info (if available)
                     if data["pageInfo"]["hasNextPage"]:
                         cursor = data["pageInfo"]["endCursor"]
                         has_next_page = True
 
-                    for node in data["edges"]:
-                        if self.get_dicts:
-                            result.append(node["node"])
-                        self.print_record_set(node["node"], "\t", print_headers=print_headers)
-                        print_headers = cursor is None
+                    nodes = filter_nodes([edge["node"] for edge in data["edges"]], client_filters)
+            yield response, nodes, cursor
 
+    def list_mirror(self, table_name, filters, client_filters, node_fields):
+        """Answer a list query from the local mirror, returning the nodes with only the requested fields."""
+        nodes = filter_nodes(self.mirror.list(table_name, filters), client_filters)
+        paths = [field_path(name) for name in node_fields]
+        result = []
+        for node in nodes:
+            projected = {}
+            for path in paths:
+                value = _filter_value(node, path)
+                keys = path.split(".")
+                parent = projected
+                for key in keys[:-1]:
+                    parent = parent.setdefault(key, {})
+                parent[keys[-1]] = value
+            result.append(projected)
+        if result:
+            self.print_record_set(result, "\t")
         if self.get_dicts:
             return result
-        else:
-            return response
+        return None
+
+    def batch_list_graphql(
+        self,
+        table_name,
+        keyed_filters,
+        connection_fields,
+        input_node_fields,
+        paginate_num=100,
+        batch_size=50,
+    ):
+        """
+        Perform a list query for each set of filters, packing several of them into each request with GraphQL aliases
+
+        Each query is paginated independently and its results are returned under its key.
+        A batch that fails (e.g. times out or is too large for the server) is split in half and
+        the remaining batches are made smaller.
+
+        Parameters
+        ----------
+        table_name : str
+            The name of the table to query
+        keyed_filters : dict
+            The list of filters (as used by `list_graphql`) of each query, keyed on any hashable, e.g. the pulsar name
+        connection_fields : list
+            A list of fields to return from the connection
+        input_node_fields : list
+            A list of fields to return from the node
+        paginate_num: int, optional
+            The number of records to return per page of each query, default is 100
+        batch_size : int, optional
+            The maximum number of queries in each request, default is 50
+
+        Returns
+        -------
+        dict
+            The list of result nodes of each key.
+
+        Raises
+        ------
+        RuntimeError
+            If the query of a key fails on its own, rather than returning partial results.
+        """
+        connection_fields = connection_fields + ["pageInfo { hasNextPage endCursor }"]
+        # The GraphQL alias of each key's query
+        aliases = {key: f"q{i}" for i, key in enumerate(keyed_filters)}
+        results = {key: [] for key in keyed_filters}
+        # The cursor of each query that has more pages
+        cursors = {key: None for key in keyed_filters}
+        batch_size = max(int(batch_size), 1)
+        while cursors:
+            batch = list(cursors)[:batch_size]
+            batch_size = min(batch_size, self._batch_list_page(table_name, batch, aliases, keyed_filters, cursors, results, connection_fields, input_node_fields, paginate_num))
+        return results
+
+    def _batch_list_page(self, table_name, batch, aliases, keyed_filters, cursors, results, connection_fields, node_fields, paginate_num):
+        """Request the next page of each query in the batch, returning the batch size that succeeded."""
+        aliased_filters = {}
+        for key in batch:
+            filters = copy(keyed_filters[key])
+            filters.append({"field": "first", "value": paginate_num})
+            if cursors[key] is not None:
+                filters.append({"field": "after", "value": cursors[key]})
+            aliased_filters[aliases[key]] = filters
+        query = generate_batch_graphql_query(table_name, aliased_filters, connection_fields, node_fields)
+        self.logger.debug(f"Using query: {query}")
+        payload = {"query": query, "variables": json.dumps(batch_query_variables(aliased_filters))}
+
+        data = None
+        try:
+            response = self.client.post(payload)
+            if response.status_code == 200:
+                content = json.loads(response.content)
+                if "errors" not in content.keys():
+                    data = content["data"]
+        except (IOError, ValueError) as e:
+            self.logger.warning(f"Batch query of {len(batch)} failed: {e}")
+
+        if data is None:
+            if len(batch) > 1:
+                # Split the batch in half
+                half = len(batch) // 2
+                succeeded = self._batch_list_page(table_name, batch[:half], aliases, keyed_filters, cursors, results, connection_fields, node_fields, paginate_num)
+                return min(succeeded, self._batch_list_page(table_name, batch[half:], aliases, keyed_filters, cursors, results, connection_fields, node_fields, paginate_num))
+            raise RuntimeError(f"{table_name} query with filters {keyed_filters[batch[0]]} failed")
+
+        for key in batch:
+            key_data = data[aliases[key]]
+            results[key].extend(edge["node"] for edge in key_data["edges"])
+            if key_data["pageInfo"]["hasNextPage"]:
+                cursors[key] = key_data["pageInfo"]["endCursor"]
+            else:
+                del cursors[key]
+        return len(batch)
 
     def print_record_set_fields(self, prefix, record_set, delim):
         fields = []
@@ -265,6 +750,35 @@ class GraphQLTable:
         else:
             raise RuntimeError("did not understand type of recordset")
 
+    def sync_graphql(self, filters, mirror=None, full=False, lookback_days=2, fields=None):
+        """Sync the results of a list query to a local mirror, see `psrdb.utils.mirror.Mirror.sync`.
+
+        Returns
+        -------
+        int
+            The number of rows fetched.
+        """
+        from psrdb.utils.mirror import Mirror
+
+        # Always sync from the server, even if list queries use the local backend
+        print_stdout, backend_mirror = self.print_stdout, self.mirror
+        self.print_stdout = False
+        self.mirror = None
+        try:
+            nrows = Mirror(mirror).sync(self, filters, full=full, lookback_days=lookback_days, fields=fields)
+        finally:
+            self.print_stdout, self.mirror = print_stdout, backend_mirror
+        if self.print_stdout:
+            print(f"Synced {nrows} {self.table_name} rows")
+        return nrows
+
+    @classmethod
+    def add_sync_arguments(cls, parser):
+        """Add the options of the sync command to a parser."""
+        parser.add_argument("--mirror", type=str, default=None, help="Location of the local SQLite mirror, default is in the psrdb cache directory [str]")
+        parser.add_argument("--full", action="store_true", help="Fetch all the rows again instead of only those since the last sync")
+        parser.add_argument("--lookback_days", type=float, default=2, help="Also fetch rows this many days before the last sync to pick up changes, default is 2 [float]")
+
     @classmethod
     def get_default_parser(cls, desc=""):
         from argparse import ArgumentParser
@@ -274,5 +788,10 @@ class GraphQLTable:
         parser.add_argument("-t", "--token", default=environ.get("PSRDB_TOKEN"), help="Authentication token from pulsars.org.au")
         parser.add_argument("-u", "--url", default=environ.get("PSRDB_URL", "https://pulsars.org.au/api/"), help="GraphQL URL")
         parser.add_argument("-q", "--quiet", action="store_true", default=False, help="Return ID only")
+        parser.add_argument("--fields", type=str, default=None, help="Comma separated list of the fields to query in list and download commands, e.g. id,pulsar.name,utcStart [str]")
+        parser.add_argument("--page_bytes", type=int, default=None, help=f"Target size of each page of list and download queries in bytes, default is {PAGE_TARGET_BYTES} [int]")
+        parser.add_argument("--page_seconds", type=float, default=None, help=f"Target request time of each page of list and download queries in seconds, default is {PAGE_TIME_BUDGET} [float]")
+        parser.add_argument("--backend", choices=["remote", "local"], default="remote", help="Answer list commands from the server (remote) or a local mirror made with the sync commands (local)")
+        parser.add_argument("--mirror_path", type=str, default=None, help="Location of the local mirror used by --backend local, default is in the psrdb cache directory [str]")
         parser.add_argument("-v", "--verbose", action="store_true", default=False, help="Increase verbosity")
         return parser
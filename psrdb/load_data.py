@@ -25,3 +25,6 @@ EXCLUDE_BADGES_CHOICES = [
     "Session Timing Jump",
     "Session Sensitivity Reduction",
 ]
+
+# Directory for local caches and indexes (upload hashes, parsed ephemerides, etc.)
+CACHE_DIR = os.environ.get("PSRDB_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "psrdb"))
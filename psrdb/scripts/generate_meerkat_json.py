@@ -4,14 +4,16 @@ import os
 import sys
 import glob
 import json
-import shlex
 import logging
-import subprocess
 from decouple import config
 from datetime import datetime
+from concurrent.futures import as_completed
 
 from psrdb.utils import header
-from psrdb.utils.upload import generate_obs_length, get_archive_ephemeris
+from psrdb.utils.upload import ArchiveMetadataPool, get_archive_metadata, get_archive_ephemeris
+from psrdb.utils.archive_length import get_sf_length
+from psrdb.utils.calibration import CalibrationIndex
+from psrdb.utils.obs_index import ObservationIndex
 
 
 CALIBRATIONS_DIR = config("CALIBRATIONS_DIR", "/fred/oz005/users/aparthas/reprocessing_MK/poln_calibration")
@@ -20,38 +22,14 @@ FOLDING_DIR = config("FOLDING_DIR", "/fred/oz005/timing")
 SEARCH_DIR  = config("SEARCH_DIR",  "/fred/oz005/search")
 
 
-def get_sf_length(sf_files):
+def get_calibrations():
     """
-    Determine the length of input sf files with the vap command
+    Return the CalibrationIndex of the calibration files in CALIBRATIONS_DIR
     """
-    comm = f"vap -c length {' '.join(sf_files)}"
-    args = shlex.split(comm)
-    proc = subprocess.Popen(args, stdout=subprocess.PIPE, text=True, bufsize=1)
-    vap_lines = []
-    try:
-        # Read and process the output line by line in real-time
-        for line in iter(proc.stdout.readline, ''):
-            print(line, end='', flush=True)
-            vap_lines.append(line)
-
-    # Handle Ctrl+C to gracefully terminate the subprocess
-    except KeyboardInterrupt:
-        logging.error("Process interrupted. Terminating...")
-        sys.exit(1)
-
-    finally:
-        # Wait for the subprocess to complete
-        proc.wait()
-
-    lengths = []
-    for line in vap_lines[1:]:
-        if line == '':
-            continue
-        lengths.append(float(line.split()[1].strip()))
-    return sum(lengths)
+    return CalibrationIndex.from_directory(CALIBRATIONS_DIR, pattern="*.jones")
 
 
-def get_calibration(utc_start):
+def get_calibration(utc_start, calibrations=None):
     utc_start_dt = datetime.strptime(utc_start, "%Y-%m-%d-%H:%M:%S")
     auto_cal_epoch = "2020-04-11-00:00:00"
     auto_cal_epoch_dt = datetime.strptime(auto_cal_epoch, "%Y-%m-%d-%H:%M:%S")
@@ -59,90 +37,87 @@ def get_calibration(utc_start):
     if utc_start_dt > auto_cal_epoch_dt:
         return ("pre", None)
 
-    cals = sorted(glob.glob(f"{CALIBRATIONS_DIR}/*.jones"), reverse=True)
-    for cal in cals:
-        cal_file = os.path.basename(cal)
-        cal_epoch = cal_file.rstrip(".jones")
-        cal_epoch_dt = datetime.strptime(cal_epoch, "%Y-%m-%d-%H:%M:%S")
-        if cal_epoch_dt < utc_start_dt:
-            return ("post", cal)
+    if calibrations is None:
+        calibrations = get_calibrations()
+    cal = calibrations.before(utc_start_dt)
+    if cal is not None:
+        return ("post", cal)
 
     raise RuntimeError(f"Could not find calibration file for utc_start={utc_start}")
 
 
-def main():
-    import argparse
+class MissingObservationData(RuntimeError):
+    """The observation is missing data required to ingest it (exit code 42)."""
 
-    parser = argparse.ArgumentParser(description="Ingest PTUSE fold mode observation")
-    parser.add_argument("obs_header", type=str, help="obs.header file location")
-    parser.add_argument("beam", type=int, help="beam number of the observation")
-    parser.add_argument(
-        "-o",
-        "--output_dir",
-        type=str,
-        default="./",
-        help="Output directory of the meertime.json file",
-    )
-    parser.add_argument(
-        "-n",
-        "--output_name",
-        type=str,
-        default="meertime.json",
-        help="Output name of the json file. Default is meertime.json",
-    )
-    parser.add_argument(
-        "-v",
-        "--verbose",
-        action="store_true",
-        default=False,
-        help="Increase verbosity",
-    )
-    args = parser.parse_args()
 
-    # Set up logger
-    format = "%(asctime)s : %(levelname)s : %(msg)s"
-    if args.verbose:
-        logging.basicConfig(format=format, level=logging.DEBUG)
-    else:
-        logging.basicConfig(format=format, level=logging.INFO)
+def generate_meerkat_dict(obs_header, beam, calibrations=None, obs_index=None):
+    """
+    Generate the dictionary of observation information used to ingest a MeerKAT observation
 
+    Parameters
+    ----------
+    obs_header : str
+        The obs.header file location.
+    beam : int
+        The beam number of the observation.
+    calibrations : CalibrationIndex, optional
+        The CalibrationIndex from `get_calibrations`, by default it is loaded from CALIBRATIONS_DIR.
+    obs_index : ObservationIndex, optional
+        Find the archive files in this index instead of globbing the directories, by default None.
+
+    Returns
+    -------
+    dict
+        The observation information in the meertime.json format.
+    """
     # Load data from header
-    obs_data = header.PTUSEHeader(args.obs_header)
+    obs_data = header.PTUSEHeader(obs_header)
     obs_data.parse()
-    obs_data.set("BEAM", args.beam)
+    obs_data.set("BEAM", beam)
 
     if obs_data.schedule_block_id is None or obs_data.schedule_block_id == "None":
-        logging.error(f"No schedule block ID for {obs_data.source} {obs_data.utc_start} {args.beam}")
-        sys.exit(42)
+        raise MissingObservationData(f"No schedule block ID for {obs_data.source} {obs_data.utc_start} {beam}")
 
     # Find raw archive and frequency summed files
-    freq_summed_archive = f"{RESULTS_DIR}/{args.beam}/{obs_data.utc_start}/{obs_data.source}/freq.sum"
-    if obs_data.obs_type == "fold":
-        archive_files = glob.glob(f"{FOLDING_DIR}/{obs_data.source}/{obs_data.utc_start}/{args.beam}/*/*.ar")
+    freq_summed_archive = f"{RESULTS_DIR}/{beam}/{obs_data.utc_start}/{obs_data.source}/freq.sum"
+    if obs_index is not None:
+        indexed_freq_sum = obs_index.files("results", obs_data.source, obs_data.utc_start, beam, "freq.sum")
+        if indexed_freq_sum:
+            freq_summed_archive = indexed_freq_sum[0]
+        if obs_data.obs_type == "fold":
+            archive_files = obs_index.files("timing", obs_data.source, obs_data.utc_start, beam, "*.ar")
+        elif obs_data.obs_type == "search":
+            archive_files = obs_index.files("search", obs_data.source, obs_data.utc_start, beam, "*.sf")
+    elif obs_data.obs_type == "fold":
+        archive_files = glob.glob(f"{FOLDING_DIR}/{obs_data.source}/{obs_data.utc_start}/{beam}/*/*.ar")
     elif obs_data.obs_type == "search":
-        archive_files = glob.glob(f"{SEARCH_DIR}/{obs_data.source}/{obs_data.utc_start}/{args.beam}/*/*.sf")
+        archive_files = glob.glob(f"{SEARCH_DIR}/{obs_data.source}/{obs_data.utc_start}/{beam}/*/*.sf")
     if obs_data.obs_type != "cal":
         if not os.path.exists(freq_summed_archive) and not archive_files:
-            logging.error(f"Could not find freq.sum and archive files for {obs_data.source} {obs_data.utc_start} {args.beam}")
-            sys.exit(42)
+            raise MissingObservationData(f"Could not find freq.sum and archive files for {obs_data.source} {obs_data.utc_start} {beam}")
 
 
     # Check if ther are freq.sum and archive files
+    archive_metadata = None
     if obs_data.obs_type == "cal":
         obs_length = -1
     elif not os.path.exists(freq_summed_archive):
-        logging.warning(f"Could not find freq.sum file for {obs_data.source} {obs_data.utc_start} {args.beam}")
+        logging.warning(f"Could not find freq.sum file for {obs_data.source} {obs_data.utc_start} {beam}")
         logging.warning("Finding observation length from archive files (This may take a while)")
         obs_length = get_sf_length(archive_files)
     else:
-        # Grab observation length from the frequency summed archive
-        obs_length = generate_obs_length(freq_summed_archive)
+        # Grab observation length and ephemeris from the frequency summed archive in one pass
+        archive_metadata = get_archive_metadata(freq_summed_archive, disk_cache=True)
+        obs_length = archive_metadata["length"]
 
-    cal_type, cal_location = get_calibration(obs_data.utc_start)
+    cal_type, cal_location = get_calibration(obs_data.utc_start, calibrations)
 
-    ephemeris_text = get_archive_ephemeris(freq_summed_archive)
+    if archive_metadata is not None:
+        ephemeris_text = archive_metadata["ephemeris"]
+    else:
+        ephemeris_text = get_archive_ephemeris(freq_summed_archive, disk_cache=True)
 
-    meertime_dict = {
+    return {
         "pulsarName": obs_data.source,
         "telescopeName": obs_data.telescope,
         "projectCode": obs_data.proposal_id,
@@ -152,7 +127,7 @@ def main():
         "frequency": float(obs_data.frequency),
         "bandwidth": float(obs_data.bandwidth),
         "nchan": int(obs_data.nchan),
-        "beam": int(args.beam),
+        "beam": int(beam),
         "nant": int(obs_data.nant),
         "nantEff": int(obs_data.nant_eff),
         "npol": int(obs_data.npol),
@@ -174,6 +149,170 @@ def main():
         "ephemerisText": ephemeris_text,
     }
 
+
+def read_batch_file(batch_file):
+    """
+    Read the (obs_header, beam) pairs from a batch file
+
+    Each line contains an obs.header location, which may be a glob pattern, and a beam number.
+    Blank lines and lines starting with # are ignored.
+
+    Raises
+    ------
+    RuntimeError
+        If a line doesn't have an obs.header location and an integer beam number.
+    """
+    if batch_file == "-":
+        lines = sys.stdin.readlines()
+    else:
+        with open(batch_file, "r") as f:
+            lines = f.readlines()
+    pairs = []
+    for line_number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        try:
+            header_pattern, beam = line.rsplit(maxsplit=1)
+            beam = int(beam)
+        except ValueError:
+            raise RuntimeError(f"Line {line_number} of {batch_file} is not an obs.header location and beam number: {line}")
+        obs_headers = sorted(glob.glob(header_pattern))
+        if not obs_headers:
+            logging.warning(f"No obs.header files match {header_pattern} on line {line_number} of {batch_file}")
+        for obs_header in obs_headers:
+            pairs.append((obs_header, beam))
+    return pairs
+
+
+# Calibration and observation indexes shared by the batch mode worker processes
+_batch_calibrations = None
+_batch_obs_index = None
+
+
+def _init_batch_worker(calibrations, obs_index=None):
+    global _batch_calibrations, _batch_obs_index
+    _batch_calibrations = calibrations
+    _batch_obs_index = obs_index
+    # Read the calibrator tables once per worker rather than once per header
+    header.get_calibrator_matcher()
+
+
+def _batch_generate(obs_header, beam, output_dir, output_name):
+    meertime_dict = generate_meerkat_dict(obs_header, beam, _batch_calibrations, _batch_obs_index)
+    output_path = os.path.join(output_dir, meertime_dict["pulsarName"], meertime_dict["utcStart"], str(beam), output_name)
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    with open(output_path, 'w') as json_file:
+        json.dump(meertime_dict, json_file, indent=1)
+    return output_path
+
+
+def generate_batch(pairs, output_dir, output_name, processes=None, obs_index=None):
+    """
+    Generate a json file for each (obs_header, beam) pair in an `ArchiveMetadataPool`
+
+    The calibrator tables and calibration index are loaded once and shared with the workers,
+    which each import psrchive once for all of their observations.
+    Each json is written to {output_dir}/{source}/{utc_start}/{beam}/{output_name}.
+
+    Returns
+    -------
+    int
+        The number of observations that failed.
+    """
+    calibrations = get_calibrations()
+    failed = 0
+    with ArchiveMetadataPool(processes, disk_cache=True, initializer=_init_batch_worker, initargs=(calibrations, obs_index)) as pool:
+        futures = {
+            pool.run(_batch_generate, obs_header, beam, output_dir, output_name): (obs_header, beam)
+            for obs_header, beam in pairs
+        }
+        for future in as_completed(futures):
+            obs_header, beam = futures[future]
+            try:
+                logging.info(f"Wrote {future.result()}")
+            except Exception as e:
+                logging.error(f"Failed to generate json for {obs_header} beam {beam}: {e}")
+                failed += 1
+    return failed
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Ingest PTUSE fold mode observation")
+    parser.add_argument("obs_header", type=str, nargs="?", help="obs.header file location")
+    parser.add_argument("beam", type=int, nargs="?", help="beam number of the observation")
+    parser.add_argument(
+        "-b",
+        "--batch",
+        type=str,
+        help="File (or - for stdin) with an obs.header location (or glob pattern) and beam number on each line. "
+            "Each observation's json is written to OUTPUT_DIR/SOURCE/UTC_START/BEAM/OUTPUT_NAME",
+    )
+    parser.add_argument(
+        "-p",
+        "--processes",
+        type=int,
+        default=None,
+        help="Number of worker processes used in batch mode. Default is the number of CPUs",
+    )
+    parser.add_argument(
+        "-i",
+        "--index",
+        type=str,
+        help="Find archive files in this observation index (created with index_observations) instead of globbing the directories",
+    )
+    parser.add_argument(
+        "-o",
+        "--output_dir",
+        type=str,
+        default="./",
+        help="Output directory of the meertime.json file",
+    )
+    parser.add_argument(
+        "-n",
+        "--output_name",
+        type=str,
+        default="meertime.json",
+        help="Output name of the json file. Default is meertime.json",
+    )
+    parser.add_argument(
+        "-v",
+        "--verbose",
+        action="store_true",
+        default=False,
+        help="Increase verbosity",
+    )
+    args = parser.parse_args()
+
+    # Set up logger
+    format = "%(asctime)s : %(levelname)s : %(msg)s"
+    if args.verbose:
+        logging.basicConfig(format=format, level=logging.DEBUG)
+    else:
+        logging.basicConfig(format=format, level=logging.INFO)
+
+    obs_index = ObservationIndex(args.index) if args.index is not None else None
+
+    if args.batch is not None:
+        pairs = read_batch_file(args.batch)
+        logging.info(f"Generating json files for {len(pairs)} observations")
+        failed = generate_batch(pairs, args.output_dir, args.output_name, processes=args.processes, obs_index=obs_index)
+        if failed:
+            logging.error(f"Failed to generate json files for {failed} of {len(pairs)} observations")
+            sys.exit(1)
+        return
+
+    if args.obs_header is None or args.beam is None:
+        parser.error("obs_header and beam are required unless --batch is used")
+
+    try:
+        meertime_dict = generate_meerkat_dict(args.obs_header, args.beam, obs_index=obs_index)
+    except MissingObservationData as e:
+        logging.error(str(e))
+        sys.exit(42)
+
     with open(os.path.join(args.output_dir, args.output_name), 'w') as json_file:
         json.dump(meertime_dict, json_file, indent=1)
 
@@ -4,10 +4,11 @@ import os
 import json
 import logging
 from decouple import config
-from datetime import datetime, timezone
+from datetime import datetime
 
 from psrdb.utils import header
-from psrdb.utils.upload import generate_obs_length, get_archive_ephemeris
+from psrdb.utils.upload import get_archive_metadata
+from psrdb.utils.calibration import CalibrationIndex
 from psrdb.load_data import MOLONGLO_CALIBRATIONS
 
 
@@ -15,19 +16,10 @@ MOLONGLO_RESULTS_DIR = config("MOLONGLO_RESULTS_DIR", "/fred/oz002/ldunn/meertim
 
 
 def get_calibration(utc_start):
-    utc_start_dt = datetime.strptime(utc_start, "%Y-%m-%d-%H:%M:%S").replace(tzinfo=timezone.utc)
-    with open(MOLONGLO_CALIBRATIONS) as f:
-        for line in f.readlines():
-            if line[0] == '#':
-                continue
-
-            date = utc_start_dt.strptime(line.split(' ')[0], '%Y-%m-%d').replace(tzinfo=timezone.utc)
-            delta = date - utc_start_dt
-            if delta.total_seconds() > 0:
-                break
-
-            calibration = line.split(' ')[1].strip()
-
+    utc_start_dt = datetime.strptime(utc_start, "%Y-%m-%d-%H:%M:%S")
+    calibration = CalibrationIndex.from_phasing_file(MOLONGLO_CALIBRATIONS).at_or_before(utc_start_dt)
+    if calibration is None:
+        raise RuntimeError(f"Could not find calibration for utc_start={utc_start}")
     return calibration
 
 
@@ -72,12 +64,13 @@ def main():
 
     # Find raw archive and frequency summed files
     freq_summed_archive = f"{MOLONGLO_RESULTS_DIR}/{obs_data.source}/{obs_data.utc_start}/{obs_data.source}_{obs_data.utc_start}.FT"
-    # Check if there are freq.sum and archive files
-    obs_length = generate_obs_length(freq_summed_archive)
+    # Grab observation length and ephemeris from the frequency summed archive in one pass
+    archive_metadata = get_archive_metadata(freq_summed_archive, disk_cache=True)
+    obs_length = archive_metadata["length"]
 
     cal_location = get_calibration(obs_data.utc_start)
 
-    ephemeris_text = get_archive_ephemeris(freq_summed_archive)
+    ephemeris_text = archive_metadata["ephemeris"]
 
     meertime_dict = {
         "pulsarName": obs_data.source,
@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+
+import logging
+
+from psrdb.utils.obs_index import ObservationIndex, TREE_LEVELS
+from psrdb.scripts.generate_meerkat_json import FOLDING_DIR, SEARCH_DIR, RESULTS_DIR
+
+
+TREE_ROOTS = {
+    "timing": FOLDING_DIR,
+    "search": SEARCH_DIR,
+    "results": RESULTS_DIR,
+}
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Create or update a local index of the MeerKAT observation directories, files and obs.header files. "
+            "Only directories that have changed since the last run are listed."
+    )
+    parser.add_argument(
+        "-i",
+        "--index",
+        type=str,
+        default=None,
+        help="Location of the SQLite index. Default is observation_index.sqlite3 in the psrdb cache directory",
+    )
+    parser.add_argument(
+        "-t",
+        "--trees",
+        type=str,
+        nargs="+",
+        choices=list(TREE_LEVELS),
+        default=list(TREE_LEVELS),
+        help="The trees to index. Default is all of them",
+    )
+    parser.add_argument(
+        "-v",
+        "--verbose",
+        action="store_true",
+        default=False,
+        help="Increase verbosity",
+    )
+    args = parser.parse_args()
+
+    # Set up logger
+    format = "%(asctime)s : %(levelname)s : %(msg)s"
+    if args.verbose:
+        logging.basicConfig(format=format, level=logging.DEBUG)
+    else:
+        logging.basicConfig(format=format, level=logging.INFO)
+
+    obs_index = ObservationIndex(args.index)
+    for tree in args.trees:
+        obs_index.update(tree, TREE_ROOTS[tree])
+
+
+if __name__ == "__main__":
+    main()
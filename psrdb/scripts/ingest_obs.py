@@ -50,6 +50,12 @@ def main():
         default=False,
         help="Increase graphql client verbosity",
     )
+    parser.add_argument(
+        "--describe_pulsars",
+        action="store_true",
+        default=False,
+        help="Generate the descriptions of the new pulsars (with one ATNF query) after ingesting the observations",
+    )
     args = parser.parse_args()
 
     # Set up logger
@@ -66,6 +72,8 @@ def main():
 
     # Load client
     client = GraphQLClient(args.url, args.token, verbose=args.verbose_client)
+    pulsar = Pulsar(client)
+    new_pulsars = []
 
     for json_path in args.json:
 
@@ -78,10 +86,8 @@ def main():
         utc_start_dt = utc_start_dt.strftime("%Y-%m-%dT%H:%M:%S+0000")
 
         # Create pulsar if it doesn't already exist
-        pulsar = Pulsar(client)
-        pulsar.create(
-            name=meertime_data["pulsarName"],
-        )
+        if pulsar.create_if_missing(meertime_data["pulsarName"]):
+            new_pulsars.append(meertime_data["pulsarName"])
 
         # Get or upload calibration
         calibration = Calibration(client)
@@ -127,6 +133,13 @@ def main():
         observation_id = get_graphql_id(response, "observation", logger)
         logger.info(f"Completed ingesting observation_id: {observation_id}")
 
+    if new_pulsars:
+        if args.describe_pulsars:
+            ndescribed = pulsar.describe_missing(names=new_pulsars)
+            logger.info(f"Described {ndescribed} of the {len(new_pulsars)} new pulsars")
+        else:
+            logger.info(f"Created pulsars without descriptions: {', '.join(new_pulsars)}")
+
 
 if __name__ == "__main__":
     main()
@@ -1,24 +1,38 @@
 #!/usr/bin/env python
 import sys
+import json
+from importlib import import_module
 
 from psrdb.graphql_table import GraphQLTable
-from psrdb.graphql_client import GraphQLClient
 from psrdb.utils.other import setup_logging
 
-from psrdb.tables.pulsar import Pulsar
-from psrdb.tables.telescope import Telescope
-from psrdb.tables.main_project import MainProject
-from psrdb.tables.project import Project
-from psrdb.tables.ephemeris import Ephemeris
-from psrdb.tables.template import Template
-from psrdb.tables.calibration import Calibration
-from psrdb.tables.observation import Observation
-from psrdb.tables.pipeline_run import PipelineRun
-from psrdb.tables.pulsar_fold_result import PulsarFoldResult
-from psrdb.tables.pulsar_fold_summary import PulsarFoldSummary
-from psrdb.tables.pipeline_image import PipelineImage
-from psrdb.tables.toa import Toa
-from psrdb.tables.residual import Residual
+
+# The command, module, class and description of each table. The table modules (some of which
+# have slow imports) are only imported when their command is chosen.
+TABLE_COMMANDS = [
+    ("pulsar", "psrdb.tables.pulsar", "Pulsar", "A pulsar source defined by a J2000 name"),
+    ("telescope", "psrdb.tables.telescope", "Telescope", "A telescope defined by a name"),
+    ("main_project", "psrdb.tables.main_project", "MainProject", "A MainProject defined by a code, short name, embargo period and a description"),
+    ("project", "psrdb.tables.project", "Project", "A project defined by a code, short name, embargo period and a description"),
+    ("ephemeris", "psrdb.tables.ephemeris", "Ephemeris", "A pulsar ephemeris"),
+    ("template", "psrdb.tables.template", "Template", "A pulsar template/standard"),
+    ("calibration", "psrdb.tables.calibration", "Calibration", "A defined by its type and location"),
+    ("observation", "psrdb.tables.observation", "Observation", "Observation details."),
+    ("pipeline_run", "psrdb.tables.pipeline_run", "PipelineRun", "PipelineRun details."),
+    ("pulsar_fold_result", "psrdb.tables.pulsar_fold_result", "PulsarFoldResult", "A pulsar pulsar_fold_result/standard"),
+    ("pulsar_fold_summary", "psrdb.tables.pulsar_fold_summary", "PulsarFoldSummary", "A pulsar pulsar_fold_summary/standard"),
+    ("pipeline_image", "psrdb.tables.pipeline_image", "PipelineImage", "A pipelineimage with type and rank informing the position of the image"),
+    ("toa", "psrdb.tables.toa", "Toa", "A pulsar toa/standard"),
+    ("residual", "psrdb.tables.residual", "Residual", "A pulsar residual/standard"),
+]
+
+
+def load_table(command):
+    """Import and return the table class of a command."""
+    for name, module_name, class_name, _ in TABLE_COMMANDS:
+        if name == command:
+            return getattr(import_module(module_name), class_name)
+    raise RuntimeError(f"Unknown command {command}")
 
 
 def main():
@@ -30,52 +44,40 @@ def main():
     )
     subparsers.required = True
 
-    tables = [
-        Pulsar,
-        Telescope,
-        MainProject,
-        Project,
-        Ephemeris,
-        Template,
-        Calibration,
-        Observation,
-        PipelineRun,
-        PulsarFoldResult,
-        PulsarFoldSummary,
-        PipelineImage,
-        Toa,
-        Residual,
-    ]
-
-    configured = []
-    for t in tables:
-        n = t.get_name()
-        p = subparsers.add_parser(n, help=t.get_description())
-        t.configure_parsers(p)
-        configured.append({"name": n, "parser": p, "table": t})
+    # Add a placeholder parser for each table so only the chosen table's module is imported
+    command_parsers = {}
+    for name, _, _, description in TABLE_COMMANDS:
+        command_parsers[name] = subparsers.add_parser(name, help=description, add_help=False)
+    known_args, _ = parser.parse_known_args()
+    table_class = load_table(known_args.command)
+    command_parser = command_parsers[known_args.command]
+    command_parser.add_argument("-h", "--help", action="help", help="show this help message and exit")
+    table_class.configure_parsers(command_parser)
 
     args = parser.parse_args()
-    if args.url is None:
+    if args.url is None and args.backend == "remote":
         raise RuntimeError("GraphQL URL must be provided in $PSRDB_URL or via -u option")
-    if args.token is None:
+    if args.token is None and args.backend == "remote":
         raise RuntimeError("GraphQL Token must be provided in $PSRDB_TOKEN or via -t option")
 
-    for c in configured:
-        if args.command == c["name"]:
-            client = GraphQLClient(args.url, args.token, verbose=args.verbose)
-            table = c["table"](client)
-            table.set_quiet(args.quiet)
-            table.set_use_pagination(True)
-            response = table.process(args)
-            if 'status_code' in dir(response):
-                if response.status_code not in (200, 201):
-                    logger.error(f"Query failed with the error code {response.status_code}, error:")
-                    print(json.loads(response.content))
-                    sys.exit(response.status_code)
-                if args.verbose:
-                    import json
-                    print(response.status_code)
-                    print(json.loads(response.content))
+    from psrdb.graphql_client import GraphQLClient
+
+    client = GraphQLClient(args.url, args.token, verbose=args.verbose)
+    table = table_class(client)
+    table.set_fields(args.fields)
+    table.set_page_budget(args.page_bytes, args.page_seconds)
+    table.set_backend(args.backend, args.mirror_path)
+    table.set_quiet(args.quiet)
+    table.set_use_pagination(True)
+    response = table.process(args)
+    if 'status_code' in dir(response):
+        if response.status_code not in (200, 201):
+            logger.error(f"Query failed with the error code {response.status_code}, error:")
+            print(json.loads(response.content))
+            sys.exit(response.status_code)
+        if args.verbose:
+            print(response.status_code)
+            print(json.loads(response.content))
 
 
 if __name__ == "__main__":
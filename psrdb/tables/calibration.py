@@ -21,7 +21,7 @@ class Calibration(GraphQLTable):
         self.table_name = "calibration"
         self.field_names = ["id", "scheduleBlockId", "calibrationType", "location"]
 
-    def list(self, id=None, type=None):
+    def list(self, id=None, type=None, fields=None):
         """Return a list of Calibration information based on the `self.field_names` and filtered by the parameters.
 
         Parameters
@@ -30,6 +30,8 @@ class Calibration(GraphQLTable):
             Filter by the database ID, by default None
         type : str, optional
             Filter by the observation type (pre or post), by default None
+        fields : list of str, optional
+            Only query these fields (dotted paths such as "id" or "pulsar.name"), by default all of `self.field_names`
 
         Returns
         -------
@@ -42,7 +44,7 @@ class Calibration(GraphQLTable):
             {"field": "id", "value": int(id) if id is not None else None},
             {"field": "type", "value": type},
         ]
-        return GraphQLTable.list_graphql(self, self.table_name, filters, [], self.field_names)
+        return GraphQLTable.list_graphql(self, self.table_name, filters, [], self.get_field_names(fields))
 
     def create(self, schedule_block_id, type, location):
         """Create a new Calibration database object.
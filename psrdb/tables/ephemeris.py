@@ -1,7 +1,9 @@
 import json
-import hashlib
 
 from psrdb.graphql_table import GraphQLTable
+from psrdb.utils.ephemeris import Ephemeris as ParsedEphemeris, ephemeris_hash
+from psrdb.utils.other import cached_mutation_response
+from psrdb.utils.rest_upload import UploadIndex
 
 
 def get_parsers():
@@ -48,7 +50,7 @@ class Ephemeris(GraphQLTable):
             "validTo",
         ]
 
-    def list(self, id=None, pulsar_id=None, p0=None, dm=None, eph=None):
+    def list(self, id=None, pulsar_id=None, p0=None, dm=None, eph=None, fields=None):
         """Return a list of Ephemeris information based on the `self.field_names` and filtered by the parameters.
 
         Parameters
@@ -63,6 +65,8 @@ class Ephemeris(GraphQLTable):
             Filter by the pulsar DM, by default None.
         eph : str, optional
             Filter by the ephemeris hash, by default None.
+        fields : list of str, optional
+            Only query these fields (dotted paths such as "id" or "pulsar.name"), by default all of `self.field_names`
 
         Returns
         -------
@@ -82,7 +86,7 @@ class Ephemeris(GraphQLTable):
         if eph:
             # convert string to json dict, to ensure the hash matches
             eph_json = json.loads(eph)
-            eph_hash = hashlib.md5(json.dumps(eph_json, sort_keys=True, indent=2).encode("utf-8")).hexdigest()
+            eph_hash = ephemeris_hash(eph_json)
 
         filters = [
             {"field": "id", "value": int(id) if id is not None else None},
@@ -91,7 +95,57 @@ class Ephemeris(GraphQLTable):
             {"field": "dm", "value": dm},
             {"field": "ephemerisHash", "value": eph_hash},
         ]
-        return GraphQLTable.list_graphql(self, self.table_name, filters, [], self.field_names)
+        return GraphQLTable.list_graphql(self, self.table_name, filters, [], self.get_field_names(fields))
+
+    def find_by_hash(self, pulsar, eph_hash, project_code=None, project_short=None):
+        """Return the ID of an existing Ephemeris of the pulsar and project with the ephemerisHash, or None.
+
+        The same ephemeris uploaded by another project is a different Ephemeris so only those of
+        the given project match. Without a project code or short name nothing matches, as the
+        project the server would create the Ephemeris for is unknown.
+
+        Parameters
+        ----------
+        pulsar : str
+            The pulsar name.
+        eph_hash : str
+            The md5 hash of the ephemeris (see `psrdb.utils.ephemeris.ephemeris_hash`).
+        project_code : str, optional
+            The project code, by default None
+        project_short : str, optional
+            The project short name (e.g PTA), by default None
+
+        Returns
+        -------
+        str or None
+            The GraphQL ID of the matching Ephemeris or None if there is no match.
+        """
+        if project_code is None and project_short is None:
+            return None
+        get_dicts = self.get_dicts
+        print_stdout = self.print_stdout
+        self.get_dicts = True
+        self.print_stdout = False
+        try:
+            ephemeris_dicts = GraphQLTable.list_graphql(
+                self,
+                self.table_name,
+                [{"field": "ephemerisHash", "value": eph_hash}],
+                [],
+                ["id", "pulsar {name}", "project {code short}"],
+            )
+        finally:
+            self.get_dicts = get_dicts
+            self.print_stdout = print_stdout
+        for ephemeris_dict in ephemeris_dicts:
+            project = ephemeris_dict.get("project") or {}
+            if (
+                ephemeris_dict["pulsar"]["name"] == pulsar
+                and project_code in (None, project.get("code"))
+                and project_short in (None, project.get("short"))
+            ):
+                return ephemeris_dict["id"]
+        return None
 
     def create(
             self,
@@ -100,6 +154,7 @@ class Ephemeris(GraphQLTable):
             project_code=None,
             project_short=None,
             comment=None,
+            deduplicate=False,
         ):
         """Create a new Ephemeris database object.
 
@@ -115,6 +170,10 @@ class Ephemeris(GraphQLTable):
             The project short name (e.g PTA), by default None
         comment : str, optional
             A comment about the ephemeris, by default None
+        deduplicate : bool, optional
+            Skip the mutation if the ephemeris already exists for the pulsar and project. The ephemerisHash is
+            computed locally and checked against the local `UploadIndex` and then the database,
+            by default False
 
         Returns
         -------
@@ -153,7 +212,30 @@ class Ephemeris(GraphQLTable):
             "projectShort": project_short,
             "comment": comment,
         }
-        return self.mutation_graphql()
+        if not deduplicate:
+            return self.mutation_graphql()
+
+        # Check if the ephemeris has already been uploaded before sending the text
+        parsed_ephemeris = ParsedEphemeris()
+        parsed_ephemeris.load_from_string(ephemeris_str)
+        eph_hash = parsed_ephemeris.get_hash()
+        index_fields = {k: v for k, v in self.variables.items() if k != "ephemerisText"}
+        upload_index = UploadIndex()
+        ephemeris_id = upload_index.lookup(self.client.graphql_url, index_fields, eph_hash)
+        if ephemeris_id is None:
+            ephemeris_id = self.find_by_hash(pulsar, eph_hash, project_code, project_short)
+        if ephemeris_id is not None:
+            self.logger.info(f"Ephemeris {ephemeris} already exists as Ephemeris id: {ephemeris_id}")
+            response = cached_mutation_response(self.table_name, ephemeris_id)
+            self.parse_mutation_response(response, self.table_name, self.mutation_name)
+        else:
+            response = self.mutation_graphql()
+            content = json.loads(response.content)
+            if response.status_code == 200 and "errors" not in content.keys():
+                ephemeris_id = content["data"][self.mutation_name]["ephemeris"]["id"]
+        if ephemeris_id is not None:
+            upload_index.add(self.client.graphql_url, index_fields, eph_hash, ephemeris_id)
+        return response
 
     def update(self, id, pulsar, created_at, created_by, ephemeris, p0, dm, rm, comment, valid_from, valid_to):
         """Update a Ephemeris database object.
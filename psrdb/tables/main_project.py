@@ -20,7 +20,7 @@ class MainProject(GraphQLTable):
         self.table_name = "main_project"
         self.field_names = ["id", "telescope {name} ", "name"]
 
-    def list(self, id=None, telescope=None, name=None):
+    def list(self, id=None, telescope=None, name=None, fields=None):
         """Return a list of MainProject information based on the `self.field_names` and filtered by the parameters.
 
         Parameters
@@ -31,6 +31,8 @@ class MainProject(GraphQLTable):
             Filter by the telescope name, by default None
         name : str, optional
             Filter by the name, by default None
+        fields : list of str, optional
+            Only query these fields (dotted paths such as "id" or "pulsar.name"), by default all of `self.field_names`
 
         Returns
         -------
@@ -44,7 +46,7 @@ class MainProject(GraphQLTable):
             {"field": "telescope", "value": telescope},
             {"field": "name", "value": name},
         ]
-        return GraphQLTable.list_graphql(self, self.table_name, filters, [], self.field_names)
+        return GraphQLTable.list_graphql(self, self.table_name, filters, [], self.get_field_names(fields))
 
     def create(self, telescope, name):
         """Create a new MainProject database object.
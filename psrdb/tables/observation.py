@@ -2,6 +2,23 @@ from datetime import datetime
 
 from psrdb.graphql_table import GraphQLTable
 from psrdb.utils.other import decode_id
+from psrdb.utils.export import DOWNLOAD_FORMATS, download_columns, write_download
+
+
+# The (header, field, format function) of each column of the download CSV
+DOWNLOAD_COLUMNS = [
+    ("Obs ID", "id", decode_id),
+    ("Pulsar Jname", "pulsar.name", str),
+    ("UTC Start", "utcStart", lambda utc: datetime.strptime(utc, '%Y-%m-%dT%H:%M:%S+00:00').strftime('%Y-%m-%d-%H:%M:%S')),
+    ("Project Short Name", "project.short", str),
+    ("Beam #", "beam", int),
+    ("Observing Band", "band", str),
+    ("Duration (s)", "duration", float),
+    ("Mode Duration (s)", "modeDuration", float),
+    ("Nchan", "foldNchan", int),
+    ("Nbin", "foldNbin", int),
+    ("Calibration Location", "calibration.location", str),
+]
 
 
 def get_parsers():
@@ -52,6 +69,7 @@ class Observation(GraphQLTable):
         obs_type='fold',
         unprocessed=None,
         incomplete=None,
+        fields=None,
     ):
         """Return a list of Observation information based on the `self.field_names` and filtered by the parameters.
 
@@ -77,6 +95,8 @@ class Observation(GraphQLTable):
             Filter to only returned unprocessed observations (no PulsarFoldResult)
         incomplete : bool, optional
             Filter to only return incomplete observations (most recent job run is not "Completed)
+        fields : list of str, optional
+            Only query these fields (dotted paths such as "id" or "pulsar.name"), by default all of `self.field_names`
 
         Returns
         -------
@@ -85,6 +105,36 @@ class Observation(GraphQLTable):
         client_response:
             Else a client response object.
         """
+        filters = self.list_filters(
+            id,
+            pulsar_name,
+            telescope_name,
+            project_id,
+            project_short,
+            main_project,
+            utcs,
+            utce,
+            obs_type,
+            unprocessed,
+            incomplete,
+        )
+        return GraphQLTable.list_graphql(self, self.table_name, filters, [], self.get_field_names(fields))
+
+    def list_filters(
+        self,
+        id=None,
+        pulsar_name=None,
+        telescope_name=None,
+        project_id=None,
+        project_short=None,
+        main_project="All",
+        utcs=None,
+        utce=None,
+        obs_type='fold',
+        unprocessed=None,
+        incomplete=None,
+    ):
+        """Return the query filters used by `list`, `list_by_pulsar`, `download` and `sync`."""
         # Convert dates to correct format
         if utcs == "":
             utcs = None
@@ -100,7 +150,6 @@ class Observation(GraphQLTable):
             project_short = None
         if pulsar_name == "":
             pulsar_name = None
-        """Return a list of records matching the id and/or any of the arguments."""
         filters = [
             {"field": "id", "value": int(id) if id is not None else None},
             {"field": "pulsar_Name", "value": pulsar_name},
@@ -116,7 +165,65 @@ class Observation(GraphQLTable):
             filters.append({"field": "unprocessed", "value": bool(unprocessed)})
         if incomplete is not None:
             filters.append({"field": "incomplete", "value": bool(incomplete)})
-        return GraphQLTable.list_graphql(self, self.table_name, filters, [], self.field_names)
+        return filters
+
+    def list_by_pulsar(
+        self,
+        pulsar_names,
+        telescope_name=None,
+        project_id=None,
+        project_short=None,
+        main_project="All",
+        utcs=None,
+        utce=None,
+        obs_type='fold',
+        unprocessed=None,
+        incomplete=None,
+        fields=None,
+        batch_size=50,
+    ):
+        """Return the Observations of each pulsar, batching the per pulsar queries into as few requests as possible.
+
+        Takes the same filters as `list`. Several pulsars are queried in each request using GraphQL aliases
+        and batches that fail are split in half (see `GraphQLTable.batch_list_graphql`).
+
+        Parameters
+        ----------
+        pulsar_names : list of str
+            The pulsar names.
+        fields : list of str, optional
+            Only query these fields (dotted paths such as "id" or "pulsar.name"), by default all of `self.field_names`
+        batch_size : int, optional
+            The maximum number of pulsars queried in each request, by default 50
+
+        Returns
+        -------
+        dict
+            The list of Observation dictionaries of each pulsar name.
+        """
+        keyed_filters = {}
+        for pulsar_name in pulsar_names:
+            keyed_filters[pulsar_name] = self.list_filters(
+                None,
+                [pulsar_name],
+                telescope_name,
+                project_id,
+                project_short,
+                main_project,
+                utcs,
+                utce,
+                obs_type,
+                unprocessed,
+                incomplete,
+            )
+        return GraphQLTable.batch_list_graphql(
+            self,
+            self.table_name,
+            keyed_filters,
+            [],
+            self.get_field_names(fields),
+            batch_size=batch_size,
+        )
 
     def download(
         self,
@@ -131,6 +238,8 @@ class Observation(GraphQLTable):
         obs_type='fold',
         unprocessed=None,
         incomplete=None,
+        fields=None,
+        format="csv",
     ):
         """Return a list of Observation information based on the `self.field_names` and filtered by the parameters.
 
@@ -156,6 +265,10 @@ class Observation(GraphQLTable):
             Filter to only returned unprocessed observations (no PulsarFoldResult)
         incomplete : str, optional
             Filter to only return incomplete observations (most recent job run is not "Completed)
+        fields : list of str, optional
+            Only query and write the columns of these fields (dotted paths such as "id" or "pulsar.name"), by default all of the columns
+        format : str, optional
+            The file format, one of csv, parquet or feather, by default csv
 
         Returns
         -------
@@ -164,40 +277,26 @@ class Observation(GraphQLTable):
         client_response:
             Else a client response object.
         """
-        # Convert dates to correct format
-        if utcs == "":
-            utcs = None
-        elif utcs is not None:
-            d = datetime.strptime(utcs, '%Y-%m-%d-%H:%M:%S')
-            utcs = f"{d.date()}T{d.time()}+00:00"
-        if utce == "":
-            utce = None
-        elif utce is not None:
-            d = datetime.strptime(utce, '%Y-%m-%d-%H:%M:%S')
-            utce = f"{d.date()}T{d.time()}+00:00"
-        if project_short == "":
-            project_short = None
-        if pulsar_name == "":
-            pulsar_name = None
-        """Return a list of records matching the id and/or any of the arguments."""
-        filters = [
-            {"field": "id", "value": int(id) if id is not None else None},
-            {"field": "pulsar_Name", "value": pulsar_name},
-            {"field": "telescope_Name", "value": telescope_name},
-            {"field": "project_Id", "value": int(project_id) if project_id is not None else None},
-            {"field": "project_Short", "value": project_short},
-            {"field": "mainProject", "value": main_project},
-            {"field": "utcStartGte", "value": utcs},
-            {"field": "utcStartLte", "value": utce},
-            {"field": "obsType", "value": obs_type},
-        ]
-        if unprocessed is not None:
-            filters.append({"field": "unprocessed", "value": unprocessed})
-        if incomplete is not None:
-            filters.append({"field": "incomplete", "value": incomplete})
+        filters = self.list_filters(
+            id,
+            pulsar_name,
+            telescope_name,
+            project_id,
+            project_short,
+            main_project,
+            utcs,
+            utce,
+            obs_type,
+            unprocessed,
+            incomplete,
+        )
+        filter_values = {f["field"]: f["value"] for f in filters}
+        utcs = filter_values["utcStartGte"]
+        utce = filter_values["utcStartLte"]
 
         self.get_dicts = True
-        observations_dicts = GraphQLTable.list_graphql(self, self.table_name, filters, [], self.field_names)
+        columns = self.get_download_columns(DOWNLOAD_COLUMNS, fields)
+        observations_dicts = GraphQLTable.list_graphql(self, self.table_name, filters, [], self.get_field_names(fields))
 
         # Create the output name
         output_name = "observations"
@@ -221,27 +320,8 @@ class Observation(GraphQLTable):
             output_name += "_unprocessed"
         if incomplete:
             output_name += "_incomplete"
-        output_name += ".csv"
-
-        # Loop over the pulsar_fold_results and dump them as a file
-        with open(output_name, "w") as f:
-            f.write("Obs ID,Pulsar Jname,UTC Start,Project Short Name,Beam #,Observing Band,Duration (s),Mode Duration (s),Nchan,Nbin,Calibration Location\n")
-            for observations_dict in observations_dicts:
-                data_line = [
-                    str(decode_id(observations_dict["id"])),
-                    str(observations_dict["pulsar"]["name"]),
-                    str(datetime.strptime(observations_dict['utcStart'], '%Y-%m-%dT%H:%M:%S+00:00').strftime('%Y-%m-%d-%H:%M:%S')),
-                    str(observations_dict["project"]["short"]),
-                    str(int(observations_dict["beam"])),
-                    str(observations_dict["band"]),
-                    str(float(observations_dict["duration"])),
-                    str(float(observations_dict["modeDuration"])),
-                    str(int(observations_dict["foldNchan"])),
-                    str(int(observations_dict["foldNbin"])),
-                    str(observations_dict["calibration"]["location"]),
-                ]
-                f.write(f"{','.join(data_line)}\n")
-        return output_name
+
+        return write_download(download_columns(observations_dicts, columns), output_name, format)
 
     def create(
         self,
@@ -663,6 +743,42 @@ class Observation(GraphQLTable):
         }
         return self.mutation_graphql()
 
+    def sync(
+        self,
+        pulsar_name=None,
+        telescope_name=None,
+        project_id=None,
+        project_short=None,
+        main_project="All",
+        utcs=None,
+        utce=None,
+        obs_type='fold',
+        mirror=None,
+        full=False,
+        lookback_days=2,
+    ):
+        """Sync the Observations matching the filters to a local mirror, only fetching those since the last sync.
+
+        Takes the same filters as `list`, see `psrdb.utils.mirror.Mirror.sync` for the other parameters.
+
+        Returns
+        -------
+        int
+            The number of observations fetched.
+        """
+        filters = self.list_filters(
+            None,
+            pulsar_name,
+            telescope_name,
+            project_id,
+            project_short,
+            main_project,
+            utcs,
+            utce,
+            obs_type,
+        )
+        return self.sync_graphql(filters, mirror=mirror, full=full, lookback_days=lookback_days)
+
     def process(self, args):
         """Parse the arguments collected by the CLI."""
         self.print_stdout = True
@@ -680,6 +796,20 @@ class Observation(GraphQLTable):
                 unprocessed=args.unprocessed,
                 incomplete=args.incomplete,
             )
+        elif args.subcommand == "sync":
+            return self.sync(
+                pulsar_name=args.pulsar,
+                telescope_name=args.telescope_name,
+                project_id=args.project_id,
+                project_short=args.project_code,
+                main_project=args.main_project,
+                utcs=args.utcs,
+                utce=args.utce,
+                obs_type=args.obs_type,
+                mirror=args.mirror,
+                full=args.full,
+                lookback_days=args.lookback_days,
+            )
         elif args.subcommand == "download":
             return self.download(
                 id=args.id,
@@ -693,6 +823,7 @@ class Observation(GraphQLTable):
                 obs_type=args.obs_type,
                 unprocessed=args.unprocessed,
                 incomplete=args.incomplete,
+                format=args.format,
             )
         else:
             raise RuntimeError(f"{args.subcommand} command is not implemented")
@@ -860,5 +991,45 @@ class Observation(GraphQLTable):
             default=None,
             help='Filter to only return incomplete observations (most recent job run is not "Completed"',
         )
+        parser_download.add_argument("--format", type=str, choices=DOWNLOAD_FORMATS, default="csv", help="The file format [str]")
 
-
+        parser_sync = subs.add_parser("sync", help="sync the observations matching the filters to a local mirror")
+        parser_sync.add_argument(
+            "--pulsar", metavar="TGTNAME", type=str, nargs='+', help="sync observations matching the target (pulsar) name [str]"
+        )
+        parser_sync.add_argument(
+            "--telescope_name", metavar="TELNAME", type=str, help="sync observations matching the telescope name [int]"
+        )
+        parser_sync.add_argument(
+            "--project_id", metavar="PROJID", type=int, help="sync observations matching the project id [id]"
+        )
+        parser_sync.add_argument(
+            "--project_code", metavar="PROJCODE", type=str, help="sync observations matching the project code [str]"
+        )
+        parser_sync.add_argument(
+            "--main_project",
+            metavar="MAINPROJECT",
+            type=str,
+            default="MeerTIME",
+            help="sync observations matching the mainproject [str]"
+        )
+        parser_sync.add_argument(
+            "--utcs",
+            metavar="UTCGTE",
+            type=str,
+            help="sync observations with utc_start greater than or equal to the timestamp [YYYY-MM-DD-HH:MM:SS]",
+        )
+        parser_sync.add_argument(
+            "--utce",
+            metavar="UTCLTE",
+            type=str,
+            help="sync observations with utc_start less than or equal to the timestamp [YYYY-MM-DD-HH:MM:SS]",
+        )
+        parser_sync.add_argument(
+            "--obs_type",
+            metavar="OBSTYPE",
+            type=str,
+            default="fold",
+            help="An observation type from fold, search and cal",
+        )
+        cls.add_sync_arguments(parser_sync)
@@ -1,6 +1,8 @@
 import requests
+from concurrent.futures import ThreadPoolExecutor
 
 from psrdb.graphql_table import GraphQLTable
+from psrdb.utils.rest_upload import ChunkedUploader, UploadIndex, upload_file, file_sha256, cached_upload_response
 
 
 def get_parsers():
@@ -24,7 +26,7 @@ class PipelineImage(GraphQLTable):
 
         self.field_names = ["id", "image", "imageType", "resolution", "cleaned", "pipelineRun {id}"]
 
-    def list(self, id=None, pipeline_run_id=None):
+    def list(self, id=None, pipeline_run_id=None, fields=None):
         """Return a list of PipelineImage information based on the `self.field_names` and filtered by the parameters.
 
         Parameters
@@ -33,6 +35,8 @@ class PipelineImage(GraphQLTable):
             Filter by the database ID, by default None
         pipeline_run_id : int, optional
             Filter by the pipeline run ID, by default None
+        fields : list of str, optional
+            Only query these fields (dotted paths such as "id" or "pulsar.name"), by default all of `self.field_names`
 
         Returns
         -------
@@ -45,7 +49,7 @@ class PipelineImage(GraphQLTable):
             {"field": "id", "value": int(id) if id is not None else None},
             {"field": "pipelineRunId", "value": int(pipeline_run_id) if pipeline_run_id is not None else None},
         ]
-        return GraphQLTable.list_graphql(self, self.table_name, filters, [], self.field_names)
+        return GraphQLTable.list_graphql(self, self.table_name, filters, [], self.get_field_names(fields))
 
     def create(
             self,
@@ -54,6 +58,8 @@ class PipelineImage(GraphQLTable):
             image_type,
             resolution,
             cleaned,
+            deduplicate=False,
+            chunk_size=None,
         ):
         """Create a new PipelineImage database object.
 
@@ -69,27 +75,106 @@ class PipelineImage(GraphQLTable):
             The resolution of the image (high or low).
         cleaned : bool
             Whether the image is from cleaned data (RFI removed).
+        deduplicate : bool, optional
+            Skip the upload if an identical image file was already uploaded with the same
+            parameters (checked against the local `UploadIndex`), by default False
+        chunk_size : int, optional
+            If set, upload the file in parts of this many bytes with the resumable
+            `ChunkedUploader` instead of a single post, by default None
 
         Returns
         -------
         client_response:
             A client response object.
         """
-        # Open the file in binary mode
-        with open(image_path, 'rb') as file:
+        variables = {
+            "pipeline_run_id": pipeline_run_id,
+            "image_type": image_type,
+            "resolution": resolution,
+            "cleaned": cleaned,
+        }
+        url = f'{self.client.rest_api_url}image/'
+        if deduplicate:
+            upload_index = UploadIndex()
+            digest = file_sha256(image_path)
+            upload_id = upload_index.lookup(url, variables, digest)
+            if upload_id is not None:
+                self.logger.info(f"Skipping upload of {image_path} as it was already uploaded as PipelineImage id: {upload_id}")
+                return cached_upload_response(upload_id)
+
+        if chunk_size is not None:
+            response = ChunkedUploader(self.client, chunk_size=chunk_size, logger=self.logger).upload(url, variables, image_path)
+        else:
+            # Open the file in binary mode
+            with open(image_path, 'rb') as file:
+                files = {
+                    "image_upload": file,
+                }
+                # Post to the rest api
+                response = requests.post(url, data=variables, files=files, headers=self.client.header)
+
+        if deduplicate:
+            upload_index.record(url, variables, digest, response)
+        return response
+
+    def create_many(
+            self,
+            pipeline_run_id,
+            images,
+            max_workers=8,
+            retries=3,
+            deduplicate=False,
+        ):
+        """Upload several PipelineImage files concurrently.
+
+        The images are streamed from disk over a shared pooled session and each
+        upload is retried independently if it fails.
+
+        Parameters
+        ----------
+        pipeline_run_id : int
+            The ID of the PipelineRun database object the images are associated with.
+        images : list of tuples
+            A (image_path, image_type, resolution, cleaned) tuple for each image, see `create`.
+        max_workers : int, optional
+            The maximum number of simultaneous uploads, by default 8
+        retries : int, optional
+            The number of times to re-send a failed upload, by default 3
+        deduplicate : bool, optional
+            Skip images that were already uploaded with the same parameters, see `create`, by default False
+
+        Returns
+        -------
+        list of client_response:
+            The client response of each upload in the same order as `images`.
+        """
+        session = self.client.get_rest_session(pool_size=max_workers)
+        url = f'{self.client.rest_api_url}image/'
+        if deduplicate:
+            upload_index = UploadIndex()
+
+        def upload(image):
+            image_path, image_type, resolution, cleaned = image
             variables = {
                 "pipeline_run_id": pipeline_run_id,
                 "image_type": image_type,
                 "resolution": resolution,
                 "cleaned": cleaned,
             }
-            files = {
-                "image_upload": file,
-            }
-            # Post to the rest api
-            response = requests.post(f'{self.client.rest_api_url}image/', data=variables, files=files, headers=self.client.header)
-
-        return response
+            if deduplicate:
+                digest = file_sha256(image_path)
+                upload_id = upload_index.lookup(url, variables, digest)
+                if upload_id is not None:
+                    self.logger.info(f"Skipping upload of {image_path} as it was already uploaded as PipelineImage id: {upload_id}")
+                    return cached_upload_response(upload_id)
+
+            response = upload_file(session, url, variables, "image_upload", image_path, retries=retries, logger=self.logger)
+            if deduplicate:
+                upload_index.record(url, variables, digest, response)
+            return response
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(upload, images))
 
     def process(self, args):
         """Parse the arguments collected by the CLI."""
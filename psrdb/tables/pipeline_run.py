@@ -63,6 +63,7 @@ class PipelineRun(GraphQLTable):
         flux=None,
         rm=None,
         percentRfiZapped=None,
+        fields=None,
     ):
         """Return a list of PipelineRun information based on the `self.field_names` and filtered by the parameters.
 
@@ -104,6 +105,8 @@ class PipelineRun(GraphQLTable):
             Filter by the rm, by default None
         percentRfiZapped : float, optional
             Filter by the percentRfiZapped, by default None
+        fields : list of str, optional
+            Only query these fields (dotted paths such as "id" or "pulsar.name"), by default all of `self.field_names`
 
         Returns
         -------
@@ -132,7 +135,7 @@ class PipelineRun(GraphQLTable):
             {"field": "rm", "value": rm},
             {"field": "percentRfiZapped", "value": percentRfiZapped},
         ]
-        return GraphQLTable.list_graphql(self, self.table_name, filters, [], self.field_names)
+        return GraphQLTable.list_graphql(self, self.table_name, filters, [], self.get_field_names(fields))
 
     def create(
         self,
@@ -21,7 +21,7 @@ class Project(GraphQLTable):
         self.table_name = "project"
         self.field_names = ["id", "mainProject {name}", "code", "short", "embargoPeriod", "description"]
 
-    def list(self, id=None, mainProject=None, code=None):
+    def list(self, id=None, mainProject=None, code=None, fields=None):
         """Return a list of Project information based on the `self.field_names` and filtered by the parameters.
 
         Parameters
@@ -32,6 +32,8 @@ class Project(GraphQLTable):
             Filter by the mainProject name, by default None
         code : str, optional
             Filter by the code, by default None
+        fields : list of str, optional
+            Only query these fields (dotted paths such as "id" or "pulsar.name"), by default all of `self.field_names`
 
         Returns
         -------
@@ -45,7 +47,7 @@ class Project(GraphQLTable):
             {"field": "mainProject", "value": mainProject},
             {"field": "code", "value": code},
         ]
-        return GraphQLTable.list_graphql(self, self.table_name, filters, [], self.field_names)
+        return GraphQLTable.list_graphql(self, self.table_name, filters, [], self.get_field_names(fields))
 
     def create(self, main_project, code, short, embargo_period, description):
         """Create a new Project database object.
@@ -1,6 +1,82 @@
-from pulsar_paragraph.pulsar_paragraph import create_pulsar_paragraph
+import json
+from concurrent.futures import ThreadPoolExecutor
 
 from psrdb.graphql_table import GraphQLTable
+from psrdb.utils.other import decode_id, chunk_list
+
+
+# The names of the pulsars known to be in the database of each GraphQL URL, see `Pulsar.exists`
+_KNOWN_PULSARS = {}
+# The ATNF catalogue names of pulsars whose name in the database differs
+ATNF_NAMES = {
+    "J1402-5124": "J1402-5021",
+    "J1803-3002": "J1803-3002A",
+    "J1826-2413": "J1826-2415",
+    "J1147-6608": "J1146-6610",
+    "J0514-4407": "J0514-4408",
+    "J1325-6256": "J1325-6253",
+    "J0922-5202": "J0921-5202",
+    "J1759-2402": "J1759-24",
+    "J0024-7204AA": "J0024-7204aa",
+    "J1653-4518": "J1653-45",
+    "J0837-2454": "J0837-24",
+    "J1804-0735A": "J1804-0735",
+    "J1326-4728K": "J1326-4728D",
+}
+
+
+def describe_pulsars(names, query=None):
+    """Generate the `pulsar_paragraph` description of each pulsar with one ATNF catalogue query.
+
+    Parameters
+    ----------
+    names : list of str
+        The pulsar names.
+    query : pandas.DataFrame, optional
+        An ATNF catalogue table (from `psrqpy.QueryATNF().pandas`) to reuse, by default only the
+        pulsars in `names` are queried.
+
+    Returns
+    -------
+    dict
+        The description of each pulsar found in the ATNF catalogue keyed on the name.
+    """
+    from pulsar_paragraph.pulsar_classes import PulsarParagraph
+    from pulsar_paragraph.pulsar_paragraph import create_pulsar_paragraph
+
+    names = list(names)
+    if not names:
+        return {}
+    if query is None:
+        import psrqpy
+
+        query = psrqpy.QueryATNF(psrs=names).pandas
+    query = query[query["PSRJ"].isin(names)]
+    # The paragraphs are in the order of the rows of the query
+    paragraphs = create_pulsar_paragraph(pulsar_names=names, query=query, pulsar_paragraph=PulsarParagraph())
+    return dict(zip(query["PSRJ"], paragraphs))
+
+
+def generate_batch_update_mutation(aliases):
+    """Generate a mutation that packs an updatePulsar of the name and comment for each alias into one request.
+
+    The variables of each update are prefixed by its alias, e.g. "u0_id", "u0_name" and "u0_comment".
+    """
+    argument_definitions = []
+    mutations = []
+    for alias in aliases:
+        argument_definitions.append(f"${alias}_id: Int!, ${alias}_name: String!, ${alias}_comment: String")
+        mutations.append(f"""    {alias}: updatePulsar(id: ${alias}_id, input: {{
+        name: ${alias}_name,
+        comment: ${alias}_comment
+    }}) {{
+        pulsar {{
+            id
+        }}
+    }}""")
+    argument_definitions = ",\n    ".join(argument_definitions)
+    mutations = "\n".join(mutations)
+    return f"mutation (\n    {argument_definitions}\n) {{\n{mutations}\n}}"
 
 
 def get_parsers():
@@ -23,7 +99,7 @@ class Pulsar(GraphQLTable):
         self.table_name = "pulsar"
         self.field_names = ["id", "name", "comment"]
 
-    def list(self, id=None, name=None):
+    def list(self, id=None, name=None, fields=None):
         """Return a list of Pulsar information based on the `self.field_names` and filtered by the parameters.
 
         Parameters
@@ -32,6 +108,8 @@ class Pulsar(GraphQLTable):
             Filter by the database ID, by default None
         name : str, optional
             Filter by the name, by default None
+        fields : list of str, optional
+            Only query these fields (dotted paths such as "id" or "pulsar.name"), by default all of `self.field_names`
 
         Returns
         -------
@@ -44,9 +122,61 @@ class Pulsar(GraphQLTable):
             {"field": "id", "value": int(id) if id is not None else None},
             {"field": "name", "value": name},
         ]
-        return GraphQLTable.list_graphql(self, self.table_name, filters, [], self.field_names)
+        return GraphQLTable.list_graphql(self, self.table_name, filters, [], self.get_field_names(fields))
+
+    def exists(self, name):
+        """Return True if a Pulsar with the name is in the database.
+
+        The names of all the pulsars are listed once and cached (along with the pulsars created
+        since) so checking many pulsars, e.g. when ingesting observations, costs a single query.
+
+        Parameters
+        ----------
+        name : str
+            The name of the pulsar.
+
+        Returns
+        -------
+        bool
+            If the pulsar exists.
+        """
+        url = getattr(self.client, "graphql_url", None)
+        if url not in _KNOWN_PULSARS:
+            get_dicts = self.get_dicts
+            print_stdout = self.print_stdout
+            self.get_dicts = True
+            self.print_stdout = False
+            try:
+                pulsar_dicts = self.list(fields=["name"])
+            finally:
+                self.get_dicts = get_dicts
+                self.print_stdout = print_stdout
+            _KNOWN_PULSARS[url] = {pulsar_dict["name"] for pulsar_dict in pulsar_dicts}
+        return name in _KNOWN_PULSARS[url]
+
+    def create_if_missing(self, name, comment=None):
+        """Create a Pulsar database object unless the pulsar already exists (see `exists`).
+
+        The description isn't generated, fill them in for many pulsars at once with `describe_missing`.
+
+        Parameters
+        ----------
+        name : str
+            The name of the pulsar.
+        comment : str, optional
+            A description of the pulsar, by default None
+
+        Returns
+        -------
+        bool
+            True if the pulsar was created.
+        """
+        if self.exists(name):
+            return False
+        self.create(name, comment=comment)
+        return True
 
-    def create(self, name, comment=None):
+    def create(self, name, comment=None, describe=False):
         """Create a new Pulsar database object.
 
         Parameters
@@ -55,6 +185,10 @@ class Pulsar(GraphQLTable):
             The name of the pulsar.
         comment : str, optional
             A description of the pulsar (normally produced by the `pulsar_paragraph` package), by default None
+        describe : bool, optional
+            Generate the description with `describe_pulsars` if no comment is given, by default False.
+            Generating descriptions queries the ATNF catalogue so it is cheaper to fill them in for many
+            pulsars at once with `describe_missing`.
 
         Returns
         -------
@@ -73,18 +207,19 @@ class Pulsar(GraphQLTable):
             }
         }
         """
-        if comment is None:
-            # Generate pulsar paragraph
-            paragraphs = create_pulsar_paragraph(pulsar_names=[name])
-            if len(paragraphs) > 0:
-                comment = paragraphs[0]
-            else:
-                comment = None
+        if comment is None and describe:
+            comment = describe_pulsars([name]).get(name)
+            if comment is None:
+                self.logger.warning(f"{name} is not in the ATNF catalogue, creating it without a description")
         self.variables = {
             "name": name,
             "comment": comment,
         }
-        return self.mutation_graphql()
+        response = self.mutation_graphql()
+        url = getattr(self.client, "graphql_url", None)
+        if url in _KNOWN_PULSARS and response.status_code == 200 and "errors" not in json.loads(response.content):
+            _KNOWN_PULSARS[url].add(name)
+        return response
 
     def update(self, id, name, comment):
         """Update a Pulsar database object.
@@ -96,12 +231,18 @@ class Pulsar(GraphQLTable):
         name : str
             The name of the pulsar.
         comment : str, optional
-            A description of the pulsar (normally produced by the `pulsar_paragraph` package), by default None
+            A description of the pulsar, by default None which generates it with `describe_pulsars`
 
         Returns
         -------
         client_response:
             A client response object.
+
+        Raises
+        ------
+        RuntimeError
+            If no comment is given and the pulsar is not in the ATNF catalogue, rather than
+            replacing its description with null.
         """
         self.mutation_name = "updatePulsar"
         self.mutation = """
@@ -120,7 +261,9 @@ class Pulsar(GraphQLTable):
         """
         if comment is None:
             # Generate pulsar paragraph
-            comment = create_pulsar_paragraph(pulsar_names=[name])[0]
+            comment = describe_pulsars([name]).get(name)
+            if comment is None:
+                raise RuntimeError(f"Can not generate a description of {name}, it is not in the ATNF catalogue")
         self.variables = {
             "id": int(id),
             "name": name,
@@ -128,6 +271,131 @@ class Pulsar(GraphQLTable):
         }
         return self.mutation_graphql()
 
+    def _list_dicts(self, fields):
+        """Return the dictionaries of all the pulsars without printing them."""
+        get_dicts = self.get_dicts
+        print_stdout = self.print_stdout
+        self.get_dicts = True
+        self.print_stdout = False
+        try:
+            return self.list(fields=fields)
+        finally:
+            self.get_dicts = get_dicts
+            self.print_stdout = print_stdout
+
+    def update_comments(self, updates, batch_size=50, max_workers=4):
+        """Update the descriptions of many pulsars, packing several updates into each request with GraphQL aliases.
+
+        Parameters
+        ----------
+        updates : list of tuple
+            The (database ID, name, comment) of each pulsar.
+        batch_size : int, optional
+            The maximum number of updates in each request, by default 50
+        max_workers : int, optional
+            The maximum number of simultaneous requests, by default 4
+
+        Returns
+        -------
+        int
+            The number of pulsars updated.
+        """
+        def update(batch):
+            aliases = [f"u{i}" for i in range(len(batch))]
+            variables = {}
+            for alias, (id, name, comment) in zip(aliases, batch):
+                variables[f"{alias}_id"] = int(id)
+                variables[f"{alias}_name"] = name
+                variables[f"{alias}_comment"] = comment
+            payload = {"query": generate_batch_update_mutation(aliases), "variables": json.dumps(variables)}
+            try:
+                response = self.client.post(payload)
+            except (IOError, ValueError) as e:
+                self.logger.warning(f"Batch update of {len(batch)} pulsars failed: {e}")
+                return 0
+            if response.status_code != 200:
+                self.logger.warning(f"Bad response status_code={response.status_code}")
+                return 0
+            content = json.loads(response.content)
+            if "errors" in content.keys():
+                self.logger.warning(f"Errors returned in content {content['errors']}")
+            # Updates that failed are null in the response data
+            data = content.get("data") or {}
+            return sum(1 for alias in aliases if data.get(alias))
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return sum(executor.map(update, chunk_list(updates, batch_size)))
+
+    def refresh_descriptions(self, names=None, only_missing=False, query=None, batch_size=50, max_workers=4, dry_run=False):
+        """Regenerate the pulsar descriptions and update those that have changed.
+
+        The descriptions of all the pulsars are generated in one pass over one ATNF catalogue
+        table and compared with the current comments. Only the changed descriptions are sent, with
+        several updates in each request (see `update_comments`). Pulsars that aren't in the ATNF
+        catalogue (see `ATNF_NAMES` for those named differently) are left as they are.
+
+        Parameters
+        ----------
+        names : list of str, optional
+            Only refresh these pulsars, by default all pulsars.
+        only_missing : bool, optional
+            Only describe pulsars without a description, by default False
+        query : pandas.DataFrame, optional
+            An ATNF catalogue table to reuse, by default the whole catalogue is queried.
+        batch_size : int, optional
+            The maximum number of updates in each request, by default 50
+        max_workers : int, optional
+            The maximum number of simultaneous requests, by default 4
+        dry_run : bool, optional
+            Only print the names of the pulsars whose description would change, by default False
+
+        Returns
+        -------
+        int
+            The number of pulsars updated (or that would be updated by a dry run).
+        """
+        pulsar_dicts = [
+            pulsar_dict
+            for pulsar_dict in self._list_dicts(["id", "name", "comment"])
+            if (names is None or pulsar_dict["name"] in names) and not (only_missing and pulsar_dict["comment"])
+        ]
+        atnf_names = {pulsar_dict["name"]: ATNF_NAMES.get(pulsar_dict["name"], pulsar_dict["name"]) for pulsar_dict in pulsar_dicts}
+        if query is None and len(atnf_names) > 100:
+            import psrqpy
+
+            # Cheaper than asking for each pulsar by name
+            query = psrqpy.QueryATNF().pandas
+        comments = describe_pulsars(set(atnf_names.values()), query=query)
+
+        updates = []
+        for pulsar_dict in pulsar_dicts:
+            comment = comments.get(atnf_names[pulsar_dict["name"]])
+            if comment is not None and comment != pulsar_dict["comment"]:
+                updates.append((decode_id(pulsar_dict["id"]), pulsar_dict["name"], comment))
+        self.logger.info(f"The descriptions of {len(updates)} of {len(pulsar_dicts)} pulsars have changed")
+        if dry_run:
+            for _, name, _ in updates:
+                print(name)
+            return len(updates)
+        return self.update_comments(updates, batch_size=batch_size, max_workers=max_workers)
+
+    def describe_missing(self, names=None, query=None):
+        """Generate the descriptions of the pulsars without one, sharing one ATNF catalogue query.
+
+        Parameters
+        ----------
+        names : list of str, optional
+            Only describe these pulsars, by default all pulsars without a description.
+        query : pandas.DataFrame, optional
+            An ATNF catalogue table to reuse, see `describe_pulsars`.
+
+        Returns
+        -------
+        int
+            The number of pulsars updated.
+        """
+        return self.refresh_descriptions(names=names, only_missing=True, query=query)
+
     def delete(self, id):
         """Delete a Pulsar database object.
 
@@ -158,13 +426,21 @@ class Pulsar(GraphQLTable):
         """Parse the arguments collected by the CLI."""
         self.print_stdout = True
         if args.subcommand == "create":
-            return self.create(args.name, args.comment)
+            return self.create(args.name, args.comment, describe=args.describe)
         elif args.subcommand == "update":
             return self.update(args.id, args.name, args.comment)
         elif args.subcommand == "list":
             return self.list(args.id, args.name)
         elif args.subcommand == "delete":
             return self.delete(args.id)
+        elif args.subcommand == "refresh-descriptions":
+            return self.refresh_descriptions(
+                names=args.name,
+                only_missing=args.only_missing,
+                batch_size=args.batch_size,
+                max_workers=args.max_workers,
+                dry_run=args.dry_run,
+            )
         else:
             raise RuntimeError(f"{args.subcommand} command is not implemented")
 
@@ -195,3 +471,23 @@ class Pulsar(GraphQLTable):
         parser_list.add_argument("--id", metavar="ID", type=int, help="list Pulsars matching the id [int]")
         parser_list.add_argument("--name", metavar="name", type=str, help="list Pulsars matching the name [str]")
 
+        # create the parser for the "create" command
+        parser_create = subs.add_parser("create", help="create a new Pulsar")
+        parser_create.add_argument("name", metavar="NAME", type=str, help="name of the pulsar [str]")
+        parser_create.add_argument("--comment", metavar="COMMENT", type=str, help="description of the pulsar [str]")
+        parser_create.add_argument(
+            "--describe",
+            action="store_true",
+            help="generate the description from the ATNF catalogue if no comment is given",
+        )
+
+        # create the parser for the "refresh-descriptions" command
+        parser_refresh = subs.add_parser(
+            "refresh-descriptions",
+            help="regenerate the pulsar descriptions from the ATNF catalogue and update those that have changed",
+        )
+        parser_refresh.add_argument("--name", metavar="name", type=str, nargs="+", help="only refresh these pulsars [str]")
+        parser_refresh.add_argument("--only_missing", action="store_true", help="only describe pulsars without a description")
+        parser_refresh.add_argument("--batch_size", metavar="N", type=int, default=50, help="the maximum number of updates in each request [int, default 50]")
+        parser_refresh.add_argument("--max_workers", metavar="N", type=int, default=4, help="the maximum number of simultaneous requests [int, default 4]")
+        parser_refresh.add_argument("--dry_run", action="store_true", help="only print the pulsars whose description would change")
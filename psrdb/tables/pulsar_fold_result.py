@@ -2,6 +2,26 @@ from datetime import datetime
 
 from psrdb.graphql_table import GraphQLTable
 from psrdb.load_data import EXCLUDE_BADGES_CHOICES
+from psrdb.utils.export import DOWNLOAD_FORMATS, download_columns, optional, write_download
+
+
+# The (header, field, format function) of each column of the download file
+DOWNLOAD_COLUMNS = [
+    ("ID", "id", str),
+    ("UTC Start", "observation.utcStart", str),
+    ("Observing band", "observation.band", str),
+    ("Duration (s)", "observation.duration", optional(float)),
+    ("DM (pc cm^-3)", "pipelineRun.dm", optional(float)),
+    ("DM error (pc cm^-3)", "pipelineRun.dmErr", optional(float)),
+    ("DM epoch (MJD)", "pipelineRun.dmEpoch", optional(float)),
+    ("DM chi2r", "pipelineRun.dmChi2r", optional(float)),
+    ("DM tres", "pipelineRun.dmTres", optional(float)),
+    ("SN", "pipelineRun.sn", optional(float)),
+    ("Flux (mJy)", "pipelineRun.flux", optional(float)),
+    ("RM (rad m^-2)", "pipelineRun.rm", optional(float)),
+    ("RM error (rad m^-2)", "pipelineRun.rmErr", optional(float)),
+    ("RFI zapped (%)", "pipelineRun.percentRfiZapped", optional(float)),
+]
 
 
 def get_parsers():
@@ -40,6 +60,18 @@ class PulsarFoldResult(GraphQLTable):
             "pipelineRun { rmErr }",
             "pipelineRun { percentRfiZapped }",
         ]
+        self.server_filters = {
+            "pulsar",
+            "mainProject",
+            "utcStart",
+            "beam",
+            "excludeBadges",
+            "utcStartGte",
+            "utcStartLte",
+        }
+        self.client_filters = {
+            "snGte": ("pipelineRun.sn", "gte"),
+        }
 
     def list(
             self,
@@ -49,6 +81,9 @@ class PulsarFoldResult(GraphQLTable):
             beam=None,
             utcs=None,
             utce=None,
+            exclude_badges=None,
+            min_sn=None,
+            fields=None,
         ):
         """Return a list of PulsarFoldResult information based on the `self.field_names` and filtered by the parameters.
 
@@ -62,6 +97,16 @@ class PulsarFoldResult(GraphQLTable):
             Filter by the utcStart, by default None
         beam : int, optional
             Filter by the beam number, by default None
+        utcs : str, optional
+            Filter by the utc start time greater than or equal to the timestamp in the format YYYY-MM-DD-HH:MM:SS, by default None
+        utce : str, optional
+            Filter by the utc start time less than or equal to the timestamp in the format YYYY-MM-DD-HH:MM:SS, by default None
+        exclude_badges : list of str, optional
+            Exclude observations with these badges, by default None
+        min_sn : float, optional
+            Only return results with a signal to noise ratio greater than or equal to this (filtered client side), by default None
+        fields : list of str, optional
+            Only query these fields (dotted paths such as "id" or "pulsar.name"), by default all of `self.field_names`
 
         Returns
         -------
@@ -70,19 +115,28 @@ class PulsarFoldResult(GraphQLTable):
         client_response:
             Else a client response object.
         """
+        filters = self.download_filters(pulsar, mainProject, utcStart, beam, exclude_badges, utcs, utce, min_sn)
+        return GraphQLTable.list_graphql(self, self.table_name, filters, [], self.get_field_names(fields))
+
+    def download_filters(self, pulsar, mainProject=None, utcStart=None, beam=None, exclude_badges=None, utcs=None, utce=None, min_sn=None):
+        """Return the query filters used by `list`, `download` and `columns`."""
         filters = [
             {"field": "pulsar", "value": pulsar},
             {"field": "mainProject", "value": mainProject},
             {"field": "utcStart", "value": utcStart},
             {"field": "beam", "value": beam},
         ]
+        if exclude_badges is not None:
+            filters.append({"field": "excludeBadges", "value": exclude_badges})
         if utcs is not None:
             d = datetime.strptime(utcs, '%Y-%m-%d-%H:%M:%S')
             filters.append({"field": "utcStartGte", "value": f"{d.date()}T{d.time()}+00:00"})
         if utce is not None:
             d = datetime.strptime(utce, '%Y-%m-%d-%H:%M:%S')
             filters.append({"field": "utcStartLte", "value": f"{d.date()}T{d.time()}+00:00"})
-        return GraphQLTable.list_graphql(self, self.table_name, filters, [], self.field_names)
+        if min_sn is not None:
+            filters.append({"field": "snGte", "value": float(min_sn)})
+        return filters
 
     def download(
             self,
@@ -93,24 +147,19 @@ class PulsarFoldResult(GraphQLTable):
             exclude_badges=None,
             utcs=None,
             utce=None,
+            fields=None,
+            format="csv",
         ):
+        """Download the PulsarFoldResults of a pulsar to a file.
+
+        Takes the same filters as `list`, plus the file `format` (csv, parquet or feather, by default csv).
+        Returns the name of the file.
+        """
         # Grab a dictionary of the pulsar_fold_results
-        filters = [
-            {"field": "pulsar", "value": pulsar},
-            {"field": "mainProject", "value": mainProject},
-            {"field": "utcStart", "value": utcStart},
-            {"field": "beam", "value": beam},
-        ]
-        if exclude_badges is not None:
-            filters.append({"field": "excludeBadges", "value": exclude_badges})
-        if utcs is not None:
-            d = datetime.strptime(utcs, '%Y-%m-%d-%H:%M:%S')
-            filters.append({"field": "utcStartGte", "value": f"{d.date()}T{d.time()}+00:00"})
-        if utce is not None:
-            d = datetime.strptime(utce, '%Y-%m-%d-%H:%M:%S')
-            filters.append({"field": "utcStartLte", "value": f"{d.date()}T{d.time()}+00:00"})
+        filters = self.download_filters(pulsar, mainProject, utcStart, beam, exclude_badges, utcs, utce)
         self.get_dicts = True
-        pulsar_fold_result_dicts = GraphQLTable.list_graphql(self, self.table_name, filters, [], self.field_names)
+        columns = self.get_download_columns(DOWNLOAD_COLUMNS, fields)
+        pulsar_fold_result_dicts = GraphQLTable.list_graphql(self, self.table_name, filters, [], self.get_field_names(fields))
 
         # Create the output name
         output_name = f"pulsar_fold_result_{pulsar}"
@@ -120,30 +169,67 @@ class PulsarFoldResult(GraphQLTable):
             output_name += f"_{utcStart}"
         if beam is not None and beam:
             output_name += f"_beam{beam}"
-        output_name += ".csv"
-
-        # Loop over the pulsar_fold_results and dump them as a file
-        with open(output_name, "w") as f:
-            f.write("ID,UTC Start,Observing band,Duration (s),DM (pc cm^-3),DM error (pc cm^-3),DM epoch (MJD),DM chi2r,DM tres,SN,Flux (mJy),RM (rad m^-2),RM error (rad m^-2),RFI zapped (%)\n")
-            for pulsar_fold_result_dict in pulsar_fold_result_dicts:
-                data_line = [
-                    str(pulsar_fold_result_dict["id"]),
-                    str(pulsar_fold_result_dict["observation"]["utcStart"]),
-                    str(pulsar_fold_result_dict["observation"]["band"]),
-                    str(pulsar_fold_result_dict["observation"]["duration"]),
-                    str(pulsar_fold_result_dict["pipelineRun"]["dm"]),
-                    str(pulsar_fold_result_dict["pipelineRun"]["dmErr"]),
-                    str(pulsar_fold_result_dict["pipelineRun"]["dmEpoch"]),
-                    str(pulsar_fold_result_dict["pipelineRun"]["dmChi2r"]),
-                    str(pulsar_fold_result_dict["pipelineRun"]["dmTres"]),
-                    str(pulsar_fold_result_dict["pipelineRun"]["sn"]),
-                    str(pulsar_fold_result_dict["pipelineRun"]["flux"]),
-                    str(pulsar_fold_result_dict["pipelineRun"]["rm"]),
-                    str(pulsar_fold_result_dict["pipelineRun"]["rmErr"]),
-                    str(pulsar_fold_result_dict["pipelineRun"]["percentRfiZapped"]),
-                ]
-                f.write(f"{','.join(data_line)}\n")
-        return output_name
+
+        return write_download(download_columns(pulsar_fold_result_dicts, columns), output_name, format)
+
+    def columns(
+            self,
+            pulsar,
+            mainProject=None,
+            utcStart=None,
+            beam=None,
+            exclude_badges=None,
+            utcs=None,
+            utce=None,
+        ):
+        """Return the PulsarFoldResults of a pulsar as NumPy columns.
+
+        Takes the same parameters as `download`.
+
+        Returns
+        -------
+        dict
+            A NumPy array for each column (see `psrdb.utils.fold_result_stats.fold_result_page_columns`).
+        """
+        from psrdb.utils.fold_result_stats import fold_result_page_columns
+
+        filters = self.download_filters(pulsar, mainProject, utcStart, beam, exclude_badges, utcs, utce)
+        pages = GraphQLTable.list_pages_graphql(self, self.table_name, filters, [], self.field_names)
+        return fold_result_page_columns(pages)
+
+    def summary(
+            self,
+            pulsar,
+            mainProject=None,
+            utcStart=None,
+            beam=None,
+            exclude_badges=None,
+            utcs=None,
+            utce=None,
+            bin_days=30,
+            window=5,
+        ):
+        """Summarise the DM, RM and SN of the PulsarFoldResults of a pulsar.
+
+        Takes the same filter parameters as `download`.
+
+        Parameters
+        ----------
+        bin_days : float, optional
+            The width of the time series bins in days, by default 30.
+        window : int, optional
+            The number of observations in the rolling median, by default 5.
+
+        Returns
+        -------
+        dict
+            The binned time series, per band statistics and rolling medians (see
+            `psrdb.utils.fold_result_stats.summarise_fold_results`).
+        """
+        from psrdb.utils.fold_result_stats import summarise_fold_results
+
+        columns = self.columns(pulsar, mainProject, utcStart, beam, exclude_badges, utcs, utce)
+        return summarise_fold_results(columns, bin_days=bin_days, window=window)
 
 
     def process(self, args):
@@ -155,6 +241,10 @@ class PulsarFoldResult(GraphQLTable):
                 args.mainProject,
                 args.utcStart,
                 args.beam,
+                args.utcs,
+                args.utce,
+                args.exclude_badges,
+                args.min_sn,
             )
         elif args.subcommand == "download":
             return self.download(
@@ -165,6 +255,7 @@ class PulsarFoldResult(GraphQLTable):
                 args.exclude_badges,
                 args.utcs,
                 args.utce,
+                format=args.format,
             )
         else:
             raise RuntimeError(f"{args.subcommand} command is not implemented")
@@ -197,6 +288,23 @@ class PulsarFoldResult(GraphQLTable):
         parser_list.add_argument("--mainProject", type=str, help="Name of the main project you want to filter pulsar_fold_results by [str]")
         parser_list.add_argument("--utcStart",  type=str, help="UTC start time you want the results of [str]")
         parser_list.add_argument("--beam", type=int, help="Beam number you want to filter pulsar_fold_results by [int]")
+        parser_list.add_argument(
+            '--exclude_badges',
+            nargs='*',
+            choices=EXCLUDE_BADGES_CHOICES,
+            help=f'List of observation badges/flags to exclude. The choices are: {EXCLUDE_BADGES_CHOICES}'
+        )
+        parser_list.add_argument(
+            "--utcs",
+            type=str,
+            help="Only use observations with utc_start greater than or equal to the timestamp [YYYY-MM-DD-HH:MM:SS]",
+        )
+        parser_list.add_argument(
+            "--utce",
+            type=str,
+            help="Only use observations with utc_start less than or equal to the timestamp [YYYY-MM-DD-HH:MM:SS]",
+        )
+        parser_list.add_argument("--min_sn", type=float, help="Only use results with a S/N greater than or equal to this [float]")
 
         # create the parser for the "download" command
         parser_download = subs.add_parser("download", help="Download TOAs for a pulsar to a .tim file")
@@ -220,4 +328,5 @@ class PulsarFoldResult(GraphQLTable):
             type=str,
             help="Only use observations with utc_start less than or equal to the timestamp [YYYY-MM-DD-HH:MM:SS]",
         )
+        parser_download.add_argument("--format", type=str, choices=DOWNLOAD_FORMATS, default="csv", help="The file format [str]")
 
@@ -49,6 +49,7 @@ class PulsarFoldSummary(GraphQLTable):
             most_common_project=None,
             project=None,
             main_project=None,
+            fields=None,
         ):
         """Return a list of PulsarFoldSummary information based on the `self.field_names` and filtered by the parameters.
 
@@ -62,6 +63,8 @@ class PulsarFoldSummary(GraphQLTable):
             Filter by the utcStart, by default None
         beam : int, optional
             Filter by the beam number, by default None
+        fields : list of str, optional
+            Only query these fields (dotted paths such as "id" or "pulsar.name"), by default all of `self.field_names`
 
         Returns
         -------
@@ -76,7 +79,7 @@ class PulsarFoldSummary(GraphQLTable):
             {"field": "project", "value": project},
             {"field": "mainProject", "value": main_project},
         ]
-        return GraphQLTable.list_graphql(self, self.table_name, filters, [], self.field_names)
+        return GraphQLTable.list_graphql(self, self.table_name, filters, [], self.get_field_names(fields))
 
 
     def process(self, args):
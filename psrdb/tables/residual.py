@@ -49,19 +49,23 @@ class Residual(GraphQLTable):
 
     def list(
         self,
-        pulsar,
-        project_short,
+        pulsar=None,
+        project_short=None,
+        id=None,
+        fields=None,
     ):
         """Return a list of Residual information based on the `self.field_names` and filtered by the parameters.
 
         Parameters
         ----------
-        id : int, optional
-            Filter by the database ID, by default None
         pulsar : str, optional
             Filter by the pulsar name, by default None
         project_short : str, optional
             Filter by the project short code, by default None
+        id : int, optional
+            Filter by the database ID, by default None
+        fields : list of str, optional
+            Only query these fields (dotted paths such as "id" or "pulsar.name"), by default all of `self.field_names`
 
         Returns
         -------
@@ -72,10 +76,10 @@ class Residual(GraphQLTable):
         """
         filters = [
             {"field": "id", "value": int(id) if id is not None else None},
-            {"field": "pulsar_Name", "value": pulsar},
+            {"field": "pulsar", "value": pulsar},
             {"field": "projectShort", "value": project_short},
         ]
-        return GraphQLTable.list_graphql(self, self.table_name, filters, [], self.field_names)
+        return GraphQLTable.list_graphql(self, self.table_name, filters, [], self.get_field_names(fields))
 
     def create(
         self,
@@ -137,7 +141,7 @@ class Residual(GraphQLTable):
                     residual_lines,
                 )
         elif args.subcommand == "list":
-            return self.list(args.id, args.processing, args.folding, args.ephemeris, args.template)
+            return self.list(pulsar=args.pulsar, project_short=args.project, id=args.id)
         else:
             raise RuntimeError(f"{args.subcommand} command is not implemented")
 
@@ -166,16 +170,8 @@ class Residual(GraphQLTable):
 
         parser_list = subs.add_parser("list", help="list existing ephemerides")
         parser_list.add_argument("--id", metavar="ID", type=int, help="list residual matching the id [int]")
-        parser_list.add_argument(
-            "--processing", metavar="PROC", type=int, help="list residual matching the processing id [int]"
-        )
-        parser_list.add_argument("--folding", metavar="FOLD", type=int, help="list residual that used the folding id [int]")
-        parser_list.add_argument(
-            "--ephemeris", metavar="EPH", type=int, help="list residual matching the timing ephemeris id [int]"
-        )
-        parser_list.add_argument(
-            "--template", metavar="TEMPL", type=int, help="list residual matching the template id [int]"
-        )
+        parser_list.add_argument("--pulsar", type=str, help="Name of the pulsar [str]")
+        parser_list.add_argument("--project", type=str, help="The project short (e.g. PTA) [str]")
 
         # create the parser for the "create" command
         parser_create = subs.add_parser("create", help="Create a new Residual")
@@ -21,7 +21,7 @@ class Telescope(GraphQLTable):
         self.table_name = "telescope"
         self.field_names = ["id", "name"]
 
-    def list(self, id=None, name=None):
+    def list(self, id=None, name=None, fields=None):
         """Return a list of Telescope information based on the `self.field_names` and filtered by the parameters.
 
         Parameters
@@ -30,6 +30,8 @@ class Telescope(GraphQLTable):
             Filter by the database ID, by default None
         name : str, optional
             Filter by the name, by default None
+        fields : list of str, optional
+            Only query these fields (dotted paths such as "id" or "pulsar.name"), by default all of `self.field_names`
 
         Returns
         -------
@@ -42,7 +44,7 @@ class Telescope(GraphQLTable):
             {"field": "id", "value": int(id) if id is not None else None},
             {"field": "name", "value": name},
         ]
-        return GraphQLTable.list_graphql(self, self.table_name, filters, [], self.field_names)
+        return GraphQLTable.list_graphql(self, self.table_name, filters, [], self.get_field_names(fields))
 
     def create(self, name):
         """Create a new Telescope database object.
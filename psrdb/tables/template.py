@@ -1,6 +1,7 @@
 import requests
 
 from psrdb.graphql_table import GraphQLTable
+from psrdb.utils.rest_upload import ChunkedUploader, UploadIndex, file_sha256, cached_upload_response
 
 
 def get_parsers():
@@ -34,7 +35,7 @@ class Template(GraphQLTable):
             "comment",
         ]
 
-    def list(self, id=None, pulsar_name=None, band=None, project_short=None):
+    def list(self, id=None, pulsar_name=None, band=None, project_short=None, fields=None):
         """Return a list of Template information based on the `self.field_names` and filtered by the parameters.
 
         Parameters
@@ -47,6 +48,8 @@ class Template(GraphQLTable):
             Filter by the band, by default None
         project_short : str, optional
             Filter by the project short name, by default None
+        fields : list of str, optional
+            Only query these fields (dotted paths such as "id" or "pulsar.name"), by default all of `self.field_names`
 
         Returns
         -------
@@ -61,7 +64,7 @@ class Template(GraphQLTable):
             {"field": "band", "value": band},
             {"field": "project_Short", "value": project_short},
         ]
-        return GraphQLTable.list_graphql(self, self.table_name, filters, [], self.field_names)
+        return GraphQLTable.list_graphql(self, self.table_name, filters, [], self.get_field_names(fields))
 
     def create(
             self,
@@ -70,6 +73,8 @@ class Template(GraphQLTable):
             template_path,
             project_code=None,
             project_short=None,
+            deduplicate=False,
+            chunk_size=None,
         ):
         """Create a new Template database object.
 
@@ -85,26 +90,46 @@ class Template(GraphQLTable):
             The code of the project, by default None
         project_short : str, optional
             The short name of the project (e.g. PTA), by default None
+        deduplicate : bool, optional
+            Skip the upload if an identical template file was already uploaded for the same
+            pulsar, band and project (checked against the local `UploadIndex`), by default False
+        chunk_size : int, optional
+            If set, upload the file in parts of this many bytes with the resumable
+            `ChunkedUploader` instead of a single post, by default None
 
         Returns
         -------
         client_response:
             A client response object.
         """
-        # Open the file in binary mode
-        with open(template_path, 'rb') as file:
-            variables = {
-                "pulsar_name": pulsar_name,
-                "project_code": project_code,
-                "project_short": project_short,
-                "band": band,
-            }
-            files = {
-                "template_upload": file,
-            }
-            # Post to the rest api
-            response = requests.post(f'{self.client.rest_api_url}template/', data=variables, files=files, headers=self.client.header)
-
+        variables = {
+            "pulsar_name": pulsar_name,
+            "project_code": project_code,
+            "project_short": project_short,
+            "band": band,
+        }
+        url = f'{self.client.rest_api_url}template/'
+        if deduplicate:
+            upload_index = UploadIndex()
+            digest = file_sha256(template_path)
+            upload_id = upload_index.lookup(url, variables, digest)
+            if upload_id is not None:
+                self.logger.info(f"Skipping upload of {template_path} as it was already uploaded as Template id: {upload_id}")
+                return cached_upload_response(upload_id)
+
+        if chunk_size is not None:
+            response = ChunkedUploader(self.client, chunk_size=chunk_size, logger=self.logger).upload(url, variables, template_path)
+        else:
+            # Open the file in binary mode
+            with open(template_path, 'rb') as file:
+                files = {
+                    "template_upload": file,
+                }
+                # Post to the rest api
+                response = requests.post(url, data=variables, files=files, headers=self.client.header)
+
+        if deduplicate:
+            upload_index.record(url, variables, digest, response)
         return response
 
     def process(self, args):
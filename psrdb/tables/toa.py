@@ -1,9 +1,14 @@
 from datetime import datetime
 
-from psrdb.graphql_table import GraphQLTable
-from psrdb.utils.toa import toa_dict_to_line
+from psrdb.graphql_table import GraphQLTable, select_fields
+from psrdb.utils.toa import toa_dict_to_line, toa_line_to_dict
 from psrdb.utils.other import chunk_list
 from psrdb.load_data import EXCLUDE_BADGES_CHOICES
+from psrdb.utils.export import DOWNLOAD_FORMATS, write_download
+
+
+# The fields that are always needed to write a line of a .tim file
+TOA_LINE_FIELDS = ["archive", "freqMhz", "mjd", "mjdErr", "telescope"]
 
 
 def get_parsers():
@@ -50,6 +55,24 @@ class Toa(GraphQLTable):
             "length",
             "subint",
         ]
+        self.server_filters = {
+            "id",
+            "pulsar",
+            "pipelineRunId",
+            "projectShort",
+            "dmCorrected",
+            "nsubType",
+            "obsNchan",
+            "obsNpol",
+            "minimumNsubs",
+            "maximumNsubs",
+            "excludeBadges",
+            "utcStartGte",
+            "utcStartLte",
+        }
+        self.client_filters = {
+            "snrGte": ("snr", "gte"),
+        }
 
     def list(
         self,
@@ -61,6 +84,13 @@ class Toa(GraphQLTable):
         minimum_nsubs=None,
         maximum_nsubs=None,
         obs_nchan=None,
+        nsub_type=None,
+        npol=None,
+        exclude_badges=None,
+        utcs=None,
+        utce=None,
+        min_snr=None,
+        fields=None,
     ):
         """Return a list of Toa information based on the `self.field_names` and filtered by the parameters.
 
@@ -82,6 +112,20 @@ class Toa(GraphQLTable):
             Filter by if the toa was generated with the maximum number of time subbands, by default None
         obs_nchan : int, optional
             Filter by the number of channels, by default None
+        nsub_type : str, optional
+            Filter by the method used to calculate the number of subintegrations (see `download`), by default None
+        npol : int, optional
+            Filter by the number of Stokes polarisations, by default None
+        exclude_badges : list of str, optional
+            Exclude observations with these badges, by default None
+        utcs : str, optional
+            Filter by the utc start time greater than or equal to the timestamp in the format YYYY-MM-DD-HH:MM:SS, by default None
+        utce : str, optional
+            Filter by the utc start time less than or equal to the timestamp in the format YYYY-MM-DD-HH:MM:SS, by default None
+        min_snr : float, optional
+            Only return ToAs with a signal to noise ratio greater than or equal to this (filtered client side), by default None
+        fields : list of str, optional
+            Only query these fields (dotted paths such as "id" or "pulsar.name"), by default all of `self.field_names`
 
         Returns
         -------
@@ -90,19 +134,67 @@ class Toa(GraphQLTable):
         client_response:
             Else a client response object.
         """
+        filters = self.list_filters(
+            id=id,
+            pulsar=pulsar,
+            pipeline_run_id=pipeline_run_id,
+            project_short=project_short,
+            dm_corrected=dm_corrected,
+            nsub_type=nsub_type,
+            obs_nchan=obs_nchan,
+            npol=npol,
+            minimum_nsubs=minimum_nsubs,
+            maximum_nsubs=maximum_nsubs,
+            exclude_badges=exclude_badges,
+            utcs=utcs,
+            utce=utce,
+            min_snr=min_snr,
+        )
+        return GraphQLTable.list_graphql(self, self.table_name, filters, [], self.get_field_names(fields))
+
+    def list_filters(
+        self,
+        id=None,
+        pulsar=None,
+        pipeline_run_id=None,
+        project_short=None,
+        dm_corrected=None,
+        nsub_type=None,
+        obs_nchan=None,
+        npol=None,
+        minimum_nsubs=None,
+        maximum_nsubs=None,
+        exclude_badges=None,
+        utcs=None,
+        utce=None,
+        min_snr=None,
+    ):
+        """Return the query filters used by `list` and `download`."""
         filters = [
             {"field": "id", "value": int(id) if id is not None else None},
             {"field": "pulsar", "value": pulsar},
             {"field": "pipelineRunId", "value": int(pipeline_run_id) if pipeline_run_id is not None else None},
             {"field": "projectShort", "value": project_short},
             {"field": "dmCorrected", "value": dm_corrected},
+            {"field": "nsubType", "value": nsub_type},
             {"field": "obsNchan", "value": obs_nchan},
+            {"field": "obsNpol", "value": npol},
         ]
         if minimum_nsubs:
             filters.append({"field": "minimumNsubs", "value": minimum_nsubs})
         if maximum_nsubs:
             filters.append({"field": "maximumNsubs", "value": maximum_nsubs})
-        return GraphQLTable.list_graphql(self, self.table_name, filters, [], self.field_names)
+        if exclude_badges is not None:
+            filters.append({"field": "excludeBadges", "value": exclude_badges})
+        if utcs is not None:
+            d = datetime.strptime(utcs, '%Y-%m-%d-%H:%M:%S')
+            filters.append({"field": "utcStartGte", "value": f"{d.date()}T{d.time()}+00:00"})
+        if utce is not None:
+            d = datetime.strptime(utce, '%Y-%m-%d-%H:%M:%S')
+            filters.append({"field": "utcStartLte", "value": f"{d.date()}T{d.time()}+00:00"})
+        if min_snr is not None:
+            filters.append({"field": "snrGte", "value": float(min_snr)})
+        return filters
 
     def create(
         self,
@@ -242,6 +334,9 @@ class Toa(GraphQLTable):
         exclude_badges=None,
         utcs=None,
         utce=None,
+        min_snr=None,
+        fields=None,
+        format="tim",
     ):
         """Download a file containing ToAs based on the filters.
 
@@ -267,6 +362,13 @@ class Toa(GraphQLTable):
             Filter by the number of channels, by default None
         npol : int
             The number of Stokes polarisations.
+        min_snr : float, optional
+            Only download ToAs with a signal to noise ratio greater than or equal to this (filtered client side), by default None
+        fields : list of str, optional
+            Only query these fields as flags of the ToA lines (the archive, frequency, MJD, MJD error
+            and telescope are always queried), by default all of `self.field_names`
+        format : str, optional
+            The file format, one of tim, binary (see `psrdb.utils.binary_toa`), csv, parquet or feather, by default tim
 
         Returns
         -------
@@ -275,28 +377,25 @@ class Toa(GraphQLTable):
         client_response:
             Else a client response object.
         """
-        filters = [
-            {"field": "id", "value": int(id) if id is not None else None},
-            {"field": "pulsar", "value": pulsar},
-            {"field": "pipelineRunId", "value": int(pipeline_run_id) if pipeline_run_id is not None else None},
-            {"field": "projectShort", "value": project_short},
-            {"field": "dmCorrected", "value": dm_corrected},
-            {"field": "nsubType", "value": nsub_type},
-            {"field": "obsNchan", "value": obs_nchan},
-            {"field": "obsNpol", "value": npol},
-        ]
-        if exclude_badges is not None:
-            filters.append({"field": "excludeBadges", "value": exclude_badges})
-        if utcs is not None:
-            d = datetime.strptime(utcs, '%Y-%m-%d-%H:%M:%S')
-            filters.append({"field": "utcStartGte", "value": f"{d.date()}T{d.time()}+00:00"})
-        if utce is not None:
-            d = datetime.strptime(utce, '%Y-%m-%d-%H:%M:%S')
-            filters.append({"field": "utcStartLte", "value": f"{d.date()}T{d.time()}+00:00"})
-
+        filters = self.list_filters(
+            id=id,
+            pulsar=pulsar,
+            pipeline_run_id=pipeline_run_id,
+            project_short=project_short,
+            dm_corrected=dm_corrected,
+            nsub_type=nsub_type,
+            obs_nchan=obs_nchan,
+            npol=npol,
+            exclude_badges=exclude_badges,
+            utcs=utcs,
+            utce=utce,
+            min_snr=min_snr,
+        )
 
         self.get_dicts = True
-        toa_dicts = GraphQLTable.list_graphql(self, self.table_name, filters, [], self.field_names, paginate_num=10000)
+        field_names = list(self.get_field_names(fields))
+        field_names += [field_name for field_name in select_fields(self.field_names, TOA_LINE_FIELDS) if field_name not in field_names]
+        toa_dicts = GraphQLTable.list_graphql(self, self.table_name, filters, [], field_names)
 
         # Create the output name
         output_name = f"toa_{pulsar}"
@@ -314,26 +413,79 @@ class Toa(GraphQLTable):
             output_name += f"_nchan{obs_nchan}"
         if npol is not None:
             output_name += f"_npol{npol}"
-        output_name += ".tim"
+
+        for toa_dict in toa_dicts:
+            # Convert to toa format
+            # del toa_dict["id"]
+            toa_dict.pop("pipelineRun", None)
+            toa_dict.pop("ephemeris", None)
+            toa_dict.pop("template", None)
+            toa_dict["freq_MHz"] = toa_dict["freqMhz"]
+            toa_dict["mjd_err"] = toa_dict["mjdErr"]
+            del toa_dict["freqMhz"]
+            del toa_dict["mjdErr"]
+
+        if format == "binary":
+            from psrdb.utils.binary_toa import write_binary_toas
+
+            # Go through the ToA lines so the binary file holds exactly the same values as the .tim file
+            output_name += ".toab"
+            write_binary_toas((toa_line_to_dict(toa_dict_to_line(toa_dict)) for toa_dict in toa_dicts), output_name)
+            return output_name
+        elif format != "tim":
+            # One column per field of the ToA lines, the MJDs are kept as strings to keep their precision
+            headers = list(dict.fromkeys(key for toa_dict in toa_dicts for key in toa_dict))
+            columns = {header: [toa_dict.get(header) for toa_dict in toa_dicts] for header in headers}
+            return write_download(columns, output_name, format)
 
         # Loop over the toas and dump them as a file
+        output_name += ".tim"
         with open(output_name, "w") as f:
             f.write("FORMAT 1\n")
             for toa_dict in toa_dicts:
-                # Convert to toa format
-                # del toa_dict["id"]
-                del toa_dict["pipelineRun"]
-                del toa_dict["ephemeris"]
-                del toa_dict["template"]
-                toa_dict["freq_MHz"] = toa_dict["freqMhz"]
-                toa_dict["mjd_err"] = toa_dict["mjdErr"]
-                del toa_dict["freqMhz"]
-                del toa_dict["mjdErr"]
                 toa_line = toa_dict_to_line(toa_dict)
                 f.write(f"{toa_line}\n")
         return output_name
 
 
+    def sync(
+        self,
+        pulsar,
+        project_short=None,
+        dm_corrected=None,
+        nsub_type=None,
+        obs_nchan=None,
+        npol=None,
+        exclude_badges=None,
+        utcs=None,
+        utce=None,
+        mirror=None,
+        full=False,
+        lookback_days=2,
+    ):
+        """Sync the ToAs matching the filters to a local mirror, only fetching those of the observations since the last synced observation.
+
+        Takes the same filters as `download`, see `psrdb.utils.mirror.Mirror.sync` for the other parameters.
+
+        Returns
+        -------
+        int
+            The number of ToAs fetched.
+        """
+        filters = self.list_filters(
+            pulsar=pulsar,
+            project_short=project_short,
+            dm_corrected=dm_corrected,
+            nsub_type=nsub_type,
+            obs_nchan=obs_nchan,
+            npol=npol,
+            exclude_badges=exclude_badges,
+            utcs=utcs,
+            utce=utce,
+        )
+        # The observation's utcStart is the high-water mark of the ToAs
+        return self.sync_graphql(filters, mirror=mirror, full=full, lookback_days=lookback_days, fields=["observation { utcStart }"])
+
     def process(self, args):
         """Parse the arguments collected by the CLI."""
         self.print_stdout = True
@@ -354,7 +506,35 @@ class Toa(GraphQLTable):
         elif args.subcommand == "delete":
             return self.delete(args.id)
         elif args.subcommand == "list":
-            return self.list(args.id, args.processing, args.folding, args.ephemeris, args.template)
+            return self.list(
+                id=args.id,
+                pulsar=args.pulsar,
+                pipeline_run_id=args.pipeline_run_id,
+                project_short=args.project,
+                dm_corrected=args.dm_corrected,
+                nsub_type=args.nsub_type,
+                obs_nchan=args.nchan,
+                npol=args.npol,
+                exclude_badges=args.exclude_badges,
+                utcs=args.utcs,
+                utce=args.utce,
+                min_snr=args.min_snr,
+            )
+        elif args.subcommand == "sync":
+            return self.sync(
+                args.pulsar,
+                args.project,
+                args.dm_corrected,
+                args.nsub_type,
+                args.nchan,
+                args.npol,
+                args.exclude_badges,
+                args.utcs,
+                args.utce,
+                mirror=args.mirror,
+                full=args.full,
+                lookback_days=args.lookback_days,
+            )
         elif args.subcommand == "download":
             return self.download(
                 args.pulsar,
@@ -368,6 +548,8 @@ class Toa(GraphQLTable):
                 args.exclude_badges,
                 args.utcs,
                 args.utce,
+                args.min_snr,
+                format=args.format,
             )
         else:
             raise RuntimeError(f"{args.subcommand} command is not implemented")
@@ -397,16 +579,35 @@ class Toa(GraphQLTable):
 
         parser_list = subs.add_parser("list", help="list existing ephemerides")
         parser_list.add_argument("--id", metavar="ID", type=int, help="list toa matching the id [int]")
+        parser_list.add_argument("--pulsar", type=str, help="Name of the pulsar [str]")
+        parser_list.add_argument("--project", type=str, help="The project short (e.g. PTA) [str]")
+        parser_list.add_argument("--pipeline_run_id", type=int, help="pipeline_run_id of the toa [int]")
+        parser_list.add_argument("--dm_corrected", action="store_true", default=None, help="Return TOAs that have had their DM corrected for each observation [bool]")
+        parser_list.add_argument(
+            '--nsub_type',
+            type=str,
+            choices=['1', 'max', 'mode', 'all'],
+            help='The method used to calculate the number of subintegrations (see the download command)',
+        )
+        parser_list.add_argument("--nchan", type=int, help="Only use TOAs with this many subchans (common values are 1,4 and 16) [int]")
+        parser_list.add_argument("--npol", type=int, help="Only use TOAs with this many stokes polarisations (4 for all and 1 for summed) [int]")
         parser_list.add_argument(
-            "--processing", metavar="PROC", type=int, help="list toa matching the processing id [int]"
+            '--exclude_badges',
+            nargs='*',
+            choices=EXCLUDE_BADGES_CHOICES,
+            help=f'List of observation badges/flags to exclude from the ToAs. The choices are: {EXCLUDE_BADGES_CHOICES}'
         )
-        parser_list.add_argument("--folding", metavar="FOLD", type=int, help="list toa that used the folding id [int]")
         parser_list.add_argument(
-            "--ephemeris", metavar="EPH", type=int, help="list toa matching the timing ephemeris id [int]"
+            "--utcs",
+            type=str,
+            help="Only use observations with utc_start greater than or equal to the timestamp [YYYY-MM-DD-HH:MM:SS]",
         )
         parser_list.add_argument(
-            "--template", metavar="TEMPL", type=int, help="list toa matching the template id [int]"
+            "--utce",
+            type=str,
+            help="Only use observations with utc_start less than or equal to the timestamp [YYYY-MM-DD-HH:MM:SS]",
         )
+        parser_list.add_argument("--min_snr", type=float, help="Only use TOAs with a S/N greater than or equal to this [float]")
 
         # create the parser for the "download" command
         parser_download = subs.add_parser("download", help="Download TOAs for a pulsar to a .tim file")
@@ -444,4 +645,37 @@ class Toa(GraphQLTable):
             type=str,
             help="Only use observations with utc_start less than or equal to the timestamp [YYYY-MM-DD-HH:MM:SS]",
         )
-
+        parser_download.add_argument("--min_snr", type=float, help="Only use TOAs with a S/N greater than or equal to this [float]")
+        parser_download.add_argument("--format", type=str, choices=("tim", "binary") + DOWNLOAD_FORMATS, default="tim", help="The file format [str]")
+
+        # create the parser for the "sync" command
+        parser_sync = subs.add_parser("sync", help="Sync the TOAs of a pulsar to a local mirror")
+        parser_sync.add_argument("pulsar", type=str, help="Name of the pulsar [str]")
+        parser_sync.add_argument("--project", type=str, help="The project short (e.g. PTA) [str]", required=True)
+        parser_sync.add_argument("--dm_corrected",  action="store_true", help="Return TOAs that have had their DM corrected for each observation [bool]")
+        parser_sync.add_argument(
+            '--nsub_type',
+            type=str,
+            choices=['1', 'max', 'mode', 'all'],
+            required=True,
+            help='The method used to calculate the number of subintegrations (see the download command)',
+        )
+        parser_sync.add_argument("--nchan", type=int, help="Only use TOAs with this many subchans (common values are 1,4 and 16) [int]", required=True)
+        parser_sync.add_argument("--npol", type=int, help="Only use TOAs with this many stokes polarisations (4 for all and 1 for summed) [int]", required=True)
+        parser_sync.add_argument(
+            '--exclude_badges',
+            nargs='*',
+            choices=EXCLUDE_BADGES_CHOICES,
+            help=f'List of observation badges/flags to exclude from the ToAs. The choices are: {EXCLUDE_BADGES_CHOICES}'
+        )
+        parser_sync.add_argument(
+            "--utcs",
+            type=str,
+            help="Only use observations with utc_start greater than or equal to the timestamp [YYYY-MM-DD-HH:MM:SS]",
+        )
+        parser_sync.add_argument(
+            "--utce",
+            type=str,
+            help="Only use observations with utc_start less than or equal to the timestamp [YYYY-MM-DD-HH:MM:SS]",
+        )
+        cls.add_sync_arguments(parser_sync)
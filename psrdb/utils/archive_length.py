@@ -0,0 +1,163 @@
+import os
+import logging
+import sqlite3
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from psrdb.load_data import CACHE_DIR
+from psrdb.utils.psrfits import PSRFITSError, read_psrfits_length
+
+
+LENGTH_CACHE = os.path.join(CACHE_DIR, "archive_length.sqlite3")
+# Number of files given to each vap call
+VAP_CHUNK_SIZE = 16
+
+
+class LengthCache:
+    """Local cache of archive lengths keyed on the file's path, size and modification time.
+
+    Parameters
+    ----------
+    path : str, optional
+        The location of the SQLite cache, by default `LENGTH_CACHE`.
+    """
+    def __init__(self, path=None):
+        self.path = path or LENGTH_CACHE
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS lengths ("
+                    "path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, length REAL NOT NULL)"
+                )
+        finally:
+            conn.close()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def lookup(self, stats):
+        """Return a dict of {path: length} for the (path, size, mtime_ns) entries of `stats` that are cached."""
+        conn = self._connect()
+        try:
+            lengths = {}
+            for path, size, mtime_ns in stats:
+                row = conn.execute(
+                    "SELECT length FROM lengths WHERE path = ? AND size = ? AND mtime_ns = ?",
+                    (path, size, mtime_ns),
+                ).fetchone()
+                if row is not None:
+                    lengths[path] = row[0]
+        finally:
+            conn.close()
+        return lengths
+
+    def add(self, entries):
+        """Record the (path, size, mtime_ns, length) entries, replacing any older entry for the path."""
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO lengths (path, size, mtime_ns, length) VALUES (?, ?, ?, ?)",
+                    entries,
+                )
+        finally:
+            conn.close()
+
+
+def vap_lengths(archive_files):
+    """
+    Return a dict of {path: length} for the input archive files from a single `vap -c length` call
+    """
+    output = subprocess.run(
+        ["vap", "-c", "length", *archive_files],
+        stdout=subprocess.PIPE,
+        text=True,
+    ).stdout
+    # vap may shorten the file names so also match on the base name
+    basenames = {os.path.basename(archive_file): archive_file for archive_file in archive_files}
+    lengths = {}
+    # Skip the column header line
+    for line in output.splitlines()[1:]:
+        parts = line.split()
+        if len(parts) < 2:
+            continue
+        archive_file = parts[0] if parts[0] in archive_files else basenames.get(os.path.basename(parts[0]))
+        if archive_file is not None:
+            lengths[archive_file] = float(parts[1])
+    return lengths
+
+
+def get_archive_lengths(archive_files, max_workers=None, chunk_size=VAP_CHUNK_SIZE, cache=True):
+    """
+    Determine the length of each input archive file
+
+    Lengths are looked up in a `LengthCache` keyed on each file's path, size and modification
+    time so re-runs over the same files are instant. The remaining PSRFITS files are measured
+    from their SUBINT tables and any others are split into chunks of `chunk_size` and measured
+    by parallel `vap -c length` calls.
+
+    Parameters
+    ----------
+    archive_files : list of str
+        The archive (e.g. search mode .sf) files.
+    max_workers : int, optional
+        The number of concurrent vap calls, by default the number of CPUs.
+    chunk_size : int, optional
+        The number of files given to each vap call, by default `VAP_CHUNK_SIZE`.
+    cache : bool, optional
+        Whether to use the length cache, by default True.
+
+    Returns
+    -------
+    dict
+        The length in seconds of each archive file that could be measured, keyed on its path.
+    """
+    stats = {}
+    for archive_file in archive_files:
+        path = os.path.abspath(archive_file)
+        stat = os.stat(path)
+        stats[path] = (path, stat.st_size, stat.st_mtime_ns)
+
+    length_cache = LengthCache() if cache else None
+    lengths = length_cache.lookup(stats.values()) if cache else {}
+    missing = [path for path in stats if path not in lengths]
+
+    psrfits_lengths = {}
+    for path in missing:
+        try:
+            psrfits_lengths[path] = read_psrfits_length(path)
+        except PSRFITSError:
+            pass
+    if psrfits_lengths:
+        lengths.update(psrfits_lengths)
+        if cache:
+            length_cache.add([(*stats[path], length) for path, length in psrfits_lengths.items()])
+        missing = [path for path in missing if path not in psrfits_lengths]
+    if not missing:
+        return lengths
+    logging.info(f"Measuring the length of {len(missing)} of {len(stats)} archive files with vap")
+
+    chunks = [missing[i:i + chunk_size] for i in range(0, len(missing), chunk_size)]
+    max_workers = min(max_workers or os.cpu_count() or 1, len(chunks))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(vap_lengths, chunk) for chunk in chunks]
+        for done, future in enumerate(as_completed(futures), start=1):
+            chunk_lengths = future.result()
+            lengths.update(chunk_lengths)
+            if cache:
+                length_cache.add([(*stats[path], length) for path, length in chunk_lengths.items() if path in stats])
+            logging.debug(f"Measured {done} of {len(chunks)} chunks of archive files")
+
+    for path in missing:
+        if path not in lengths:
+            logging.warning(f"Could not determine the length of {path}")
+    return lengths
+
+
+def get_sf_length(sf_files, max_workers=None, cache=True):
+    """
+    Determine the total length of input sf files
+    """
+    return sum(get_archive_lengths(sf_files, max_workers=max_workers, cache=cache).values())
@@ -0,0 +1,301 @@
+import json
+import struct
+from decimal import Decimal
+
+import numpy as np
+
+from psrdb.utils.toa import toa_line_to_dict, toa_dict_to_line
+
+
+# Binary ToA files start with the magic bytes and the length of the JSON header
+MAGIC = b"PSRDBTOA"
+VERSION = 2
+# Version 1 files have no numeric flag columns
+READABLE_VERSIONS = (1, 2)
+# Columns start on multiples of this many bytes
+ALIGNMENT = 64
+# MJD fractions are stored as integers of this many decimal places, which keeps the .tim precision exactly
+MJD_FRAC_DIGITS = 18
+# The fixed width columns and their little endian dtypes
+COLUMNS = {
+    "mjd_day": "<i4",
+    "mjd_frac": "<i8",
+    "mjd_digits": "u1",
+    "freq_MHz": "<f8",
+    "mjd_err": "<f8",
+    "snr": "<f8",
+    "archive": "<i4",
+    "telescope": "<i4",
+}
+# The fields of a ToA line that aren't flags
+LINE_FIELDS = ("archive", "freq_MHz", "mjd", "mjd_err", "telescope")
+
+
+def _align(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def _split_mjd(mjd):
+    """Split an MJD into its integer day, fraction in units of 1e-18 days and number of decimal places."""
+    day, _, frac = str(mjd).strip().partition(".")
+    if len(frac) > MJD_FRAC_DIGITS:
+        raise RuntimeError(f"MJD {mjd} has more than {MJD_FRAC_DIGITS} decimal places")
+    return int(day), int(frac.ljust(MJD_FRAC_DIGITS, "0")), len(frac)
+
+
+def _format_number(value):
+    """Format a numeric flag value, e.g. 240.0 as "240" and 722.3 as "722.3"."""
+    text = repr(value)
+    return text[:-2] if text.endswith(".0") else text
+
+
+def _numeric_flag(values):
+    """Return the float column and the codes and dictionary of the values that aren't formatted the
+    same by `_format_number` of a flag's values, or None if the flag isn't numeric."""
+    numbers = np.full(len(values), np.nan)
+    exceptions = {}
+    codes = np.full(len(values), -1, dtype="<i4")
+    for i, value in enumerate(values):
+        if value is None:
+            continue
+        try:
+            number = float(value)
+        except ValueError:
+            return None
+        numbers[i] = number
+        # Keep the text of values that wouldn't be written the same, NaN values are missing values
+        if np.isnan(number) or _format_number(number) != value:
+            codes[i] = exceptions.setdefault(value, len(exceptions))
+    present = sum(value is not None for value in values)
+    if 2 * len(exceptions) > present:
+        # Mostly formatted differently, e.g. with trailing zeros, so a dictionary is smaller
+        return None
+    return numbers, codes, list(exceptions)
+
+
+def write_binary_toas(toa_dicts, path):
+    """Write ToAs to a binary ToA file.
+
+    Flags whose values are all numbers are stored as float columns (with NaN where a ToA doesn't
+    have the flag), other flags are dictionary encoded in the header.
+
+    Parameters
+    ----------
+    toa_dicts : iterable of dict
+        The ToAs as dictionaries from `psrdb.utils.toa.toa_line_to_dict` (or `Toa.download`) with the
+        archive, freq_MHz, mjd, mjd_err and telescope and the flags of each ToA.
+    path : str
+        The file to write.
+
+    Returns
+    -------
+    int
+        The number of ToAs written.
+    """
+    columns = {name: [] for name in COLUMNS}
+    dictionaries = {"archive": {}, "telescope": {}}
+    flags = {}
+    ntoa = 0
+    for toa_dict in toa_dicts:
+        day, frac, digits = _split_mjd(toa_dict["mjd"])
+        columns["mjd_day"].append(day)
+        columns["mjd_frac"].append(frac)
+        columns["mjd_digits"].append(digits)
+        columns["freq_MHz"].append(float(toa_dict["freq_MHz"]))
+        columns["mjd_err"].append(float(toa_dict["mjd_err"]))
+        snr = toa_dict.get("snr")
+        columns["snr"].append(float(snr) if snr is not None else np.nan)
+        for name in ("archive", "telescope"):
+            columns[name].append(dictionaries[name].setdefault(toa_dict[name], len(dictionaries[name])))
+        for key, value in toa_dict.items():
+            if key in LINE_FIELDS or value is None:
+                continue
+            values = flags.setdefault(key, [])
+            # ToAs before the first with this flag don't have it
+            values.extend([None] * (ntoa - len(values)))
+            values.append(str(value))
+        ntoa += 1
+
+    arrays = {name: np.asarray(values, dtype=COLUMNS[name]) for name, values in columns.items()}
+    dictionary_flags = {}
+    numeric_flags = {}
+    for key, values in flags.items():
+        values.extend([None] * (ntoa - len(values)))
+        numeric = _numeric_flag(values)
+        if numeric is not None:
+            numbers, codes, exceptions = numeric
+            arrays[f"num:{key}"] = numbers.astype("<f8")
+            if exceptions:
+                arrays[f"flag:{key}"] = codes
+            numeric_flags[key] = exceptions
+        else:
+            dictionary = {}
+            arrays[f"flag:{key}"] = np.asarray(
+                [-1 if value is None else dictionary.setdefault(value, len(dictionary)) for value in values],
+                dtype="<i4",
+            )
+            dictionary_flags[key] = list(dictionary)
+
+    header = {
+        "version": VERSION,
+        "ntoa": ntoa,
+        "columns": {},
+        "archive": list(dictionaries["archive"]),
+        "telescope": list(dictionaries["telescope"]),
+        "flags": dictionary_flags,
+        "numeric_flags": numeric_flags,
+        # The order the flags are written in .tim lines
+        "flag_order": list(flags),
+    }
+    # The header holds the column offsets, which depend on the header length, so lay it out until it fits
+    header_size = ALIGNMENT
+    while True:
+        offset = header_size
+        for name, array in arrays.items():
+            header["columns"][name] = {"dtype": array.dtype.str, "offset": offset}
+            offset = _align(offset + array.nbytes)
+        header_bytes = json.dumps(header).encode("utf-8")
+        needed = _align(len(MAGIC) + 8 + len(header_bytes))
+        if needed <= header_size:
+            break
+        header_size = needed
+
+    with open(path, "wb") as f:
+        f.write(MAGIC + struct.pack("<Q", len(header_bytes)) + header_bytes)
+        for name, array in arrays.items():
+            f.write(b"\0" * (header["columns"][name]["offset"] - f.tell()))
+            f.write(array.tobytes())
+    return ntoa
+
+
+class BinaryTOAs:
+    """Read only, memory mapped binary ToA file written by `write_binary_toas`.
+
+    The columns are NumPy views of the file so selecting ToAs by MJD, frequency or S/N reads
+    only those columns and doesn't parse any text. Numeric flags are float columns (`flag`
+    returns them as floats) and the other flags are dictionary encoded.
+
+    Parameters
+    ----------
+    path : str
+        The binary ToA file.
+    """
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            start = f.read(len(MAGIC) + 8)
+            if len(start) < len(MAGIC) + 8 or start[:len(MAGIC)] != MAGIC:
+                raise RuntimeError(f"{path} is not a binary ToA file")
+            header_length, = struct.unpack("<Q", start[len(MAGIC):])
+            self.header = json.loads(f.read(header_length))
+        if self.header["version"] not in READABLE_VERSIONS:
+            raise RuntimeError(f"{path} is binary ToA file version {self.header['version']}, expected {VERSION}")
+        self.header.setdefault("numeric_flags", {})
+        self.header.setdefault("flag_order", list(self.header["flags"]))
+        self.ntoa = self.header["ntoa"]
+        self._data = np.memmap(path, dtype=np.uint8, mode="r")
+        self.columns = {}
+        for name, column in self.header["columns"].items():
+            dtype = np.dtype(column["dtype"])
+            start = column["offset"]
+            self.columns[name] = self._data[start:start + dtype.itemsize * self.ntoa].view(dtype)
+
+    def __len__(self):
+        return self.ntoa
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    @property
+    def mjd(self):
+        """The MJDs as floats (to about a microsecond), use `mjd_day` and `mjd_frac` for full precision."""
+        return self.columns["mjd_day"] + self.columns["mjd_frac"] * 10.0 ** -MJD_FRAC_DIGITS
+
+    @property
+    def flag_names(self):
+        return list(self.header["flag_order"])
+
+    def flag(self, key, indices=None):
+        """Return the values of a flag, as floats (NaN where a ToA doesn't have it) for numeric flags
+        or else as strings (None where a ToA doesn't have it)."""
+        if key in self.header["numeric_flags"]:
+            numbers = self.columns[f"num:{key}"]
+            return numbers if indices is None else numbers[indices]
+        codes = self.columns[f"flag:{key}"]
+        if indices is not None:
+            codes = codes[indices]
+        values = np.array(self.header["flags"][key] + [None], dtype=object)
+        return values[codes]
+
+    def select(self, mjd_start=None, mjd_end=None, freq_min=None, freq_max=None, min_snr=None):
+        """Return the indices of the ToAs within the MJD, frequency (MHz) and S/N bounds (inclusive)."""
+        mask = np.ones(self.ntoa, dtype=bool)
+        if mjd_start is not None or mjd_end is not None:
+            mjd = self.mjd
+            if mjd_start is not None:
+                mask &= mjd >= mjd_start
+            if mjd_end is not None:
+                mask &= mjd <= mjd_end
+        freq = self.columns["freq_MHz"]
+        if freq_min is not None:
+            mask &= freq >= freq_min
+        if freq_max is not None:
+            mask &= freq <= freq_max
+        if min_snr is not None:
+            mask &= self.columns["snr"] >= min_snr
+        return np.flatnonzero(mask)
+
+    def toa_dicts(self, indices=None):
+        """Yield the ToAs (all or those at `indices`) as dictionaries for `psrdb.utils.toa.toa_dict_to_line`."""
+        if indices is None:
+            indices = range(self.ntoa)
+        archives = self.header["archive"]
+        telescopes = self.header["telescope"]
+        # The (key, float column or None, codes, dictionary) of each flag
+        flags = []
+        for key in self.header["flag_order"]:
+            if key in self.header["numeric_flags"]:
+                flags.append((key, self.columns[f"num:{key}"], self.columns.get(f"flag:{key}"), self.header["numeric_flags"][key]))
+            else:
+                flags.append((key, None, self.columns[f"flag:{key}"], self.header["flags"][key]))
+        for i in indices:
+            digits = int(self.columns["mjd_digits"][i])
+            mjd = str(int(self.columns["mjd_day"][i]))
+            if digits:
+                mjd += "." + str(int(self.columns["mjd_frac"][i])).rjust(MJD_FRAC_DIGITS, "0")[:digits]
+            toa_dict = {
+                "archive": archives[self.columns["archive"][i]],
+                "freq_MHz": float(self.columns["freq_MHz"][i]),
+                "mjd": Decimal(mjd),
+                "mjd_err": float(self.columns["mjd_err"][i]),
+                "telescope": telescopes[self.columns["telescope"][i]],
+            }
+            for key, numbers, codes, values in flags:
+                if codes is not None and codes[i] >= 0:
+                    toa_dict[key] = values[codes[i]]
+                elif numbers is not None and not np.isnan(numbers[i]):
+                    toa_dict[key] = _format_number(float(numbers[i]))
+            yield toa_dict
+
+
+def tim_to_binary(tim_path, path):
+    """Convert a .tim file (e.g. from `Toa.download`) to a binary ToA file, returning the number of ToAs."""
+    def toa_dicts():
+        with open(tim_path) as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith(("FORMAT", "MODE", "C ", "#")):
+                    continue
+                yield toa_line_to_dict(line)
+    return write_binary_toas(toa_dicts(), path)
+
+
+def binary_to_tim(path, tim_path, indices=None):
+    """Convert a binary ToA file (or the ToAs at `indices`) to a .tim file, returning the number of ToAs."""
+    ntoa = 0
+    with open(tim_path, "w") as f:
+        f.write("FORMAT 1\n")
+        for toa_dict in BinaryTOAs(path).toa_dicts(indices):
+            f.write(f"{toa_dict_to_line(toa_dict)}\n")
+            ntoa += 1
+    return ntoa
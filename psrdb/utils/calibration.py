@@ -0,0 +1,107 @@
+import os
+import glob
+import json
+import hashlib
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timezone
+
+from psrdb.load_data import CACHE_DIR
+from psrdb.utils.other import read_cache_file, write_cache_file
+
+
+CALIBRATION_CACHE_DIR = os.path.join(CACHE_DIR, "calibration")
+
+
+def _epoch(dt):
+    """Return the seconds since the Unix epoch of a (naive UTC) datetime."""
+    return dt.replace(tzinfo=timezone.utc).timestamp()
+
+
+class CalibrationIndex:
+    """Calibration solutions sorted by epoch for O(log n) lookup of the solution for an observation.
+
+    Parameters
+    ----------
+    epochs : list of float
+        The epoch of each calibration solution in seconds since the Unix epoch.
+    locations : list of str
+        The file location or name of each calibration solution in the same order as `epochs`.
+    """
+    def __init__(self, epochs, locations):
+        order = sorted(range(len(epochs)), key=lambda i: epochs[i])
+        self.epochs = [epochs[i] for i in order]
+        self.locations = [locations[i] for i in order]
+
+    def __len__(self):
+        return len(self.epochs)
+
+    def before(self, dt):
+        """Return the latest calibration solution strictly before `dt` or None."""
+        i = bisect_left(self.epochs, _epoch(dt))
+        return self.locations[i - 1] if i > 0 else None
+
+    def at_or_before(self, dt):
+        """Return the latest calibration solution at or before `dt` or None."""
+        i = bisect_right(self.epochs, _epoch(dt))
+        return self.locations[i - 1] if i > 0 else None
+
+    def to_json(self):
+        return json.dumps({"epochs": self.epochs, "locations": self.locations})
+
+    @classmethod
+    def from_json(cls, text):
+        data = json.loads(text)
+        return cls(data["epochs"], data["locations"])
+
+    @classmethod
+    def _cached(cls, path, build, disk_cache):
+        # Adding or removing files changes a directory's modification time so it invalidates the cache
+        try:
+            stat = os.stat(path)
+        except OSError:
+            # Nothing to cache against so leave build to handle the missing path
+            return build()
+        key = hashlib.sha256(f"{os.path.abspath(path)}|{stat.st_mtime_ns}|{stat.st_size}".encode("utf-8")).hexdigest()
+        if disk_cache:
+            cached = read_cache_file(CALIBRATION_CACHE_DIR, f"{key}.json")
+            if cached is not None:
+                return cls.from_json(cached)
+        index = build()
+        if disk_cache:
+            write_cache_file(CALIBRATION_CACHE_DIR, f"{key}.json", index.to_json())
+        return index
+
+    @classmethod
+    def from_directory(cls, directory, pattern="*.jones", date_format="%Y-%m-%d-%H:%M:%S", disk_cache=True):
+        """Index the calibration files in a directory whose names (without extension) are their epochs.
+
+        The index is cached on disk, keyed on the directory's modification time, if `disk_cache` is True.
+        """
+        def build():
+            epochs = []
+            locations = []
+            for cal in glob.glob(os.path.join(directory, pattern)):
+                cal_epoch = os.path.splitext(os.path.basename(cal))[0]
+                epochs.append(_epoch(datetime.strptime(cal_epoch, date_format)))
+                locations.append(cal)
+            return cls(epochs, locations)
+        return cls._cached(directory, build, disk_cache)
+
+    @classmethod
+    def from_phasing_file(cls, phasing_file, date_format="%Y-%m-%d", disk_cache=True):
+        """Index a text file with a date and calibration name on each line (e.g. the Molonglo phasing file).
+
+        The index is cached on disk, keyed on the file's modification time, if `disk_cache` is True.
+        """
+        def build():
+            epochs = []
+            locations = []
+            with open(phasing_file) as f:
+                for line in f:
+                    if line[0] == '#' or not line.strip():
+                        continue
+                    date, calibration = line.split(' ')[:2]
+                    epochs.append(_epoch(datetime.strptime(date, date_format)))
+                    locations.append(calibration.strip())
+            return cls(epochs, locations)
+        return cls._cached(phasing_file, build, disk_cache)
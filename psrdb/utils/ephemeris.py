@@ -1,16 +1,111 @@
+import os
 import re
 import json
+import hashlib
 import subprocess
+from functools import lru_cache
+
+from psrdb.load_data import CACHE_DIR
+from psrdb.utils.other import read_cache_file, write_cache_file
+
+
+# On-disk caches used when disk_cache=True
+EPHEMERIS_CACHE_DIR = os.path.join(CACHE_DIR, "ephemeris")
+ARCHIVE_EPHEMERIS_CACHE_DIR = os.path.join(CACHE_DIR, "archive_ephemeris")
+
+COMMENT_RE = re.compile("#.*")
+WHITESPACE_RE = re.compile(r"\s+")
+
+
+def ephemeris_hash(ephem):
+    """Return the md5 hash of an ephemeris dict as stored in the database's ephemerisHash."""
+    return hashlib.md5(json.dumps(ephem, sort_keys=True, indent=2).encode("utf-8")).hexdigest()
+
+
+def _parse_ephemeris_lines(ephemeris_string):
+    ephem = {}
+    for line in ephemeris_string.split("\n"):
+        line = line.strip()
+        line = COMMENT_RE.sub("", line)
+        if line:
+            line = WHITESPACE_RE.sub(" ", line)
+            parts = line.split(" ", 2)
+            if len(parts) < 2:
+                continue
+            if len(parts) == 2:
+                ephem[parts[0]] = {"val": parts[1]}
+            else:
+                ephem[parts[0]] = {"val": parts[1], "err": parts[2]}
+    return ephem
+
+
+@lru_cache(maxsize=256)
+def _parse_ephemeris_text(ephemeris_string, disk_cache):
+    if disk_cache:
+        text_hash = hashlib.sha256(ephemeris_string.encode("utf-8")).hexdigest()
+        cached = read_cache_file(EPHEMERIS_CACHE_DIR, f"{text_hash}.json")
+        if cached is not None:
+            return json.loads(cached)
+    ephem = _parse_ephemeris_lines(ephemeris_string)
+    if disk_cache:
+        write_cache_file(EPHEMERIS_CACHE_DIR, f"{text_hash}.json", json.dumps(ephem))
+    return ephem
+
+
+def parse_ephemeris_text(ephemeris_string, disk_cache=False):
+    """Parse the text of a par file into a dict of {key: {"val": val, "err": err}}.
+
+    Results are memoised on the text in an in-memory LRU cache and, if `disk_cache` is True,
+    on the SHA-256 of the text in `EPHEMERIS_CACHE_DIR` so identical par files are only parsed once.
+    A new dict is returned on each call so it is safe to modify.
+    """
+    ephem = _parse_ephemeris_text(ephemeris_string, disk_cache)
+    return {key: dict(value) for key, value in ephem.items()}
+
+
+def _run_vap_ephemeris(archive_file):
+    output = subprocess.run(["vap", "-E", archive_file], stdout=subprocess.PIPE).stdout
+    return str(output, "utf-8")
+
+
+@lru_cache(maxsize=256)
+def _archive_ephemeris_text(archive_file, mtime_ns, size, disk_cache):
+    cache_key = hashlib.sha256(f"{archive_file}|{mtime_ns}|{size}".encode("utf-8")).hexdigest()
+    if disk_cache:
+        cached = read_cache_file(ARCHIVE_EPHEMERIS_CACHE_DIR, f"{cache_key}.par")
+        if cached is not None:
+            return cached
+    output = _run_vap_ephemeris(archive_file)
+    if disk_cache and output.strip():
+        write_cache_file(ARCHIVE_EPHEMERIS_CACHE_DIR, f"{cache_key}.par", output)
+    return output
+
+
+def archive_ephemeris_text(archive_file, disk_cache=False):
+    """Return the output of `vap -E` for an archive file.
+
+    The output is cached on the archive's path, modification time and size in memory and,
+    if `disk_cache` is True, in `ARCHIVE_EPHEMERIS_CACHE_DIR` so vap is only run again when
+    the archive changes.
+    """
+    archive_file = os.path.abspath(archive_file)
+    try:
+        stat = os.stat(archive_file)
+    except OSError:
+        # Nothing to cache against so leave vap to report the missing file
+        return _run_vap_ephemeris(archive_file)
+    return _archive_ephemeris_text(archive_file, stat.st_mtime_ns, stat.st_size, disk_cache)
 
 
 class Ephemeris:
-    def __init__(self):
+    def __init__(self, disk_cache=False):
         self.ephem = {}
         self.jname = None
         self.p0 = 0
         self.dm = 0
         self.rm = 0
         self.configured = False
+        self.disk_cache = disk_cache
 
     def load_from_file(self, ephemeris_file):
         with open(ephemeris_file, "r") as file:
@@ -18,10 +113,7 @@ class Ephemeris:
         self.load_from_string(data)
 
     def load_from_archive_as_str(self, archive_file):
-        proc = subprocess.Popen(["vap", "-E", archive_file], stdout=subprocess.PIPE)
-        output = proc.stdout.read()
-        if type(output) == bytes:
-            output = str(output, "utf-8")
+        output = archive_ephemeris_text(archive_file, disk_cache=self.disk_cache)
         # first populate from string and parse to set all the attributes but then set to string as uploading via graphql expects a string
         self.load_from_string(output)
         # self.ephem = json.dumps(self.ephem)
@@ -31,19 +123,7 @@ class Ephemeris:
         self.parse()
 
     def load_from_string(self, ephemeris_string):
-        lines = ephemeris_string.split("\n")
-        for line in lines:
-            line = line.strip()
-            line = re.sub("#.*", "", line)
-            if line:
-                line = re.sub("\s+", " ", line)
-                parts = line.split(" ", 2)
-                if len(parts) < 2:
-                    continue
-                if len(parts) == 2:
-                    self.set_val(parts[0], parts[1])
-                else:
-                    self.set_val_err(parts[0], parts[1], parts[2])
+        self.ephem.update(parse_ephemeris_text(ephemeris_string, disk_cache=self.disk_cache))
         self.parse()
 
     def parse(self):
@@ -73,3 +153,6 @@ class Ephemeris:
 
     def get_val(self, key):
         return self.get(key)[0]
+
+    def get_hash(self):
+        return ephemeris_hash(self.ephem)
@@ -0,0 +1,81 @@
+from psrdb.graphql_table import get_field_value
+
+
+# The file formats of the download commands (ToAs can also be downloaded as .tim files)
+DOWNLOAD_FORMATS = ("csv", "parquet", "feather")
+# The compression of the columnar formats
+COMPRESSION = "zstd"
+
+
+def optional(convert):
+    """Return a column format function that converts values but leaves missing (None) values as None."""
+    def format(value):
+        return None if value is None else convert(value)
+    return format
+
+
+def download_columns(nodes, columns):
+    """Return the formatted values of each download column.
+
+    Parameters
+    ----------
+    nodes : list of dict
+        The result nodes of the download query.
+    columns : list of tuple
+        The (header, field path, format function) of each column.
+
+    Returns
+    -------
+    dict
+        The list of values of each column keyed on the header.
+    """
+    return {
+        header: [format(get_field_value(node, field)) for node in nodes]
+        for header, field, format in columns
+    }
+
+
+def write_download(columns, output_name, format="csv"):
+    """Write download columns to a file.
+
+    CSV files are plain text. Parquet and Feather files are written with pyarrow, with
+    compressed typed columns (with nulls for missing values) that can be memory mapped.
+
+    Parameters
+    ----------
+    columns : dict
+        The list of values of each column keyed on the header, see `download_columns`.
+    output_name : str
+        The name of the file without an extension.
+    format : str, optional
+        One of `DOWNLOAD_FORMATS`, by default "csv".
+
+    Returns
+    -------
+    str
+        The name of the file.
+    """
+    if format not in DOWNLOAD_FORMATS:
+        raise RuntimeError(f"Unknown download format {format}, expected one of {', '.join(DOWNLOAD_FORMATS)}")
+    output_name = f"{output_name}.{format}"
+    if format == "csv":
+        with open(output_name, "w") as f:
+            f.write(f"{','.join(columns)}\n")
+            for row in zip(*columns.values()):
+                f.write(f"{','.join(str(value) for value in row)}\n")
+        return output_name
+
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise RuntimeError(f"pyarrow is required to write {format} files, install it with 'pip install psrdb[columnar]'")
+    table = pa.table({header: pa.array(values) for header, values in columns.items()})
+    if format == "parquet":
+        import pyarrow.parquet as pq
+
+        pq.write_table(table, output_name, compression=COMPRESSION)
+    else:
+        import pyarrow.feather as feather
+
+        feather.write_feather(table, output_name, compression=COMPRESSION)
+    return output_name
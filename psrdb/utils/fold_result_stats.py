@@ -0,0 +1,272 @@
+import numpy as np
+
+
+MJD_EPOCH = np.datetime64("1858-11-17T00:00:00", "s")
+
+# The columns extracted from each PulsarFoldResult node and their location in the node
+FOLD_RESULT_COLUMNS = {
+    "id": ("id",),
+    "utcStart": ("observation", "utcStart"),
+    "band": ("observation", "band"),
+    "duration": ("observation", "duration"),
+    "dm": ("pipelineRun", "dm"),
+    "dmErr": ("pipelineRun", "dmErr"),
+    "dmEpoch": ("pipelineRun", "dmEpoch"),
+    "dmChi2r": ("pipelineRun", "dmChi2r"),
+    "dmTres": ("pipelineRun", "dmTres"),
+    "sn": ("pipelineRun", "sn"),
+    "flux": ("pipelineRun", "flux"),
+    "rm": ("pipelineRun", "rm"),
+    "rmErr": ("pipelineRun", "rmErr"),
+    "percentRfiZapped": ("pipelineRun", "percentRfiZapped"),
+}
+# Columns that are kept as strings, the rest are converted to floats with NaN for missing values
+STRING_COLUMNS = ("id", "band")
+
+
+def utc_to_mjd(utcs):
+    """Convert an array of ISO format UTC strings (e.g. 2020-10-22T16:24:55+00:00) to MJDs."""
+    utcs = np.asarray(utcs, dtype="U19")
+    return (utcs.astype("datetime64[s]") - MJD_EPOCH) / np.timedelta64(1, "D")
+
+
+def _node_value(node, path):
+    for key in path:
+        if node is None:
+            return None
+        node = node.get(key)
+    return node
+
+
+def _page_columns(nodes):
+    """Convert a page of PulsarFoldResult nodes to unsorted NumPy columns."""
+    values = {column: [] for column in FOLD_RESULT_COLUMNS}
+    for node in nodes:
+        for column, path in FOLD_RESULT_COLUMNS.items():
+            values[column].append(_node_value(node, path))
+
+    columns = {}
+    for column, column_values in values.items():
+        if column in STRING_COLUMNS:
+            columns[column] = np.array(["" if value is None else str(value) for value in column_values], dtype=str)
+        elif column == "utcStart":
+            columns[column] = np.array(column_values, dtype=str)
+        else:
+            columns[column] = np.array(column_values, dtype=float)
+    return columns
+
+
+def fold_result_page_columns(pages):
+    """Convert pages of PulsarFoldResult nodes (e.g. from `GraphQLTable.list_pages_graphql`) to NumPy columns.
+
+    Each page is converted to arrays as it arrives so the nodes of only one page are held at a time.
+
+    Parameters
+    ----------
+    pages : iterable of list of dict
+        The PulsarFoldResult nodes of each page.
+
+    Returns
+    -------
+    dict
+        A NumPy array for each of `FOLD_RESULT_COLUMNS` with missing numeric values set to NaN
+        and an "mjd" column converted from utcStart. The arrays are sorted by MJD.
+    """
+    page_columns = [_page_columns(nodes) for nodes in pages] or [_page_columns([])]
+    columns = {column: np.concatenate([page[column] for page in page_columns]) for column in FOLD_RESULT_COLUMNS}
+    columns["mjd"] = utc_to_mjd(columns["utcStart"]) if len(columns["utcStart"]) else np.array([], dtype=float)
+
+    order = np.argsort(columns["mjd"], kind="stable")
+    return {column: array[order] for column, array in columns.items()}
+
+
+def fold_result_columns(nodes):
+    """Convert PulsarFoldResult nodes to NumPy columns, see `fold_result_page_columns`.
+
+    Parameters
+    ----------
+    nodes : iterable of dict
+        The PulsarFoldResult nodes.
+
+    Returns
+    -------
+    dict
+        A NumPy array for each of `FOLD_RESULT_COLUMNS` and "mjd", sorted by MJD.
+    """
+    return fold_result_page_columns([nodes])
+
+
+def _group_medians(inverse, values, ngroups):
+    """Return the median of the finite values of each group."""
+    medians = np.full(ngroups, np.nan)
+    finite = np.isfinite(values)
+    if not finite.any():
+        return medians
+    inverse = inverse[finite]
+    values = values[finite]
+    order = np.lexsort((values, inverse))
+    inverse = inverse[order]
+    values = values[order]
+    groups, starts, counts = np.unique(inverse, return_index=True, return_counts=True)
+    lower = values[starts + (counts - 1) // 2]
+    upper = values[starts + counts // 2]
+    medians[groups] = (lower + upper) / 2
+    return medians
+
+
+def group_stats(groups, values):
+    """Calculate the count, mean, standard deviation, median, min and max of the values of each group.
+
+    NaN values are ignored.
+
+    Parameters
+    ----------
+    groups : array_like
+        The group (e.g. observing band) of each value.
+    values : array_like
+        The values.
+
+    Returns
+    -------
+    dict
+        The statistics of each group keyed on the group.
+    """
+    groups = np.asarray(groups)
+    values = np.asarray(values, dtype=float)
+    names, inverse = np.unique(groups, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    ngroups = len(names)
+    finite = np.isfinite(values)
+    finite_values = np.where(finite, values, 0.0)
+
+    count = np.bincount(inverse, weights=finite, minlength=ngroups)
+    total = np.bincount(inverse, weights=finite_values, minlength=ngroups)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = total / count
+        variance = np.bincount(inverse, weights=np.where(finite, (values - mean[inverse]) ** 2, 0.0), minlength=ngroups) / count
+    minimum = np.full(ngroups, np.inf)
+    np.minimum.at(minimum, inverse[finite], values[finite])
+    maximum = np.full(ngroups, -np.inf)
+    np.maximum.at(maximum, inverse[finite], values[finite])
+    median = _group_medians(inverse, values, ngroups)
+
+    stats = {}
+    for i, name in enumerate(names.tolist()):
+        empty = count[i] == 0
+        stats[name] = {
+            "count": int(count[i]),
+            "mean": float(mean[i]),
+            "std": float(np.sqrt(variance[i])),
+            "median": float(median[i]),
+            "min": np.nan if empty else float(minimum[i]),
+            "max": np.nan if empty else float(maximum[i]),
+        }
+    return stats
+
+
+def binned_time_series(mjd, values, bin_days, errors=None):
+    """Bin values in time.
+
+    Values are combined with an inverse variance weighted mean if `errors` are given and a
+    mean otherwise. NaN values (and values with non-positive or NaN errors) are ignored.
+
+    Parameters
+    ----------
+    mjd : array_like
+        The MJD of each value.
+    values : array_like
+        The values, e.g. the DM, RM or SN column.
+    bin_days : float
+        The width of the bins in days. Bins start at the first MJD.
+    errors : array_like, optional
+        The uncertainty of each value, by default None.
+
+    Returns
+    -------
+    dict
+        Arrays of the "mjd" (mean MJD of the values in the bin), "value", "error" (the
+        uncertainty of the weighted mean or standard error of the mean), "median" and
+        "count" of each bin that has values.
+    """
+    mjd = np.asarray(mjd, dtype=float)
+    values = np.asarray(values, dtype=float)
+    valid = np.isfinite(mjd) & np.isfinite(values)
+    if errors is not None:
+        errors = np.asarray(errors, dtype=float)
+        valid &= np.isfinite(errors) & (errors > 0)
+    if not valid.any():
+        return {key: np.array([]) for key in ("mjd", "value", "error", "median", "count")}
+    mjd = mjd[valid]
+    values = values[valid]
+
+    bins = np.floor((mjd - mjd.min()) / bin_days).astype(int)
+    occupied, inverse = np.unique(bins, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    nbins = len(occupied)
+    count = np.bincount(inverse, minlength=nbins).astype(float)
+    bin_mjd = np.bincount(inverse, weights=mjd, minlength=nbins) / count
+
+    if errors is not None:
+        weights = 1 / errors[valid] ** 2
+        weight_sum = np.bincount(inverse, weights=weights, minlength=nbins)
+        value = np.bincount(inverse, weights=weights * values, minlength=nbins) / weight_sum
+        error = 1 / np.sqrt(weight_sum)
+    else:
+        value = np.bincount(inverse, weights=values, minlength=nbins) / count
+        variance = np.bincount(inverse, weights=(values - value[inverse]) ** 2, minlength=nbins) / count
+        error = np.sqrt(variance / count)
+
+    return {
+        "mjd": bin_mjd,
+        "value": value,
+        "error": error,
+        "median": _group_medians(inverse, values, nbins),
+        "count": count.astype(int),
+    }
+
+
+def rolling_median(values, window):
+    """Return the median of each value and the `window - 1` values before it.
+
+    The values should be sorted in time. NaN values are ignored and the first `window - 1`
+    medians are NaN.
+    """
+    values = np.asarray(values, dtype=float)
+    medians = np.full(len(values), np.nan)
+    if window < 1 or len(values) < window:
+        return medians
+    windows = np.lib.stride_tricks.sliding_window_view(values, window)
+    finite = np.isfinite(windows).any(axis=1)
+    if finite.any():
+        with np.errstate(invalid="ignore"):
+            medians[window - 1:][finite] = np.nanmedian(windows[finite], axis=1)
+    return medians
+
+
+def summarise_fold_results(columns, bin_days=30, window=5):
+    """Summarise the DM, RM and SN of the PulsarFoldResult columns from `fold_result_columns`.
+
+    Parameters
+    ----------
+    columns : dict
+        The NumPy columns of PulsarFoldResults.
+    bin_days : float, optional
+        The width of the time series bins in days, by default 30.
+    window : int, optional
+        The number of observations in the rolling median, by default 5.
+
+    Returns
+    -------
+    dict
+        The "binned" DM, RM and SN time series, the "band" statistics of each of them
+        and their "rolling_median".
+    """
+    errors = {"dm": columns["dmErr"], "rm": columns["rmErr"], "sn": None}
+    return {
+        "binned": {
+            column: binned_time_series(columns["mjd"], columns[column], bin_days, errors=error)
+            for column, error in errors.items()
+        },
+        "band": {column: group_stats(columns["band"], columns[column]) for column in errors},
+        "rolling_median": {column: rolling_median(columns[column], window) for column in errors},
+    }
@@ -1,34 +1,118 @@
-import re
 import csv
 import json
+from functools import lru_cache
 
 from psrdb.load_data import LBAND_CALIBRATORS, UHFBAND_CALIBRATORS, SBAND_CALIBRATORS, POLARISATION_CALIBRATORS
 
 
+@lru_cache(maxsize=None)
+def get_calibrator_names():
+    """Return the calibrator source names from the calibrator data files, read once per process."""
+    calibrator_names = ("J1939-6342", "J0408-6545")# Flux and bandpass calibration https://skaafrica.atlassian.net/wiki/spaces/ESDKB/pages/1481408634/Flux+and+bandpass+calibration
+    for cal_file in [LBAND_CALIBRATORS, UHFBAND_CALIBRATORS, SBAND_CALIBRATORS, POLARISATION_CALIBRATORS]:
+        with open(cal_file, 'r') as csv_file:
+            csv_reader = csv.reader(csv_file)
+            calibrator_names += tuple(row[0] for row in csv_reader)
+    return calibrator_names
+
+
+# Source name suffixes of calibration observations
+CALIBRATION_LABELS = ("_N", "_S", "_O")
+
+
+class CalibratorMatcher:
+    """Classifies source names as calibration observations.
+
+    A source is a calibration observation if it ends with a calibration label or a calibrator
+    name. The names are grouped into sets by length so a source is checked with one set lookup
+    per distinct name length instead of comparing it against every name.
+
+    Parameters
+    ----------
+    names : iterable of str
+        The calibrator source names.
+    labels : iterable of str, optional
+        The calibration label suffixes, by default `CALIBRATION_LABELS`.
+    """
+    def __init__(self, names, labels=CALIBRATION_LABELS):
+        self.suffixes = {}
+        for name in (*names, *labels):
+            if name:
+                self.suffixes.setdefault(len(name), set()).add(name)
+
+    def is_calibrator(self, source):
+        """Return True if the source name is a calibration observation."""
+        for length, names in self.suffixes.items():
+            if source[-length:] in names:
+                return True
+        return False
+
+    __contains__ = is_calibrator
+
+
+@lru_cache(maxsize=None)
+def get_calibrator_matcher():
+    """Return the CalibratorMatcher of the calibrator data files, built once per process."""
+    return CalibratorMatcher(get_calibrator_names())
+
+
+def parse_key_values(data):
+    """Parse the text of a DADA/PTUSE obs.header style file into a dict.
+
+    Each line is a key followed by whitespace and a value. Comments start with #, runs of
+    whitespace in values are collapsed to a single space and anything after a NUL byte (the
+    padding of a DADA header) is ignored.
+
+    Parameters
+    ----------
+    data : str, bytes or buffer
+        The header text, e.g. the contents of a file as bytes or an mmap of it.
+
+    Returns
+    -------
+    dict
+        The header keys and values as strings.
+    """
+    if not isinstance(data, str):
+        data = bytes(data).split(b"\0", 1)[0].decode("utf-8", "replace")
+    else:
+        data = data.split("\0", 1)[0]
+    cfg = {}
+    for line in data.splitlines():
+        if "#" in line:
+            line = line.split("#", 1)[0]
+        parts = line.split(None, 1)
+        if not parts:
+            continue
+        key, value = parts
+        value = value.rstrip()
+        if "  " in value or "\t" in value:
+            value = " ".join(value.split())
+        cfg[key] = value
+    return cfg
+
+
 class KeyValueStore:
     def __init__(self, fname):
         self.cfg = {}
         self.read_file(fname)
 
+    @classmethod
+    def from_text(cls, data):
+        """Create the store from header text (str, bytes or an mmap) rather than a file name."""
+        store = cls.__new__(cls)
+        store.cfg = parse_key_values(data)
+        return store
+
     def read_file(self, fname):
-        with open(fname, 'r') as header_file:
-            for line in header_file:
-                # remove all comments
-                line = line.strip()
-                line = re.sub("#.*", "", line)
-                if line:
-                    line = re.sub("\s+", " ", line)
-                    key, value = line.split(" ", 1)
-                    self.cfg[key] = value.strip()
+        with open(fname, 'rb') as header_file:
+            self.cfg.update(parse_key_values(header_file.read()))
 
     def set(self, key, value):
         self.cfg[key] = str(value)
 
     def get(self, key):
-        if key in self.cfg.keys():
-            return self.cfg[key]
-        else:
-            return "None"
+        return self.cfg.get(key, "None")
 
 
 class Header(KeyValueStore):
@@ -118,14 +202,8 @@ class PTUSEHeader(Header):
             self.fold_nbin = int(self.get("FOLD_OUTNBIN"))
             self.fold_tsubint = int(self.get("FOLD_OUTTSUBINT"))
 
-            # Get all calibrator names from data files
-            calibrator_names = ("J1939-6342", "J0408-6545")# Flux and bandpass calibration https://skaafrica.atlassian.net/wiki/spaces/ESDKB/pages/1481408634/Flux+and+bandpass+calibration
-            for cal_file in [LBAND_CALIBRATORS, UHFBAND_CALIBRATORS, SBAND_CALIBRATORS, POLARISATION_CALIBRATORS]:
-                with open(cal_file, 'r') as csv_file:
-                    csv_reader = csv.reader(csv_file)
-                    calibrator_names += tuple(row[0] for row in csv_reader)
-            # Ends with are labels for calibrations and starts with are calibrator source names
-            if self.source.endswith(("_N", "_S", "_O")) or self.source.endswith(calibrator_names):
+            # Labels for calibrations or calibrator source names from the data files
+            if get_calibrator_matcher().is_calibrator(self.source):
                 self.obs_type = "cal"
             else:
                 self.obs_type = "fold"
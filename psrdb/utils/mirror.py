@@ -0,0 +1,362 @@
+import os
+import json
+import logging
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+from psrdb.load_data import CACHE_DIR
+
+
+MIRROR = os.path.join(CACHE_DIR, "mirror.sqlite3")
+
+# The node fields stored in the indexed columns of the mirror, the first path found in a node is used
+MIRROR_COLUMNS = {
+    "pulsar": ("pulsar.name",),
+    "utc_start": ("utcStart", "observation.utcStart"),
+    "project_short": ("project.short",),
+    "band": ("band", "observation.band"),
+    "mjd": ("mjd",),
+}
+# The mirror column of the list filters that are evaluated on the stored rows. The other
+# filters are matched against the filters each row was synced with.
+FILTER_COLUMNS = {
+    "pulsar": "pulsar",
+    "pulsar_Name": "pulsar",
+    "projectShort": "project_short",
+    "project_Short": "project_short",
+    "band": "band",
+    "utcStart": "utc_start",
+}
+# Filters that bound utc_start and are replaced by the high-water mark when syncing
+UTC_FILTERS = ("utcStartGte", "utcStartLte")
+# Filters added by list_graphql for pagination
+PAGE_FILTERS = ("first", "after")
+UTC_FORMAT = "%Y-%m-%dT%H:%M:%S+00:00"
+MJD_EPOCH = datetime(1858, 11, 17)
+
+
+def _node_value(node, path):
+    for key in path.split("."):
+        if not isinstance(node, dict):
+            return None
+        node = node.get(key)
+    return node
+
+
+def _utc_to_mjd(utc):
+    d = datetime.strptime(utc[:19], "%Y-%m-%dT%H:%M:%S")
+    return (d - MJD_EPOCH).total_seconds() / 86400
+
+
+def _filter_values(filters):
+    """Return the filter values keyed on the field, without the unset and pagination filters."""
+    return {f["field"]: f["value"] for f in filters if f["value"] is not None and f["field"] not in PAGE_FILTERS}
+
+
+def _utc_range(filter_values):
+    """Return the [utcStartGte, utcStartLte] bounds of the filter values, None where unbounded."""
+    return [filter_values.get(field) for field in UTC_FILTERS]
+
+
+def _contains(outer, inner):
+    """Return whether the utc range `outer` contains the utc range `inner`."""
+    lower = outer[0] is None or (inner[0] is not None and inner[0] >= outer[0])
+    upper = outer[1] is None or (inner[1] is not None and inner[1] <= outer[1])
+    return lower and upper
+
+
+def query_key(table_name, filters):
+    """Return the key of a synced query, its filters without the utc_start bounds."""
+    values = {field: value for field, value in _filter_values(filters).items() if field not in UTC_FILTERS}
+    return json.dumps([table_name, values], sort_keys=True)
+
+
+class Mirror:
+    """Local SQLite mirror of the results of list queries.
+
+    Each synced query (a table and its filters) remembers a high-water mark of the latest
+    utcStart it has seen so `sync` only fetches rows from that point on, and the utcStart
+    range it was synced for so `list` only answers queries within that range. Rows are stored with
+    the pulsar name, utcStart, project short name, band and MJD in indexed columns so `list`
+    can answer queries without the server.
+
+    Parameters
+    ----------
+    path : str, optional
+        The location of the SQLite mirror, by default `MIRROR`.
+    """
+    def __init__(self, path=None):
+        self.path = path or MIRROR
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS syncs ("
+                    "key TEXT PRIMARY KEY, table_name TEXT NOT NULL, filters TEXT NOT NULL, "
+                    "high_water TEXT, synced_at TEXT NOT NULL, utc_range TEXT)"
+                )
+                # Mirrors created before the synced utcStart range was recorded
+                if "utc_range" not in [row[1] for row in conn.execute("PRAGMA table_info(syncs)")]:
+                    conn.execute("ALTER TABLE syncs ADD COLUMN utc_range TEXT")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS rows ("
+                    "table_name TEXT NOT NULL, key TEXT NOT NULL, id TEXT NOT NULL, "
+                    "pulsar TEXT, utc_start TEXT, project_short TEXT, band TEXT, mjd REAL, node TEXT NOT NULL, "
+                    "PRIMARY KEY (table_name, key, id))"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS rows_pulsar ON rows (table_name, pulsar, utc_start)")
+                conn.execute("CREATE INDEX IF NOT EXISTS rows_utc_start ON rows (table_name, utc_start)")
+                conn.execute("CREATE INDEX IF NOT EXISTS rows_project ON rows (table_name, project_short, utc_start)")
+                conn.execute("CREATE INDEX IF NOT EXISTS rows_band ON rows (table_name, band, utc_start)")
+                conn.execute("CREATE INDEX IF NOT EXISTS rows_mjd ON rows (table_name, mjd)")
+        finally:
+            conn.close()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def high_water(self, table_name, filters):
+        """Return the high-water mark of a synced query or None if it hasn't been synced."""
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT high_water FROM syncs WHERE key = ?", (query_key(table_name, filters),)).fetchone()
+        finally:
+            conn.close()
+        return row[0] if row is not None else None
+
+    def utc_range(self, table_name, filters):
+        """Return the [utcStartGte, utcStartLte] range a query has been synced for or None if it hasn't been."""
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT utc_range FROM syncs WHERE key = ?", (query_key(table_name, filters),)).fetchone()
+        finally:
+            conn.close()
+        return json.loads(row[0]) if row is not None and row[0] is not None else None
+
+    def sync(self, table, filters, full=False, lookback_days=2, fields=None):
+        """Fetch the new and changed rows of a list query and store them in the mirror.
+
+        Only rows with a utcStart (or observation utcStart) at or after the query's high-water mark
+        (less `lookback_days` to pick up recently changed rows) are fetched. The mirrored rows in
+        that window are replaced by those fetched, so rows deleted on the server are removed.
+        Tables whose nodes have neither use the time of the last sync as the high-water mark.
+        A query whose utcStartGte and utcStartLte bounds are outside the range it was previously
+        synced for is synced in full for its new range.
+
+        Parameters
+        ----------
+        table : GraphQLTable
+            The table to query, e.g. an `Observation` or `Toa` instance.
+        filters : list of dict
+            The filters of the query, as built by the table's list method.
+        full : bool, optional
+            Replace all the rows of the query instead of fetching from the high-water mark, by default False.
+        lookback_days : float, optional
+            The number of days before the high-water mark to fetch again, by default 2.
+        fields : list of str, optional
+            Node fields to fetch as well as the table's `field_names`, e.g. "observation { utcStart }"
+            for ToAs, by default None
+
+        Returns
+        -------
+        int
+            The number of rows fetched.
+        """
+        key = query_key(table.table_name, filters)
+        synced_at = datetime.now(timezone.utc).strftime(UTC_FORMAT)
+        utc_range = _utc_range(_filter_values(filters))
+        synced_range = self.utc_range(table.table_name, filters)
+        if synced_range is None or not _contains(synced_range, utc_range):
+            # The rows outside the synced range were never fetched
+            full = True
+        else:
+            utc_range = synced_range
+        high_water = None if full else self.high_water(table.table_name, filters)
+
+        query_filters = [f for f in filters if f["field"] != "utcStartGte"]
+        utcs = next((f["value"] for f in filters if f["field"] == "utcStartGte" and f["value"] is not None), None)
+        if high_water is not None:
+            since = (datetime.strptime(high_water, UTC_FORMAT) - timedelta(days=lookback_days)).strftime(UTC_FORMAT)
+            utcs = since if utcs is None else max(utcs, since)
+        query_filters.append({"field": "utcStartGte", "value": utcs})
+
+        table.get_dicts = True
+        field_names = list(table.field_names)
+        if "id" not in field_names:
+            field_names.insert(0, "id")
+        field_names += [field for field in fields or [] if field not in field_names]
+        nodes = table.list_graphql(table.table_name, query_filters, [], field_names)
+        logging.info(f"Fetched {len(nodes)} {table.table_name} rows since {utcs}")
+
+        utc_starts = [utc for utc in (self._columns(node, {})["utc_start"] for node in nodes) if utc is not None]
+        if utc_starts:
+            new_high_water = max(utc_starts + ([high_water] if high_water is not None else []))
+        elif nodes or high_water is None:
+            # The nodes have no utcStart so use the time of this sync
+            new_high_water = synced_at
+        else:
+            new_high_water = high_water
+
+        conn = self._connect()
+        try:
+            with conn:
+                if full or utcs is None:
+                    conn.execute("DELETE FROM rows WHERE key = ?", (key,))
+                else:
+                    # Replace the rows of the fetched window
+                    utce = next((f["value"] for f in filters if f["field"] == "utcStartLte" and f["value"] is not None), None)
+                    conditions = "key = ? AND utc_start >= ?"
+                    parameters = [key, utcs]
+                    if utce is not None:
+                        conditions += " AND utc_start <= ?"
+                        parameters.append(utce)
+                    conn.execute(f"DELETE FROM rows WHERE {conditions}", parameters)
+                self._add(conn, table.table_name, key, _filter_values(filters), nodes)
+                conn.execute(
+                    "INSERT OR REPLACE INTO syncs (key, table_name, filters, high_water, synced_at, utc_range) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, table.table_name, json.dumps(json.loads(key)[1]), new_high_water, synced_at, json.dumps(utc_range)),
+                )
+        finally:
+            conn.close()
+        return len(nodes)
+
+    def _columns(self, node, filter_values):
+        columns = {}
+        for column, paths in MIRROR_COLUMNS.items():
+            columns[column] = next((value for value in (_node_value(node, path) for path in paths) if value is not None), None)
+        # Fall back on the query's filters for fields that are not in the nodes (e.g. the pulsar of ToAs)
+        for field, column in FILTER_COLUMNS.items():
+            value = filter_values.get(field)
+            if columns[column] is None and isinstance(value, str):
+                columns[column] = value
+            elif columns[column] is None and isinstance(value, list) and len(value) == 1:
+                columns[column] = value[0]
+        return columns
+
+    def _add(self, conn, table_name, key, filter_values, nodes):
+        rows = []
+        for node in nodes:
+            columns = self._columns(node, filter_values)
+            rows.append((
+                table_name,
+                key,
+                str(node["id"]),
+                columns["pulsar"],
+                columns["utc_start"],
+                columns["project_short"],
+                columns["band"],
+                columns["mjd"],
+                json.dumps(node),
+            ))
+        conn.executemany(
+            "INSERT OR REPLACE INTO rows (table_name, key, id, pulsar, utc_start, project_short, band, mjd, node) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+
+    def _covering_keys(self, table_name, filter_values, syncs):
+        """Return the keys of the synced queries whose rows answer a query with the filter values.
+
+        The synced queries must have the same filters as the query, apart from the stored columns,
+        must have been synced for a utcStart range containing the query's, and together they must
+        cover the values of the query's column filters.
+
+        Raises
+        ------
+        RuntimeError
+            If the synced queries don't have all the rows of the query.
+        """
+        other_filters = {
+            field: value for field, value in filter_values.items() if field not in FILTER_COLUMNS and field not in UTC_FILTERS
+        }
+        matched = []
+        for key, sync_filters, utc_range in syncs:
+            sync_filters = json.loads(sync_filters)
+            if {field: value for field, value in sync_filters.items() if field not in FILTER_COLUMNS} == other_filters:
+                matched.append((key, sync_filters, None if utc_range is None else json.loads(utc_range)))
+        if not matched:
+            raise RuntimeError(
+                f"No {table_name} query with the filters {json.dumps(other_filters, sort_keys=True)} has been synced "
+                f"to the mirror {self.path}, sync it before listing it with the local backend"
+            )
+        # Only the synced queries whose utcStart range contains the query's have all its rows
+        requested = _utc_range(filter_values)
+        covering = [(key, sync_filters) for key, sync_filters, utc_range in matched if utc_range is not None and _contains(utc_range, requested)]
+        if not covering:
+            raise RuntimeError(
+                f"The synced {table_name} queries were synced for the utcStart ranges "
+                f"{['unknown' if utc_range is None else utc_range for _, _, utc_range in matched]}, sync the query "
+                f"for the range {requested} before listing it with the local backend"
+            )
+        matched = covering
+
+        def values(value):
+            return value if isinstance(value, list) else [value]
+
+        column_fields = {field for _, sync_filters in matched for field in sync_filters if field in FILTER_COLUMNS}
+        column_fields |= {field for field in filter_values if field in FILTER_COLUMNS}
+        for field in column_fields:
+            # The values synced without a filter on the field (None) or with each of the filter's values
+            synced = [None if sync_filters.get(field) is None else values(sync_filters[field]) for _, sync_filters in matched]
+            if None in synced:
+                continue
+            if field not in filter_values:
+                missing = "all"
+            else:
+                missing = [value for value in values(filter_values[field]) if not any(value in s for s in synced)]
+            if missing:
+                raise RuntimeError(
+                    f"The synced {table_name} queries are only for some {field} values, sync the query for {missing} "
+                    "before listing it with the local backend"
+                )
+        return [key for key, _ in matched]
+
+    def list(self, table_name, filters):
+        """Return the mirrored nodes of a table that match the filters of a list query.
+
+        The pulsar, project short name, band and utcStart filters are evaluated on the stored
+        rows (the utcStart bounds are compared with the MJD of rows without a utcStart). The other
+        filters must equal those the rows were synced with.
+
+        Raises
+        ------
+        RuntimeError
+            If no query of the table with the same filters has been synced, or the synced queries
+            don't cover the query's utcStart range or only have some of its pulsars, projects or bands.
+        """
+        filter_values = _filter_values(filters)
+        conn = self._connect()
+        try:
+            syncs = conn.execute("SELECT key, filters, utc_range FROM syncs WHERE table_name = ?", (table_name,)).fetchall()
+            if not syncs:
+                raise RuntimeError(f"No {table_name} rows have been synced to the mirror {self.path}")
+            keys = self._covering_keys(table_name, filter_values, syncs)
+
+            conditions = [f"key IN ({', '.join('?' * len(keys))})"]
+            parameters = list(keys)
+            for field, value in filter_values.items():
+                if field in FILTER_COLUMNS:
+                    values = value if isinstance(value, list) else [value]
+                    conditions.append(f"{FILTER_COLUMNS[field]} IN ({', '.join('?' * len(values))})")
+                    parameters.extend(values)
+                elif field in UTC_FILTERS:
+                    operator = ">=" if field == "utcStartGte" else "<="
+                    conditions.append(f"(utc_start {operator} ? OR (utc_start IS NULL AND mjd {operator} ?))")
+                    parameters.extend([value, _utc_to_mjd(value)])
+            rows = conn.execute(
+                f"SELECT id, node FROM rows WHERE table_name = ? AND {' AND '.join(conditions)} ORDER BY utc_start, mjd, id",
+                [table_name] + parameters,
+            ).fetchall()
+        finally:
+            conn.close()
+
+        # A row may have been synced by more than one query
+        nodes = []
+        seen = set()
+        for id, node in rows:
+            if id not in seen:
+                seen.add(id)
+                nodes.append(json.loads(node))
+        return nodes
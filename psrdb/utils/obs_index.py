@@ -0,0 +1,198 @@
+import os
+import json
+import logging
+import sqlite3
+from fnmatch import fnmatch
+
+from psrdb.load_data import CACHE_DIR
+from psrdb.utils.header import PTUSEHeader
+
+
+OBS_INDEX = os.path.join(CACHE_DIR, "observation_index.sqlite3")
+
+# The directory levels below the root of each observation tree, the last level holds the files
+TREE_LEVELS = {
+    "timing": ("source", "utc_start", "beam", "freq"),
+    "search": ("source", "utc_start", "beam", "freq"),
+    "results": ("beam", "utc_start", "source"),
+}
+
+
+class ObservationIndex:
+    """Local SQLite index of the observation directories, files and obs.header contents of the
+    timing, search and results trees.
+
+    Each directory's modification time is recorded so `update` only lists the directories that
+    have changed (had entries added or removed) since the last scan, which avoids re-globbing
+    slow file systems. Use `find` and `files` to query the index.
+
+    Parameters
+    ----------
+    path : str, optional
+        The location of the SQLite index, by default `OBS_INDEX`.
+    """
+    def __init__(self, path=None):
+        self.path = path or OBS_INDEX
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS directories ("
+                    "path TEXT PRIMARY KEY, mtime_ns INTEGER NOT NULL, entries TEXT NOT NULL)"
+                )
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS observations ("
+                    "path TEXT PRIMARY KEY, tree TEXT NOT NULL, source TEXT, utc_start TEXT, beam TEXT, freq TEXT, "
+                    "files TEXT NOT NULL, header TEXT, obs_type TEXT, schedule_block_id TEXT)"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS observations_obs ON observations (source, utc_start, beam)")
+        finally:
+            conn.close()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def update(self, tree, root):
+        """Scan a tree and update the index, only listing directories that have changed.
+
+        Parameters
+        ----------
+        tree : str
+            The name of the tree, one of `TREE_LEVELS`.
+        root : str
+            The root directory of the tree.
+
+        Returns
+        -------
+        tuple of int
+            The number of directories that were listed and the number that were unchanged.
+        """
+        if tree not in TREE_LEVELS:
+            raise RuntimeError(f"Unknown tree {tree}, expected one of {', '.join(TREE_LEVELS)}")
+        counts = {"listed": 0, "unchanged": 0}
+        conn = self._connect()
+        try:
+            with conn:
+                self._scan(conn, tree, os.path.abspath(root), [], counts)
+        finally:
+            conn.close()
+        logging.info(f"Indexed {tree}: listed {counts['listed']} directories, {counts['unchanged']} unchanged")
+        return counts["listed"], counts["unchanged"]
+
+    def _scan(self, conn, tree, directory, values, counts):
+        levels = TREE_LEVELS[tree]
+        is_leaf = len(values) == len(levels)
+        try:
+            mtime_ns = os.stat(directory).st_mtime_ns
+        except OSError:
+            self._remove(conn, directory)
+            return
+        row = conn.execute("SELECT mtime_ns, entries FROM directories WHERE path = ?", (directory,)).fetchone()
+        if row is not None and row[0] == mtime_ns:
+            counts["unchanged"] += 1
+            entries = json.loads(row[1])
+        else:
+            counts["listed"] += 1
+            with os.scandir(directory) as scan:
+                entries = sorted(entry.name for entry in scan if entry.is_dir() != is_leaf)
+            if row is not None:
+                for removed in set(json.loads(row[1])) - set(entries):
+                    self._remove(conn, os.path.join(directory, removed))
+            conn.execute(
+                "INSERT OR REPLACE INTO directories (path, mtime_ns, entries) VALUES (?, ?, ?)",
+                (directory, mtime_ns, json.dumps(entries)),
+            )
+            if is_leaf:
+                self._index_observation(conn, tree, directory, values, entries)
+        if not is_leaf:
+            for entry in entries:
+                self._scan(conn, tree, os.path.join(directory, entry), values + [entry], counts)
+
+    def _index_observation(self, conn, tree, directory, values, files):
+        cfg = None
+        obs_type = None
+        schedule_block_id = None
+        if "obs.header" in files:
+            header_file = os.path.join(directory, "obs.header")
+            try:
+                obs_data = PTUSEHeader(header_file)
+                cfg = obs_data.cfg
+                obs_data.parse()
+                obs_type = getattr(obs_data, "obs_type", None)
+                schedule_block_id = obs_data.schedule_block_id
+            except Exception as e:
+                logging.warning(f"Could not parse {header_file}: {e}")
+        location = dict(zip(TREE_LEVELS[tree], values))
+        conn.execute(
+            "INSERT OR REPLACE INTO observations "
+            "(path, tree, source, utc_start, beam, freq, files, header, obs_type, schedule_block_id) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                directory,
+                tree,
+                location.get("source"),
+                location.get("utc_start"),
+                location.get("beam"),
+                location.get("freq"),
+                json.dumps(files),
+                json.dumps(cfg) if cfg is not None else None,
+                obs_type,
+                schedule_block_id,
+            ),
+        )
+
+    def _remove(self, conn, directory):
+        # Remove the directory and everything below it
+        prefix = directory + os.sep
+        for table in ("directories", "observations"):
+            conn.execute(
+                f"DELETE FROM {table} WHERE path = ? OR substr(path, 1, ?) = ?",
+                (directory, len(prefix), prefix),
+            )
+
+    def find(self, tree=None, source=None, utc_start=None, beam=None, obs_type=None):
+        """Return a list of dicts of the indexed observation directories matching the filters.
+
+        Each dict has the directory path, tree, source, utc_start, beam, freq, the list of
+        file names, the obs.header key values (or None), obs_type and schedule_block_id.
+        """
+        filters = {"tree": tree, "source": source, "utc_start": utc_start, "beam": beam, "obs_type": obs_type}
+        conditions = []
+        parameters = []
+        for field, value in filters.items():
+            if value is not None:
+                conditions.append(f"{field} = ?")
+                parameters.append(str(value))
+        query = "SELECT path, tree, source, utc_start, beam, freq, files, header, obs_type, schedule_block_id FROM observations"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        conn = self._connect()
+        try:
+            rows = conn.execute(query + " ORDER BY path", parameters).fetchall()
+        finally:
+            conn.close()
+        observations = []
+        for path, tree, source, utc_start, beam, freq, files, header, obs_type, schedule_block_id in rows:
+            observations.append({
+                "path": path,
+                "tree": tree,
+                "source": source,
+                "utc_start": utc_start,
+                "beam": beam,
+                "freq": freq,
+                "files": json.loads(files),
+                "header": json.loads(header) if header is not None else None,
+                "obs_type": obs_type,
+                "schedule_block_id": schedule_block_id,
+            })
+        return observations
+
+    def files(self, tree, source, utc_start, beam, pattern="*"):
+        """Return the paths of the indexed files of an observation that match a glob pattern."""
+        paths = []
+        for observation in self.find(tree=tree, source=source, utc_start=utc_start, beam=beam):
+            for name in observation["files"]:
+                if fnmatch(name, pattern):
+                    paths.append(os.path.join(observation["path"], name))
+        return paths
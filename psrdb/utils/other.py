@@ -106,6 +106,24 @@ def get_graphql_id(response, table, logger):
                 return decode_id(graphql_id)
 
 
+def cached_mutation_response(table, graphql_id):
+    """
+    Returns a response shaped like the reply to a create mutation for an object that already exists
+    """
+    import requests
+
+    response = requests.models.Response()
+    response.status_code = 200
+    response._content = json.dumps({
+        "data": {
+            to_camel_case(f"create_{table}"): {
+                to_camel_case(table): {"id": graphql_id},
+            },
+        },
+    }).encode("utf-8")
+    return response
+
+
 def get_rest_api_id(response, logger):
     content = json.loads(response.content)
     logger.debug(content.keys())
@@ -127,4 +145,24 @@ def decode_id(encoded):
 
 def chunk_list(lst, chunk_size):
     for i in range(0, len(lst), chunk_size):
-        yield lst[i:i + chunk_size]
\ No newline at end of file
+        yield lst[i:i + chunk_size]
+
+
+def read_cache_file(cache_dir, key):
+    """Return the text of a cache file or None if it does not exist."""
+    try:
+        with open(os.path.join(cache_dir, key), "r") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def write_cache_file(cache_dir, key, text):
+    """Atomically write the text of a cache file."""
+    os.makedirs(cache_dir, exist_ok=True)
+    cache_file = os.path.join(cache_dir, key)
+    # Write to a temporary file first so other processes never read a partial file
+    tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+    with open(tmp_file, "w") as f:
+        f.write(text)
+    os.replace(tmp_file, cache_file)
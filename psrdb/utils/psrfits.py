@@ -0,0 +1,267 @@
+import re
+import mmap
+import struct
+
+
+# FITS files are made of 2880 byte blocks and headers of 80 character cards
+BLOCK_SIZE = 2880
+CARD_SIZE = 80
+
+TFORM_RE = re.compile(r"^\s*(\d*)([LXBIJKAEDCMPQ])")
+# Number of bytes of each binary table column type
+TFORM_BYTES = {
+    "L": 1, "B": 1, "I": 2, "J": 4, "K": 8, "A": 1,
+    "E": 4, "D": 8, "C": 8, "M": 16, "P": 8, "Q": 16,
+}
+# Big endian struct codes of the numeric column types that can be read
+STRUCT_CODES = {"L": "?", "B": "B", "I": "h", "J": "i", "K": "q", "E": "f", "D": "d"}
+
+
+class PSRFITSError(RuntimeError):
+    """The file is not a PSRFITS file that can be read without psrchive."""
+
+
+def parse_card_value(value):
+    """Convert the value of a header card to a str, bool, int, float or None."""
+    value = value.strip()
+    if value.startswith("'"):
+        # Strings are quoted with '' used for a literal quote
+        end = 1
+        while True:
+            end = value.find("'", end)
+            if end == -1:
+                return value[1:].rstrip()
+            if value[end + 1:end + 2] == "'":
+                end += 2
+                continue
+            return value[1:end].replace("''", "'").rstrip()
+    value = value.split("/", 1)[0].strip()
+    if value == "":
+        return None
+    if value == "T":
+        return True
+    if value == "F":
+        return False
+    try:
+        return int(value)
+    except ValueError:
+        pass
+    try:
+        return float(value.replace("D", "E"))
+    except ValueError:
+        return value
+
+
+def _round_up_to_block(size):
+    return -(-size // BLOCK_SIZE) * BLOCK_SIZE
+
+
+class HDU:
+    """A header data unit of a FITS file whose data has not been read.
+
+    Parameters
+    ----------
+    data : mmap.mmap
+        The memory-mapped FITS file.
+    header : dict
+        The header keys and values.
+    data_offset : int
+        The byte offset of the start of the HDU's data in the file.
+    """
+    def __init__(self, data, header, data_offset):
+        self._data = data
+        self.header = header
+        self.data_offset = data_offset
+        self.name = header.get("EXTNAME", "PRIMARY")
+        self.columns = {}
+        if header.get("XTENSION") == "BINTABLE":
+            self._parse_columns()
+
+    @property
+    def nrows(self):
+        return self.header.get("NAXIS2", 0) if self.columns else 0
+
+    @property
+    def data_size(self):
+        """The number of bytes of data, excluding the padding to the end of the last block."""
+        naxis = self.header.get("NAXIS", 0)
+        if naxis == 0:
+            return 0
+        size = abs(self.header.get("BITPIX", 8)) // 8
+        for axis in range(1, naxis + 1):
+            size *= self.header.get(f"NAXIS{axis}", 0)
+        return self.header.get("GCOUNT", 1) * (self.header.get("PCOUNT", 0) + size)
+
+    def _parse_columns(self):
+        offset = 0
+        for column in range(1, self.header.get("TFIELDS", 0) + 1):
+            tform = self.header[f"TFORM{column}"]
+            match = TFORM_RE.match(tform)
+            if match is None:
+                raise PSRFITSError(f"Unknown column format {tform} in {self.name}")
+            repeat = int(match.group(1) or 1)
+            type_code = match.group(2)
+            if type_code == "X":
+                size = -(-repeat // 8)
+            else:
+                size = repeat * TFORM_BYTES[type_code]
+            name = self.header.get(f"TTYPE{column}", f"COL{column}")
+            self.columns[name] = (offset, repeat, type_code)
+            offset += size
+
+    def read_column(self, name):
+        """Return a list of the values of a column, reading only that column's bytes from each row.
+
+        String (A) columns are returned as str and numeric columns as a scalar when the repeat
+        count is 1, otherwise as a tuple.
+        """
+        if name not in self.columns:
+            raise PSRFITSError(f"No column {name} in {self.name}")
+        offset, repeat, type_code = self.columns[name]
+        row_size = self.header["NAXIS1"]
+        if self.data_offset + self.nrows * row_size > len(self._data):
+            raise PSRFITSError(f"The {self.name} table is truncated")
+        if type_code == "A":
+            values = []
+            for row in range(self.nrows):
+                start = self.data_offset + row * row_size + offset
+                values.append(self._data[start:start + repeat].decode("ascii", "replace").rstrip(" \x00"))
+            return values
+        if type_code not in STRUCT_CODES:
+            raise PSRFITSError(f"Can not read column {name} with format {type_code} in {self.name}")
+        column_struct = struct.Struct(f">{repeat}{STRUCT_CODES[type_code]}")
+        values = []
+        for row in range(self.nrows):
+            row_values = column_struct.unpack_from(self._data, self.data_offset + row * row_size + offset)
+            values.append(row_values[0] if repeat == 1 else row_values)
+        return values
+
+
+class PSRFITS:
+    """A memory-mapped reader of the headers and small tables of a PSRFITS file.
+
+    Only the headers are parsed on opening and table columns are only read when
+    requested, so the (large) data arrays of the SUBINT table are never decoded.
+
+    Parameters
+    ----------
+    path : str
+        The path to the PSRFITS file.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise PSRFITSError(f"{path} is empty")
+        try:
+            self.hdus = self._parse_hdus()
+        except Exception:
+            self.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self._data.close()
+        self._file.close()
+
+    def _parse_header(self, offset):
+        header = {}
+        while True:
+            if offset + BLOCK_SIZE > len(self._data):
+                raise PSRFITSError(f"{self.path} has a truncated header")
+            block = self._data[offset:offset + BLOCK_SIZE].decode("ascii", "replace")
+            offset += BLOCK_SIZE
+            for start in range(0, BLOCK_SIZE, CARD_SIZE):
+                card = block[start:start + CARD_SIZE]
+                key = card[:8].strip()
+                if key == "END":
+                    return header, offset
+                if card[8:10] == "= ":
+                    header[key] = parse_card_value(card[10:])
+
+    def _parse_hdus(self):
+        if self._data[:9] != b"SIMPLE  =":
+            raise PSRFITSError(f"{self.path} is not a FITS file")
+        hdus = {}
+        offset = 0
+        while offset < len(self._data):
+            header, data_offset = self._parse_header(offset)
+            hdu = HDU(self._data, header, data_offset)
+            hdus.setdefault(hdu.name, hdu)
+            offset = data_offset + _round_up_to_block(hdu.data_size)
+        if hdus["PRIMARY"].header.get("FITSTYPE") != "PSRFITS":
+            raise PSRFITSError(f"{self.path} is not a PSRFITS file")
+        return hdus
+
+    @property
+    def primary(self):
+        """The primary header keys and values."""
+        return self.hdus["PRIMARY"].header
+
+    @property
+    def subint(self):
+        if "SUBINT" not in self.hdus:
+            raise PSRFITSError(f"{self.path} has no SUBINT table")
+        return self.hdus["SUBINT"]
+
+    @property
+    def nsubint(self):
+        return self.subint.nrows
+
+    @property
+    def tsubint(self):
+        """The duration of each sub-integration in seconds."""
+        return self.subint.read_column("TSUBINT")
+
+    @property
+    def length(self):
+        """The length of the observation in seconds, the sum of the sub-integration durations."""
+        return sum(self.tsubint)
+
+    def ephemeris_text(self):
+        """Return the par file text stored in the PSRPARAM table or None if there is no PSRPARAM table."""
+        if "PSRPARAM" not in self.hdus:
+            return None
+        lines = [line.rstrip() for line in self.hdus["PSRPARAM"].read_column("PARAM")]
+        return "\n".join(line for line in lines if line) + "\n"
+
+
+def read_psrfits_length(path):
+    """Return the length in seconds of a PSRFITS file from its SUBINT table."""
+    with PSRFITS(path) as psrfits:
+        return psrfits.length
+
+
+def read_psrfits_ephemeris(path):
+    """Return the par file text of a PSRFITS file or None if it has no PSRPARAM table."""
+    with PSRFITS(path) as psrfits:
+        return psrfits.ephemeris_text()
+
+
+def read_psrfits_metadata(path):
+    """
+    Return the basic header information of a PSRFITS file in the same format as `psrdb.utils.upload.get_archive_metadata`
+    """
+    with PSRFITS(path) as psrfits:
+        subint = psrfits.subint.header
+        return {
+            "archive": path,
+            "source": psrfits.primary.get("SRC_NAME"),
+            "telescope": psrfits.primary.get("TELESCOP"),
+            "frequency": psrfits.primary.get("OBSFREQ"),
+            "bandwidth": psrfits.primary.get("OBSBW"),
+            "nsubint": psrfits.nsubint,
+            "nchan": subint.get("NCHAN"),
+            "npol": subint.get("NPOL"),
+            "nbin": subint.get("NBIN"),
+            "length": psrfits.length,
+            "ephemeris": psrfits.ephemeris_text(),
+        }
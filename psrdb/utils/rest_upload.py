@@ -0,0 +1,402 @@
+import io
+import os
+import json
+import time
+import uuid
+import hashlib
+import logging
+import sqlite3
+
+import requests
+from concurrent.futures import ThreadPoolExecutor
+
+from psrdb.load_data import CACHE_DIR
+
+
+# Size of the blocks read from disk while streaming a file upload
+CHUNK_SIZE = 1024 * 1024
+
+# Size of each part of a chunked upload
+CHUNKED_UPLOAD_SIZE = 8 * 1024 * 1024
+
+# Response codes that are worth re-sending an upload for
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+UPLOAD_INDEX = os.path.join(CACHE_DIR, "upload_index.sqlite3")
+
+
+class MultipartFileEncoder:
+    """Stream a multipart/form-data body containing form fields and a single file.
+
+    The body is produced in the same layout as ``requests.post(data=..., files=...)``
+    but the file is read from disk in ``CHUNK_SIZE`` blocks as it is sent instead of
+    being loaded into memory. The total length is known in advance so requests sends
+    a ``Content-Length`` header rather than a chunked body.
+
+    Parameters
+    ----------
+    fields : dict
+        The form fields to send before the file. Fields with a value of None are skipped.
+    file_field : str
+        The form field name of the file (e.g. image_upload).
+    file_path : str
+        The path to the file to upload.
+    boundary : str, optional
+        The multipart boundary, by default a random one is generated.
+    """
+    def __init__(self, fields, file_field, file_path, boundary=None):
+        self.boundary = boundary or uuid.uuid4().hex
+        self.content_type = f"multipart/form-data; boundary={self.boundary}"
+        self.file_path = file_path
+
+        head = b""
+        for name, value in fields.items():
+            if value is None:
+                continue
+            head += f'--{self.boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n'.encode("utf-8")
+            head += str(value).encode("utf-8") + b"\r\n"
+        filename = os.path.basename(file_path)
+        head += f'--{self.boundary}\r\nContent-Disposition: form-data; name="{file_field}"; filename="{filename}"\r\n\r\n'.encode("utf-8")
+        tail = f"\r\n--{self.boundary}--\r\n".encode("utf-8")
+
+        self.len = len(head) + os.path.getsize(file_path) + len(tail)
+        self._head = head
+        self._tail = tail
+        self._parts = None
+
+    def __len__(self):
+        return self.len
+
+    def __iter__(self):
+        while True:
+            chunk = self.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
+    def read(self, size=-1):
+        """Return up to `size` bytes of the body (all remaining bytes if `size` is negative)."""
+        if self._parts is None:
+            self._parts = [io.BytesIO(self._head), open(self.file_path, "rb"), io.BytesIO(self._tail)]
+        if size is None or size < 0:
+            size = self.len
+        data = b""
+        while self._parts and len(data) < size:
+            chunk = self._parts[0].read(size - len(data))
+            if chunk:
+                data += chunk
+            else:
+                self._parts.pop(0).close()
+        return data
+
+    def close(self):
+        if self._parts is not None:
+            for part in self._parts:
+                part.close()
+            self._parts = []
+
+
+def upload_file(
+        session,
+        url,
+        fields,
+        file_field,
+        file_path,
+        retries=3,
+        backoff_factor=1,
+        logger=None,
+    ):
+    """Post a file to a REST upload URL as a streamed multipart body.
+
+    The whole upload is re-sent if the connection drops or the server responds with
+    one of the `RETRY_STATUSES`.
+
+    Parameters
+    ----------
+    session : requests.Session
+        The session to post with (normally from `GraphQLClient.get_rest_session`).
+    url : str
+        The REST upload URL.
+    fields : dict
+        The form fields to send with the file.
+    file_field : str
+        The form field name of the file.
+    file_path : str
+        The path to the file to upload.
+    retries : int, optional
+        The number of times to re-send a failed upload, by default 3
+    backoff_factor : float, optional
+        Sleep for backoff_factor * 2 ** attempt seconds between attempts, by default 1
+    logger : logging.Logger, optional
+        The logger to report retries to, by default the module logger.
+
+    Returns
+    -------
+    client_response:
+        The response of the last attempt.
+    """
+    def send():
+        encoder = MultipartFileEncoder(fields, file_field, file_path)
+        try:
+            return session.post(
+                url,
+                data=encoder,
+                headers={"Content-Type": encoder.content_type},
+                timeout=(30, 3700),
+            )
+        finally:
+            encoder.close()
+
+    return send_with_retries(send, f"Upload of {file_path}", retries, backoff_factor, logger)
+
+
+def send_with_retries(send, description, retries=3, backoff_factor=1, logger=None):
+    """Call `send` until it returns a response that is not in `RETRY_STATUSES`.
+
+    Parameters
+    ----------
+    send : callable
+        Sends the request and returns the response.
+    description : str
+        Describes the request in the retry log messages.
+    retries : int, optional
+        The number of times to re-send a failed request, by default 3
+    backoff_factor : float, optional
+        Sleep for backoff_factor * 2 ** attempt seconds between attempts, by default 1
+    logger : logging.Logger, optional
+        The logger to report retries to, by default the module logger.
+
+    Returns
+    -------
+    client_response:
+        The response of the last attempt.
+    """
+    if logger is None:
+        logger = logging.getLogger(__name__)
+
+    for attempt in range(retries + 1):
+        try:
+            response = send()
+        except requests.exceptions.ConnectionError as e:
+            if attempt == retries:
+                raise
+            logger.warning(f"{description} failed ({e}), retrying")
+        else:
+            if response.status_code not in RETRY_STATUSES or attempt == retries:
+                return response
+            logger.warning(f"{description} returned status_code={response.status_code}, retrying")
+        time.sleep(backoff_factor * 2 ** attempt)
+
+
+def file_sha256(file_path):
+    """Return the hex SHA-256 digest of a file, read in `CHUNK_SIZE` blocks."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cached_upload_response(upload_id):
+    """Return a response that looks like the REST API's reply for an already uploaded file."""
+    response = requests.models.Response()
+    response.status_code = 200
+    response._content = json.dumps({
+        "text": f"Identical file already uploaded with id: {upload_id}",
+        "success": True,
+        "created": False,
+        "errors": None,
+        "id": upload_id,
+    }).encode("utf-8")
+    return response
+
+
+class UploadIndex:
+    """Local index of files that have already been uploaded to a REST endpoint.
+
+    Uploads are keyed on the upload URL, the form fields and the SHA-256 of the file
+    contents so an identical file is only skipped when it would create the same
+    database object.
+
+    Parameters
+    ----------
+    path : str, optional
+        The location of the SQLite index, by default `UPLOAD_INDEX`.
+    """
+    def __init__(self, path=None):
+        self.path = path or UPLOAD_INDEX
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("CREATE TABLE IF NOT EXISTS uploads (key TEXT PRIMARY KEY, upload_id TEXT NOT NULL)")
+        finally:
+            conn.close()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    @staticmethod
+    def key(url, fields, digest):
+        return f"{url}|{json.dumps(fields, sort_keys=True, default=str)}|{digest}"
+
+    def lookup(self, url, fields, digest):
+        """Return the ID of a previous identical upload or None."""
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT upload_id FROM uploads WHERE key = ?", (self.key(url, fields, digest),)).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            return None
+        return json.loads(row[0])
+
+    def record(self, url, fields, digest, response):
+        """Record a successful upload response so the file is not uploaded again."""
+        if response.status_code not in (200, 201):
+            return
+        try:
+            upload_id = json.loads(response.content).get("id")
+        except (ValueError, AttributeError):
+            return
+        if upload_id is None:
+            return
+        self.add(url, fields, digest, upload_id)
+
+    def add(self, url, fields, digest, upload_id):
+        """Record the ID of an object that was created from the fields and content digest."""
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO uploads (key, upload_id) VALUES (?, ?)",
+                    (self.key(url, fields, digest), json.dumps(upload_id)),
+                )
+        finally:
+            conn.close()
+
+
+class ChunkedUploader:
+    """Upload files to the REST API in parts so an interrupted upload can be resumed.
+
+    The protocol on the ``upload/chunked/`` path is:
+
+    1. ``POST chunked/`` with the file name, size, SHA-256 and part size. The server replies
+       with an ``upload_id`` and the byte offsets of the parts it has already ``received`` for
+       that file, so an upload that was interrupted carries on from where it stopped.
+    2. ``PUT chunked/<upload_id>/`` for each missing part with a ``Content-Range`` header giving
+       its byte range. Parts are independent so they are sent in parallel and retried on their own.
+    3. ``POST`` the form fields and ``chunked_upload_id`` to the normal upload URL
+       (e.g. ``template/``), which assembles the parts, checks the SHA-256 and creates the object.
+
+    Parameters
+    ----------
+    client : GraphQLClient
+        GraphQLClient class instance with the URL and Token already set.
+    chunk_size : int, optional
+        The size of each part in bytes, by default `CHUNKED_UPLOAD_SIZE`
+    max_workers : int, optional
+        The maximum number of parts uploaded at once, by default 4
+    retries : int, optional
+        The number of times to re-send a failed request, by default 3
+    backoff_factor : float, optional
+        Sleep for backoff_factor * 2 ** attempt seconds between attempts, by default 1
+    logger : logging.Logger, optional
+        The logger to report progress to, by default the module logger.
+    """
+    def __init__(
+            self,
+            client,
+            chunk_size=CHUNKED_UPLOAD_SIZE,
+            max_workers=4,
+            retries=3,
+            backoff_factor=1,
+            logger=None,
+        ):
+        self.session = client.get_rest_session(pool_size=max_workers)
+        self.rest_api_url = client.rest_api_url
+        self.chunk_size = int(chunk_size)
+        self.max_workers = max_workers
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        if logger is None:
+            self.logger = logging.getLogger(__name__)
+        else:
+            self.logger = logger
+
+    def _send(self, send, description):
+        return send_with_retries(send, description, self.retries, self.backoff_factor, self.logger)
+
+    def start(self, file_path, digest):
+        """Start (or resume) an upload and return the response containing the upload_id and received offsets."""
+        payload = {
+            "filename": os.path.basename(file_path),
+            "size": os.path.getsize(file_path),
+            "sha256": digest,
+            "chunk_size": self.chunk_size,
+        }
+        return self._send(
+            lambda: self.session.post(f"{self.rest_api_url}chunked/", json=payload, timeout=(30, 3700)),
+            f"Starting chunked upload of {file_path}",
+        )
+
+    def upload_part(self, upload_id, file_path, offset):
+        """Upload the part of the file starting at `offset`."""
+        size = os.path.getsize(file_path)
+        with open(file_path, "rb") as f:
+            f.seek(offset)
+            data = f.read(self.chunk_size)
+        headers = {
+            "Content-Type": "application/octet-stream",
+            "Content-Range": f"bytes {offset}-{offset + len(data) - 1}/{size}",
+        }
+        return self._send(
+            lambda: self.session.put(f"{self.rest_api_url}chunked/{upload_id}/", data=data, headers=headers, timeout=(30, 3700)),
+            f"Upload of {file_path} part at offset {offset}",
+        )
+
+    def upload(self, url, fields, file_path):
+        """Upload `file_path` in parts then create the database object by posting `fields` to `url`.
+
+        Parameters
+        ----------
+        url : str
+            The REST upload URL of the object (e.g. the template/ URL).
+        fields : dict
+            The form fields used to create the object.
+        file_path : str
+            The path to the file to upload.
+
+        Returns
+        -------
+        client_response:
+            The response of the final request, or of the first request that failed.
+        """
+        digest = file_sha256(file_path)
+        response = self.start(file_path, digest)
+        if response.status_code not in (200, 201):
+            self.logger.error(f"Could not start chunked upload of {file_path}: status_code={response.status_code}")
+            return response
+        content = json.loads(response.content)
+        upload_id = content["upload_id"]
+        received = set(content.get("received") or [])
+
+        offsets = [
+            offset
+            for offset in range(0, os.path.getsize(file_path), self.chunk_size)
+            if offset not in received
+        ]
+        self.logger.debug(f"Uploading {len(offsets)} parts of {file_path} ({len(received)} already received)")
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            part_responses = list(executor.map(lambda offset: self.upload_part(upload_id, file_path, offset), offsets))
+        for part_response in part_responses:
+            if part_response.status_code not in (200, 201):
+                self.logger.error(f"Chunked upload of {file_path} failed: status_code={part_response.status_code}")
+                return part_response
+
+        data = dict(fields)
+        data["chunked_upload_id"] = upload_id
+        return self._send(
+            lambda: self.session.post(url, data=data, timeout=(30, 3700)),
+            f"Completing chunked upload of {file_path}",
+        )
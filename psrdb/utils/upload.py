@@ -1,32 +1,166 @@
+import os
+import tempfile
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
 
-import shlex
+try:
+    import psrchive as psr
+except ImportError:
+    # Without psrchive only PSRFITS files can be read (see psrdb.utils.psrfits)
+    psr = None
 
-import subprocess
+from psrdb.utils.ephemeris import archive_ephemeris_text
+from psrdb.utils.psrfits import PSRFITSError, read_psrfits_length, read_psrfits_ephemeris, read_psrfits_metadata
 
-import psrchive as psr
+
+def load_archive(archive):
+    """Load an archive with psrchive."""
+    if psr is None:
+        raise RuntimeError(f"psrchive is required to read {archive} as it could not be read as a PSRFITS file")
+    return psr.Archive_load(archive)
 
 
 def generate_obs_length(archive):
     """
     Determine the length of the observation from the input archive file
+
+    PSRFITS files are read directly and other formats are loaded with psrchive.
     """
+    try:
+        return read_psrfits_length(archive)
+    except PSRFITSError:
+        pass
 
-    ar = psr.Archive_load(archive)
-    ar = ar.total()
-    return ar.get_first_Integration().get_duration()
+    ar = load_archive(archive)
+    # Sum of the sub-integration durations, avoids making a time scrunched copy of the data with total()
+    return ar.integration_length()
 
 
-def get_archive_ephemeris(freq_summed_archive):
+def get_archive_ephemeris(freq_summed_archive, disk_cache=False):
     """
-    Get the ephemeris from the archive file using the vap command.
+    Get the ephemeris from the PSRPARAM table of a PSRFITS archive file or else using the vap command.
+    The vap output is cached on the archive's path, modification time and size (see `archive_ephemeris_text`).
     """
-    comm = "vap -E {0}".format(freq_summed_archive)
-    args = shlex.split(comm)
-    proc = subprocess.Popen(args,stdout=subprocess.PIPE)
-    proc.wait()
-    ephemeris_text = proc.stdout.read().decode("utf-8")
+    try:
+        ephemeris_text = read_psrfits_ephemeris(freq_summed_archive)
+    except PSRFITSError:
+        ephemeris_text = None
+    if ephemeris_text is None:
+        ephemeris_text = archive_ephemeris_text(freq_summed_archive, disk_cache=disk_cache)
 
     if ephemeris_text.startswith('\n'):
         # Remove newline character at start of output
         ephemeris_text = ephemeris_text.lstrip('\n')
-    return ephemeris_text
\ No newline at end of file
+    return ephemeris_text
+
+
+def loaded_archive_ephemeris(ar):
+    """
+    Return the ephemeris text of an archive loaded with psrchive, or None if it can't be unloaded
+
+    The ephemeris is unloaded to a temporary file in the same format as the output of `vap -E`.
+    """
+    try:
+        ephemeris = ar.get_ephemeris()
+        if ephemeris is None:
+            return None
+        with tempfile.TemporaryDirectory() as temp_dir:
+            par_path = os.path.join(temp_dir, "ephemeris.par")
+            ephemeris.unload(par_path)
+            with open(par_path, "r") as f:
+                ephemeris_text = f.read()
+    except (AttributeError, RuntimeError, OSError):
+        return None
+    return ephemeris_text.lstrip('\n') or None
+
+
+def get_archive_metadata(archive, disk_cache=False):
+    """
+    Extract the observation length, ephemeris and header information of an archive file in one pass
+
+    PSRFITS files are read directly without decoding their data. Other formats are only loaded
+    once with psrchive for the length, header information and ephemeris. The (cached) vap output
+    is only used, as a second pass over the file, if the loaded archive's ephemeris can't be unloaded.
+
+    Parameters
+    ----------
+    archive : str
+        The path to the archive file.
+    disk_cache : bool, optional
+        Cache the vap output on disk, by default False
+
+    Returns
+    -------
+    dict
+        The archive path, source, telescope, frequency, bandwidth, nsubint, nchan, npol,
+        nbin, length (s) and ephemeris text.
+    """
+    try:
+        metadata = read_psrfits_metadata(archive)
+    except PSRFITSError:
+        metadata = None
+    if metadata is not None and metadata["ephemeris"] is not None:
+        return metadata
+
+    ar = load_archive(archive)
+    ephemeris_text = loaded_archive_ephemeris(ar)
+    if ephemeris_text is None:
+        ephemeris_text = get_archive_ephemeris(archive, disk_cache=disk_cache)
+    return {
+        "archive": archive,
+        "source": ar.get_source(),
+        "telescope": ar.get_telescope(),
+        "frequency": ar.get_centre_frequency(),
+        "bandwidth": ar.get_bandwidth(),
+        "nsubint": ar.get_nsubint(),
+        "nchan": ar.get_nchan(),
+        "npol": ar.get_npol(),
+        "nbin": ar.get_nbin(),
+        "length": ar.integration_length(),
+        "ephemeris": ephemeris_text,
+    }
+
+
+class ArchiveMetadataPool:
+    """
+    A reusable pool of worker processes that run `get_archive_metadata`
+
+    The workers stay alive between calls so psrchive is only imported once
+    per worker when generating metadata for many archives.
+
+    Parameters
+    ----------
+    processes : int, optional
+        The number of worker processes, by default the number of CPUs.
+    disk_cache : bool, optional
+        Cache the vap output on disk, by default False
+    initializer : callable, optional
+        Called with `initargs` in each worker when it starts, e.g. to load state shared by the
+        functions passed to `run`, by default None
+    initargs : tuple, optional
+        The arguments of `initializer`, by default ()
+    """
+    def __init__(self, processes=None, disk_cache=False, initializer=None, initargs=()):
+        self.executor = ProcessPoolExecutor(max_workers=processes, initializer=initializer, initargs=initargs)
+        self.disk_cache = disk_cache
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def submit(self, archive):
+        """Return a future for the metadata of a single archive."""
+        return self.executor.submit(get_archive_metadata, archive, self.disk_cache)
+
+    def run(self, function, *args, **kwargs):
+        """Return a future for a function run in a worker, e.g. one that calls `get_archive_metadata` on its archives."""
+        return self.executor.submit(function, *args, **kwargs)
+
+    def map(self, archives):
+        """Return the metadata of each archive in the same order as `archives`."""
+        return list(self.executor.map(partial(get_archive_metadata, disk_cache=self.disk_cache), archives))
+
+    def close(self):
+        self.executor.shutdown()
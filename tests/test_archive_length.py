@@ -0,0 +1,42 @@
+import subprocess
+from unittest.mock import patch
+
+from psrdb.utils.archive_length import get_archive_lengths, get_sf_length
+
+
+def fake_vap(lengths, calls):
+    def run(args, **kwargs):
+        files = args[3:]
+        calls.append(files)
+        # vap reports unreadable files on stderr and leaves them out of the table
+        lines = ["filename length"] + [f"{f} {lengths[f]}" for f in files if f in lengths]
+        return subprocess.CompletedProcess(args, 0, stdout="\n".join(lines) + "\n")
+    return run
+
+
+def test_get_archive_lengths_cached(tmp_path):
+    sf_files = []
+    for i in range(10):
+        sf_file = tmp_path / f"{i:04d}.sf"
+        sf_file.write_bytes(b"0" * (i + 1))
+        sf_files.append(str(sf_file))
+    lengths = {sf_file: 10.0 + i for i, sf_file in enumerate(sf_files[:-1])}
+
+    calls = []
+    with patch("psrdb.utils.archive_length.LENGTH_CACHE", str(tmp_path / "length.sqlite3")), \
+            patch("psrdb.utils.archive_length.subprocess.run", side_effect=fake_vap(lengths, calls)):
+        assert get_archive_lengths(sf_files, max_workers=3, chunk_size=4) == lengths
+        assert sorted(len(files) for files in calls) == [2, 4, 4]
+
+        # Only the file that vap could not measure is measured again
+        calls.clear()
+        assert get_sf_length(sf_files) == sum(lengths.values())
+        assert calls == [[sf_files[-1]]]
+
+        # A modified file is measured again
+        calls.clear()
+        lengths[sf_files[0]] = 8.0
+        with open(sf_files[0], "ab") as f:
+            f.write(b"more data")
+        assert get_sf_length(sf_files[:3]) == 8.0 + 11.0 + 12.0
+        assert calls == [[sf_files[0]]]
@@ -0,0 +1,54 @@
+import os
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+from psrdb.load_data import MOLONGLO_CALIBRATIONS
+from psrdb.utils.calibration import CalibrationIndex
+
+
+def linear_phasing_lookup(utc_start_dt):
+    # The original line by line scan of the phasing file
+    utc_start_dt = utc_start_dt.replace(tzinfo=timezone.utc)
+    calibration = None
+    with open(MOLONGLO_CALIBRATIONS) as f:
+        for line in f.readlines():
+            if line[0] == '#':
+                continue
+            date = datetime.strptime(line.split(' ')[0], '%Y-%m-%d').replace(tzinfo=timezone.utc)
+            if (date - utc_start_dt).total_seconds() > 0:
+                break
+            calibration = line.split(' ')[1].strip()
+    return calibration
+
+
+def test_phasing_file_index(tmp_path):
+    with patch("psrdb.utils.calibration.CALIBRATION_CACHE_DIR", str(tmp_path)):
+        index = CalibrationIndex.from_phasing_file(MOLONGLO_CALIBRATIONS)
+        # Loaded from the disk cache the second time
+        assert CalibrationIndex.from_phasing_file(MOLONGLO_CALIBRATIONS).locations == index.locations
+    assert len(os.listdir(tmp_path)) == 1
+
+    utc_start_dt = datetime(2021, 1, 18, 12)
+    while utc_start_dt < datetime(2025, 1, 1):
+        assert index.at_or_before(utc_start_dt) == linear_phasing_lookup(utc_start_dt)
+        utc_start_dt += timedelta(days=3, hours=7)
+
+
+def test_directory_index(tmp_path):
+    cal_dir = tmp_path / "calibrations"
+    cal_dir.mkdir()
+    for epoch in ["2019-01-01-00:00:00", "2019-06-01-12:00:00", "2020-01-01-00:00:00"]:
+        (cal_dir / f"{epoch}.jones").write_text("")
+
+    with patch("psrdb.utils.calibration.CALIBRATION_CACHE_DIR", str(tmp_path / "cache")):
+        index = CalibrationIndex.from_directory(str(cal_dir))
+        assert index.before(datetime(2018, 12, 31)) is None
+        assert index.before(datetime(2019, 6, 1, 12)) == str(cal_dir / "2019-01-01-00:00:00.jones")
+        assert index.before(datetime(2019, 6, 1, 12, 0, 1)) == str(cal_dir / "2019-06-01-12:00:00.jones")
+        assert index.before(datetime(2020, 3, 1)) == str(cal_dir / "2020-01-01-00:00:00.jones")
+
+        # Adding a calibration file invalidates the cached index
+        (cal_dir / "2020-02-01-00:00:00.jones").write_text("")
+        os.utime(cal_dir, ns=(0, os.stat(cal_dir).st_mtime_ns + 1))
+        index = CalibrationIndex.from_directory(str(cal_dir))
+        assert index.before(datetime(2020, 3, 1)) == str(cal_dir / "2020-02-01-00:00:00.jones")
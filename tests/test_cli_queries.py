@@ -1,7 +1,13 @@
+import sys
 import json
+import base64
 import pytest
 
+from psrdb.graphql_table import PageSizePlanner, filter_nodes, select_fields
+from psrdb.tables.observation import Observation
 from psrdb.tables.pulsar import Pulsar
+from psrdb.tables.pulsar_fold_result import PulsarFoldResult
+from psrdb.tables.toa import Toa
 from psrdb.utils.other import to_camel_case
 
 
@@ -29,4 +35,323 @@ def test_pulsar_response_parse(capsys):
 
         # Assert against the captured output
         captured = capsys.readouterr()
-        assert captured.out == "1\n"
\ No newline at end of file
+        assert captured.out == "1\n"
+
+class MockClient:
+    """Records the queries and returns the nodes on a single page."""
+
+    def __init__(self, table_name, nodes):
+        self.table_name = table_name
+        self.nodes = nodes
+        self.queries = []
+        self.variables = []
+
+    def post(self, payload):
+        self.queries.append(payload["query"])
+        self.variables.append(json.loads(payload["variables"]))
+        return MockResponse({"data": {to_camel_case(self.table_name): {
+            "pageInfo": {"hasNextPage": False, "endCursor": None},
+            "edges": [{"node": node} for node in self.nodes],
+        }}})
+
+
+def test_select_fields():
+    field_names = ["id", "pulsar { name }", "calibration { id }", "calibration { location }", "utcStart"]
+    assert select_fields(field_names, None) == field_names
+    assert select_fields(field_names, ["utcStart", "pulsar.name"]) == ["utcStart", "pulsar { name }"]
+    assert select_fields(field_names, "id,pulsar_name") == ["id", "pulsar { name }"]
+    assert select_fields(field_names, ["calibration"]) == ["calibration { id }", "calibration { location }"]
+    with pytest.raises(RuntimeError):
+        select_fields(field_names, ["beam"])
+
+
+def test_list_fields():
+    client = MockClient("observation", [{"utcStart": "2020-01-01T00:00:00+00:00", "beam": 1}])
+    observation = Observation(client)
+    observation.get_dicts = True
+    assert observation.list(fields=["utcStart", "beam"]) == client.nodes
+    assert "utcStart" in client.queries[0] and "beam" in client.queries[0]
+    assert "pulsar" not in client.queries[0] and "foldNbin" not in client.queries[0]
+
+
+def test_download_fields(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    client = MockClient("pulsar_fold_result", [{"observation": {"utcStart": "2020-01-01T00:00:00+00:00"}, "pipelineRun": {"dm": 2.64}}])
+    pulsar_fold_result = PulsarFoldResult(client)
+    # The same as --fields on the command line
+    pulsar_fold_result.set_fields("observation.utcStart,pipelineRun.dm")
+    output_name = pulsar_fold_result.download("J0437-4715")
+    with open(output_name) as f:
+        assert f.read() == "UTC Start,DM (pc cm^-3)\n2020-01-01T00:00:00+00:00,2.64\n"
+    assert "sn" not in client.queries[0]
+
+
+def test_observation_download_filters(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    client = MockClient("observation", [])
+    filters = dict(pulsar_name=["J0437-4715"], main_project="MeerTIME", utcs="2023-01-01-00:00:00", unprocessed=True)
+    Observation(client).download(**filters)
+    Observation(client).list(**filters)
+    # Download queries with the same filters as list
+    assert client.variables[0] == client.variables[1]
+    assert client.variables[0]["utcStartGte"] == "2023-01-01T00:00:00+00:00"
+
+
+class MockBatchClient:
+    """Serves two pages of observations per pulsar and fails requests with more than `max_aliases` queries."""
+
+    def __init__(self, max_aliases):
+        self.max_aliases = max_aliases
+        self.batch_sizes = []
+
+    def post(self, payload):
+        variables = json.loads(payload["variables"])
+        aliases = sorted({name.split("_")[0] for name in variables})
+        self.batch_sizes.append(len(aliases))
+        if len(aliases) > self.max_aliases:
+            response = MockResponse({"errors": [{"message": "Query too large"}]})
+            response.status_code = 400
+            return response
+        data = {}
+        for alias in aliases:
+            pulsar = variables[f"{alias}_pulsar_Name"][0]
+            page = 1 if f"{alias}_after" in variables else 0
+            data[alias] = {
+                "pageInfo": {"hasNextPage": page == 0, "endCursor": "cursor" if page == 0 else None},
+                "edges": [{"node": {"pulsar": {"name": pulsar}, "beam": page}}],
+            }
+        return MockResponse({"data": data})
+
+
+def test_list_by_pulsar():
+    pulsars = [f"J0000-00{i:02d}" for i in range(5)]
+    client = MockBatchClient(max_aliases=2)
+    obs = Observation(client)
+    obs.get_dicts = True
+    results = obs.list_by_pulsar(pulsars, fields=["pulsar.name", "beam"], batch_size=4)
+
+    assert list(results) == pulsars
+    for pulsar in pulsars:
+        assert results[pulsar] == [
+            {"pulsar": {"name": pulsar}, "beam": 0},
+            {"pulsar": {"name": pulsar}, "beam": 1},
+        ]
+    # The first batch of 4 is split in half and later batches are no larger than 2
+    assert client.batch_sizes[:3] == [4, 2, 2]
+    assert max(client.batch_sizes[3:]) == 2
+
+    # A query that fails on its own raises rather than returning partial results
+    with pytest.raises(RuntimeError, match="failed"):
+        Observation(MockBatchClient(max_aliases=0)).list_by_pulsar(pulsars, fields=["pulsar.name"], batch_size=4)
+
+
+def test_filter_nodes():
+    nodes = [
+        {"id": "1", "pipelineRun": {"sn": 5.0}},
+        {"id": "2", "pipelineRun": {"sn": 50.0}},
+        {"id": "3", "pipelineRun": None},
+        {"id": "4", "pipelineRun": {"sn": None}},
+    ]
+    assert filter_nodes(nodes, []) == nodes
+    assert [node["id"] for node in filter_nodes(nodes, [("pipelineRun.sn", "gte", 10)])] == ["2"]
+    assert [node["id"] for node in filter_nodes(nodes, [("pipelineRun.sn", "lte", 10)])] == ["1"]
+    assert [node["id"] for node in filter_nodes(nodes, [("id", "in", ["1", "3"])])] == ["1", "3"]
+    assert [node["id"] for node in filter_nodes(nodes, [("id", "eq", "4")])] == ["4"]
+
+
+def test_client_side_filters():
+    client = MockClient("toa", [
+        {"archive": "a.ar", "snr": 5.0},
+        {"archive": "b.ar", "snr": 50.0},
+    ])
+    toa = Toa(client)
+    toa.get_dicts = True
+    nodes = toa.list(pulsar="J0437-4715", utcs="2020-01-01-00:00:00", min_snr=10, fields=["archive"])
+
+    assert nodes == [{"archive": "b.ar", "snr": 50.0}]
+    query = client.queries[0]
+    # The S/N filter is evaluated client side so its field is queried instead of the filter
+    assert "snrGte" not in query
+    assert "snr" in query
+    assert "utcStartGte" in query
+
+    with pytest.raises(RuntimeError):
+        toa.plan_filters([{"field": "unknownFilter", "value": 1}])
+
+
+def test_page_size_planner():
+    # Thin nodes get large pages and wide nodes get small pages
+    thin = PageSizePlanner(["name"], target_bytes=100000)
+    wide = PageSizePlanner([f"field{i}" for i in range(50)], target_bytes=100000)
+    assert thin.page_size > wide.page_size
+    assert PageSizePlanner(["name"], target_bytes=10**9).page_size == 10000
+
+    planner = PageSizePlanner(["id", "name"], target_bytes=100000, time_budget=10)
+    first = planner.page_size
+    # Nodes that are much larger than estimated shrink the next page
+    assert planner.update(first, first * 1000, 0.1) < first
+    # Slow pages are limited by the time budget
+    assert planner.update(100, 1000, 5) <= 2 * 10 / (5 / 100)
+    # Pages don't grow by more than MAX_GROWTH at a time
+    size = planner.page_size
+    assert planner.update(size, size, 0.001) <= size * PageSizePlanner.MAX_GROWTH
+
+
+def test_toa_download_formats(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    client = MockClient("toa", [{"archive": "a.ar", "freqMhz": 1284.0, "mjd": "59945.500000000001", "mjdErr": 1.5, "telescope": "meerkat", "snr": 50.0}])
+    toa = Toa(client)
+    toa.set_fields("archive,snr")
+    output_name = toa.download("J0437-4715", project_short="PTA", format="csv")
+    assert output_name == "toa_J0437-4715_PTA.csv"
+    with open(output_name) as f:
+        assert f.read() == "archive,mjd,telescope,snr,freq_MHz,mjd_err\na.ar,59945.500000000001,meerkat,50.0,1284.0,1.5\n"
+
+    # Without pyarrow the columnar formats point at the extra that installs it
+    with monkeypatch.context() as m:
+        m.setitem(sys.modules, "pyarrow", None)
+        with pytest.raises(RuntimeError, match=r"psrdb\[columnar\]"):
+            toa.download("J0437-4715", project_short="PTA", format="feather")
+
+    pq = pytest.importorskip("pyarrow.parquet")
+    output_name = toa.download("J0437-4715", project_short="PTA", format="parquet")
+    table = pq.read_table(output_name)
+    assert table.column("snr").to_pylist() == [50.0]
+    assert table.column("mjd").to_pylist() == ["59945.500000000001"]
+
+
+def test_toa_download_binary(tmp_path, monkeypatch):
+    from psrdb.utils.binary_toa import BinaryTOAs
+
+    monkeypatch.chdir(tmp_path)
+    client = MockClient("toa", [{"archive": "a.ar", "freqMhz": 1284.0, "mjd": "59945.500000000001", "mjdErr": 1.5, "telescope": "meerkat", "snr": 50.0}])
+    toa = Toa(client)
+    toa.set_fields("archive,snr")
+    output_name = toa.download("J0437-4715", project_short="PTA", format="binary")
+    toas = BinaryTOAs(output_name)
+    assert list(toas["snr"]) == [50.0]
+    assert [str(toa_dict["mjd"]) for toa_dict in toas.toa_dicts()] == ["59945.500000000001"]
+
+
+class MockPulsarClient:
+    """Lists the pulsars and records the create mutations."""
+
+    def __init__(self, names):
+        self.graphql_url = f"mock-{id(self)}"
+        self.names = names
+        self.queries = []
+        self.created = []
+        self.errors = None
+
+    def post(self, payload):
+        self.queries.append(payload["query"])
+        if "createPulsar" in payload["query"]:
+            self.created.append(json.loads(payload["variables"]))
+            if self.errors:
+                return MockResponse({"errors": self.errors, "data": {"createPulsar": None}})
+            return MockResponse({"data": {"createPulsar": {"pulsar": {"id": "1"}}}})
+        return MockResponse({"data": {"pulsar": {
+            "pageInfo": {"hasNextPage": False, "endCursor": None},
+            "edges": [{"node": {"name": name}} for name in self.names],
+        }}})
+
+
+def test_pulsar_create_if_missing():
+    client = MockPulsarClient(["J0437-4715", "J1909-3744"])
+    pulsar = Pulsar(client)
+    assert not pulsar.create_if_missing("J0437-4715")
+    assert pulsar.create_if_missing("J1713+0747")
+    # The new pulsar is created without generating a description
+    assert client.created == [{"name": "J1713+0747", "comment": None}]
+    # The names were only listed once and include the created pulsar
+    assert not Pulsar(client).create_if_missing("J1713+0747")
+    assert not pulsar.create_if_missing("J1909-3744")
+    assert len(client.queries) == 2
+
+    # Pulsars that failed to be created are tried again
+    client.errors = [{"message": "failed"}]
+    assert pulsar.create_if_missing("J2145-0750")
+    client.errors = None
+    assert pulsar.create_if_missing("J2145-0750")
+    assert not pulsar.create_if_missing("J2145-0750")
+    assert [created["name"] for created in client.created] == ["J1713+0747", "J2145-0750", "J2145-0750"]
+
+
+def test_pulsar_create_describe(monkeypatch):
+    import psrdb.tables.pulsar as pulsar_module
+
+    monkeypatch.setattr(pulsar_module, "describe_pulsars", lambda names: {name: f"PSR {name}" for name in names})
+    client = MockPulsarClient([])
+    parser = Pulsar.get_parsers()
+    Pulsar(client).process(parser.parse_args(["create", "J0437-4715"]))
+    Pulsar(client).process(parser.parse_args(["create", "J1909-3744", "--describe"]))
+    assert client.created == [{"name": "J0437-4715", "comment": None}, {"name": "J1909-3744", "comment": "PSR J1909-3744"}]
+
+
+def test_pulsar_update_undescribed(monkeypatch):
+    import psrdb.tables.pulsar as pulsar_module
+
+    monkeypatch.setattr(pulsar_module, "describe_pulsars", lambda names: {})
+    client = MockPulsarClient([])
+    # The existing description is kept rather than replaced with null
+    with pytest.raises(RuntimeError, match="ATNF"):
+        Pulsar(client).update(1, "J0000+0000", None)
+    assert client.queries == []
+
+
+class MockPulsarUpdateClient:
+    """Lists the pulsars and records the batched update mutations."""
+
+    def __init__(self, pulsars):
+        self.pulsars = pulsars
+        self.updates = []
+
+    def post(self, payload):
+        variables = json.loads(payload["variables"])
+        if payload["query"].startswith("mutation"):
+            aliases = sorted({key.split("_")[0] for key in variables})
+            self.updates.append({alias: (variables[f"{alias}_id"], variables[f"{alias}_name"], variables[f"{alias}_comment"]) for alias in aliases})
+            return MockResponse({"data": {alias: {"pulsar": {"id": str(variables[f"{alias}_id"])}} for alias in aliases}})
+        return MockResponse({"data": {"pulsar": {
+            "pageInfo": {"hasNextPage": False, "endCursor": None},
+            "edges": [{"node": node} for node in self.pulsars],
+        }}})
+
+
+def test_pulsar_refresh_descriptions(monkeypatch):
+    import psrdb.tables.pulsar as pulsar_module
+
+    def pulsar_node(id, name, comment):
+        return {"id": base64.b64encode(f"PulsarNode:{id}".encode()).decode(), "name": name, "comment": comment}
+
+    client = MockPulsarUpdateClient([
+        pulsar_node(1, "J0437-4715", "PSR J0437-4715 is a millisecond pulsar."),
+        pulsar_node(2, "J1909-3744", "Old description"),
+        pulsar_node(3, "J1402-5124", None),
+        pulsar_node(4, "searchbeamUH", None),
+        pulsar_node(5, "J1713+0747", None),
+    ])
+    described = []
+
+    def describe_pulsars(names, query=None):
+        described.append(set(names))
+        return {name: f"PSR {name} is a millisecond pulsar." for name in names if name.startswith("J")}
+
+    monkeypatch.setattr(pulsar_module, "describe_pulsars", describe_pulsars)
+    pulsar = Pulsar(client)
+    assert pulsar.refresh_descriptions(batch_size=2, max_workers=2) == 3
+    # All the pulsars are described in one pass, using their ATNF name
+    assert described == [{"J0437-4715", "J1909-3744", "J1402-5021", "searchbeamUH", "J1713+0747"}]
+    # Only the changed descriptions are sent, in batches, without renaming the pulsars
+    assert len(client.updates) == 2
+    updates = sorted(update for batch in client.updates for update in batch.values())
+    assert updates == [
+        (2, "J1909-3744", "PSR J1909-3744 is a millisecond pulsar."),
+        (3, "J1402-5124", "PSR J1402-5021 is a millisecond pulsar."),
+        (5, "J1713+0747", "PSR J1713+0747 is a millisecond pulsar."),
+    ]
+
+    # Only the pulsars without a description
+    client.updates = []
+    assert pulsar.describe_missing(names=["J1909-3744", "J1713+0747"]) == 1
+    assert [list(batch.values()) for batch in client.updates] == [[(5, "J1713+0747", "PSR J1713+0747 is a millisecond pulsar.")]]
@@ -0,0 +1,44 @@
+import sys
+import subprocess
+from importlib import import_module
+
+from psrdb.scripts.psrdb import TABLE_COMMANDS
+
+
+# Modules that are slow to import and shouldn't be needed to start the CLI
+HEAVY_MODULES = ("requests", "pulsar_paragraph", "psrqpy", "astropy", "pandas", "numpy")
+
+STARTUP_CODE = """
+import sys
+from psrdb.scripts import psrdb
+sys.argv = ["psrdb"] + sys.argv[1:]
+try:
+    psrdb.main()
+except SystemExit:
+    pass
+print("heavy modules:", ",".join(m for m in {heavy} if m in sys.modules))
+"""
+
+
+def loaded_heavy_modules(*args):
+    result = subprocess.run(
+        [sys.executable, "-c", STARTUP_CODE.format(heavy=HEAVY_MODULES), *args],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return result.stdout.strip().splitlines()[-1][len("heavy modules:"):].strip()
+
+
+def test_table_commands():
+    # The registry matches the tables without importing them at startup
+    for name, module_name, class_name, description in TABLE_COMMANDS:
+        table_class = getattr(import_module(module_name), class_name)
+        assert table_class.get_name() == name
+        assert table_class.get_description() == description
+
+
+def test_startup_imports():
+    assert loaded_heavy_modules("--help") == ""
+    # Only the chosen table's module is imported
+    assert loaded_heavy_modules("toa", "list", "--help") == ""
@@ -0,0 +1,89 @@
+import json
+from unittest.mock import Mock, patch
+
+from psrdb.tables.ephemeris import Ephemeris
+from psrdb.utils.ephemeris import Ephemeris as ParsedEphemeris, archive_ephemeris_text, _archive_ephemeris_text
+from psrdb.utils.other import get_graphql_id
+
+
+class MockResponse:
+    def __init__(self, content):
+        self.content = json.dumps(content)
+        self.status_code = 200
+
+
+EPHEMERIS_TEXT = """PSRJ           J0437-4715
+F0             173.6879458121843  1  0.00000000000002
+DM             2.6469
+"""
+
+
+def test_ephemeris_create_deduplicate(tmp_path):
+    par_path = tmp_path / "J0437-4715.par"
+    par_path.write_text(EPHEMERIS_TEXT)
+    client = Mock()
+    client.graphql_url = "https://test.example.com/graphql/"
+    client.post.side_effect = [
+        # No matching ephemerisHash in the database
+        MockResponse({"data": {"ephemeris": {"pageInfo": {"hasNextPage": False, "endCursor": None}, "edges": []}}}),
+        MockResponse({"data": {"createEphemeris": {"ephemeris": {"id": "3"}}}}),
+    ]
+
+    ephemeris = Ephemeris(client)
+    with patch("psrdb.utils.rest_upload.UPLOAD_INDEX", str(tmp_path / "upload_index.sqlite3")):
+        responses = [ephemeris.create("J0437-4715", str(par_path), project_short="PTA", deduplicate=True) for _ in range(3)]
+
+    assert [get_graphql_id(response, "ephemeris", ephemeris.logger) for response in responses] == [3, 3, 3]
+    # The text was only sent once and the hash lookup matches what list uses
+    assert client.post.call_count == 2
+    variables = json.loads(client.post.call_args_list[0].args[0]["variables"])
+    ephemeris.get_dicts = True
+    client.post.side_effect = [MockResponse({"data": {"ephemeris": {"pageInfo": {"hasNextPage": False, "endCursor": None}, "edges": []}}})]
+    ephemeris.list(eph=json.dumps({
+        "PSRJ": {"val": "J0437-4715"},
+        "F0": {"val": "173.6879458121843", "err": "1 0.00000000000002"},
+        "DM": {"val": "2.6469"},
+    }))
+    assert json.loads(client.post.call_args.args[0]["variables"])["ephemerisHash"] == variables["ephemerisHash"]
+
+
+def test_ephemeris_find_by_hash_project():
+    client = Mock()
+    client.post.return_value = MockResponse({"data": {"ephemeris": {
+        "pageInfo": {"hasNextPage": False, "endCursor": None},
+        "edges": [
+            {"node": {"id": "RXBoZW1lcmlzTm9kZToy", "pulsar": {"name": "J0437-4715"}, "project": {"code": "SCI-1", "short": "TPA"}}},
+            {"node": {"id": "RXBoZW1lcmlzTm9kZToz", "pulsar": {"name": "J0437-4715"}, "project": {"code": "SCI-2", "short": "PTA"}}},
+        ],
+    }}})
+
+    ephemeris = Ephemeris(client)
+    assert ephemeris.find_by_hash("J0437-4715", "hash", project_short="PTA") == "RXBoZW1lcmlzTm9kZToz"
+    assert ephemeris.find_by_hash("J0437-4715", "hash", project_code="SCI-1") == "RXBoZW1lcmlzTm9kZToy"
+    # The same ephemeris of another project is not reused
+    assert ephemeris.find_by_hash("J0437-4715", "hash", project_short="RelBin") is None
+    assert ephemeris.find_by_hash("J0437-4715", "hash") is None
+
+
+def test_archive_ephemeris_text_cache(tmp_path):
+    archive = tmp_path / "freq.sum"
+    archive.write_bytes(b"archive")
+    vap = Mock(return_value=Mock(stdout=EPHEMERIS_TEXT.encode()))
+
+    with patch("psrdb.utils.ephemeris.subprocess.run", vap), \
+            patch("psrdb.utils.ephemeris.ARCHIVE_EPHEMERIS_CACHE_DIR", str(tmp_path / "cache")):
+        assert archive_ephemeris_text(str(archive), disk_cache=True) == EPHEMERIS_TEXT
+        assert archive_ephemeris_text(str(archive), disk_cache=True) == EPHEMERIS_TEXT
+        assert vap.call_count == 1
+
+        # A new process only has the disk cache
+        _archive_ephemeris_text.cache_clear()
+        eph = ParsedEphemeris(disk_cache=True)
+        eph.load_from_archive_as_str(str(archive))
+        assert vap.call_count == 1
+        assert eph.jname == "J0437-4715"
+
+        # Modifying the archive invalidates the cache
+        archive.write_bytes(b"reprocessed archive")
+        archive_ephemeris_text(str(archive), disk_cache=True)
+        assert vap.call_count == 2
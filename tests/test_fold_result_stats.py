@@ -0,0 +1,101 @@
+import json
+import numpy as np
+import pytest
+
+from psrdb.tables.pulsar_fold_result import PulsarFoldResult
+from psrdb.utils.fold_result_stats import (
+    binned_time_series,
+    group_stats,
+    rolling_median,
+    utc_to_mjd,
+)
+
+
+class MockResponse:
+    def __init__(self, content):
+        self.content = json.dumps(content)
+        self.status_code = 200
+
+
+class MockClient:
+    def __init__(self, pages):
+        self.pages = pages
+
+    def post(self, payload):
+        variables = json.loads(payload["variables"])
+        page = int(variables.get("after", 0))
+        nodes = self.pages[page]
+        return MockResponse({"data": {"pulsarFoldResult": {
+            "pageInfo": {"hasNextPage": page + 1 < len(self.pages), "endCursor": str(page + 1)},
+            "edges": [{"node": node} for node in nodes],
+        }}})
+
+
+def make_node(i, utc, band, dm, dm_err, sn):
+    return {
+        "id": f"id{i}",
+        "observation": {"utcStart": utc, "band": band, "duration": 256.0},
+        "pipelineRun": {
+            "id": str(i), "dm": dm, "dmErr": dm_err, "dmEpoch": 59000.0, "dmChi2r": 1.0, "dmTres": 1.0,
+            "sn": sn, "flux": 1.0, "rm": None, "rmErr": None, "percentRfiZapped": 0.1,
+        },
+    }
+
+
+def test_utc_to_mjd():
+    assert utc_to_mjd(["2020-01-01T00:00:00+00:00", "2020-01-02T12:00:00+00:00"]).tolist() == [58849.0, 58850.5]
+
+
+def test_pulsar_fold_result_columns():
+    pages = [
+        [make_node(0, "2020-01-02T12:00:00+00:00", "LBAND", 10.0, 0.1, 50.0)],
+        [make_node(1, "2020-01-01T00:00:00+00:00", "UHF", None, None, 40.0)],
+    ]
+    pfr = PulsarFoldResult(MockClient(pages))
+    columns = pfr.columns("J0437-4715")
+    # The columns are built page by page without keeping the nodes
+    assert not pfr.get_dicts
+    # Sorted by time with missing values as NaN
+    assert columns["id"].tolist() == ["id1", "id0"]
+    assert columns["band"].tolist() == ["UHF", "LBAND"]
+    assert columns["mjd"].tolist() == [58849.0, 58850.5]
+    assert np.isnan(columns["dm"][0]) and columns["dm"][1] == 10.0
+    assert np.isnan(columns["rm"]).all()
+
+
+def test_group_stats():
+    rng = np.random.default_rng(1)
+    bands = rng.choice(["LBAND", "UHF", "SBAND"], 200)
+    values = rng.normal(10, 2, 200)
+    values[::17] = np.nan
+    stats = group_stats(bands, values)
+    for band in ["LBAND", "UHF", "SBAND"]:
+        band_values = values[(bands == band) & np.isfinite(values)]
+        assert stats[band]["count"] == len(band_values)
+        assert stats[band]["mean"] == pytest.approx(np.mean(band_values))
+        assert stats[band]["std"] == pytest.approx(np.std(band_values))
+        assert stats[band]["median"] == pytest.approx(np.median(band_values))
+        assert stats[band]["min"] == np.min(band_values)
+        assert stats[band]["max"] == np.max(band_values)
+
+
+def test_binned_time_series():
+    mjd = np.array([0.0, 1.0, 2.0, 10.0, 11.0, 35.0])
+    values = np.array([1.0, 2.0, 6.0, 4.0, np.nan, 5.0])
+    binned = binned_time_series(mjd, values, bin_days=5)
+    assert binned["mjd"].tolist() == [1.0, 10.0, 35.0]
+    assert binned["value"].tolist() == [3.0, 4.0, 5.0]
+    assert binned["median"].tolist() == [2.0, 4.0, 5.0]
+    assert binned["count"].tolist() == [3, 1, 1]
+
+    errors = np.array([1.0, 1.0, 0.5, 1.0, 1.0, 1.0])
+    weighted = binned_time_series(mjd, values, bin_days=5, errors=errors)
+    assert weighted["value"][0] == pytest.approx((1 + 2 + 4 * 6) / 6)
+    assert weighted["error"][0] == pytest.approx(1 / np.sqrt(6))
+
+
+def test_rolling_median():
+    values = np.array([1.0, 5.0, 2.0, np.nan, 8.0, 3.0])
+    medians = rolling_median(values, 3)
+    assert np.isnan(medians[:2]).all()
+    assert medians[2:].tolist() == [2.0, 3.5, 5.0, 5.5]
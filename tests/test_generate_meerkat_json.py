@@ -0,0 +1,99 @@
+import os
+import json
+import logging
+import multiprocessing
+
+import pytest
+
+from psrdb.scripts import generate_meerkat_json
+from psrdb.scripts.generate_meerkat_json import read_batch_file, generate_batch
+from psrdb.utils.calibration import CalibrationIndex
+
+TEST_DATA_DIR = os.path.join(os.path.dirname(__file__), 'test_data')
+SOURCE = "J1705-1903"
+UTC_START = "2020-10-22-16:24:55"
+
+
+def write_header(directory, schedule_block_id="20201020-0009"):
+    with open(os.path.join(TEST_DATA_DIR, "fold_obs.header")) as f:
+        text = f.read()
+    directory.mkdir(parents=True)
+    (directory / "obs.header").write_text(text.replace("20201020-0009", schedule_block_id))
+    return str(directory / "obs.header")
+
+
+def stub_archive_metadata(archive, disk_cache=False):
+    """Stands in for reading the freq.sum archive with psrchive."""
+    return {"archive": archive, "length": 64.0, "ephemeris": f"PSRJ {SOURCE}\n"}
+
+
+@pytest.fixture
+def stub_archives(tmp_path, monkeypatch):
+    """Create the freq.sum of the test observation and replace the archive reading and calibrations."""
+    if multiprocessing.get_start_method() != "fork":
+        pytest.skip("the stubs are only inherited by forked worker processes")
+    results = tmp_path / "results"
+    freq_sum = results / "3" / UTC_START / SOURCE / "freq.sum"
+    freq_sum.parent.mkdir(parents=True)
+    freq_sum.write_bytes(b"")
+    monkeypatch.setattr(generate_meerkat_json, "RESULTS_DIR", str(results))
+    monkeypatch.setattr(generate_meerkat_json, "get_archive_metadata", stub_archive_metadata)
+    monkeypatch.setattr(generate_meerkat_json, "get_calibrations", lambda: CalibrationIndex([], []))
+
+
+def test_read_batch_file(tmp_path, caplog):
+    first = write_header(tmp_path / "obs1")
+    second = write_header(tmp_path / "obs2")
+    batch_file = tmp_path / "batch.txt"
+    batch_file.write_text(f"# header beam\n{tmp_path}/obs*/obs.header 3\n\n{first} 1\n{tmp_path}/missing/obs.header 2\n")
+    with caplog.at_level(logging.WARNING):
+        assert read_batch_file(str(batch_file)) == [(first, 3), (second, 3), (first, 1)]
+    # A pattern that matches nothing is reported
+    assert "line 5" in caplog.text
+
+    batch_file.write_text(f"{first} 1\n{second}\n")
+    with pytest.raises(RuntimeError, match="Line 2"):
+        read_batch_file(str(batch_file))
+    batch_file.write_text(f"{first} one\n")
+    with pytest.raises(RuntimeError, match="Line 1"):
+        read_batch_file(str(batch_file))
+
+
+def test_generate_batch(tmp_path, stub_archives):
+    good = write_header(tmp_path / "good")
+    missing = write_header(tmp_path / "missing", schedule_block_id="None")
+    output_dir = tmp_path / "output"
+
+    assert generate_batch([(good, 3), (missing, 3)], str(output_dir), "meertime.json", processes=2) == 1
+    with open(output_dir / SOURCE / UTC_START / "3" / "meertime.json") as f:
+        meertime_dict = json.load(f)
+    assert meertime_dict["pulsarName"] == SOURCE
+    assert meertime_dict["beam"] == 3
+    assert meertime_dict["duration"] == 64.0
+    assert meertime_dict["ephemerisText"] == f"PSRJ {SOURCE}\n"
+    assert meertime_dict["cal_type"] == "pre"
+
+
+def test_main_exit_codes(tmp_path, stub_archives, monkeypatch):
+    good = write_header(tmp_path / "good")
+    missing = write_header(tmp_path / "missing", schedule_block_id="None")
+    output_dir = tmp_path / "output"
+    output_dir.mkdir()
+
+    # Batch mode fails if any observation fails
+    batch_file = tmp_path / "batch.txt"
+    batch_file.write_text(f"{good} 3\n{missing} 3\n")
+    monkeypatch.setattr("sys.argv", ["generate_meerkat_json", "--batch", str(batch_file), "-o", str(output_dir), "-p", "1"])
+    with pytest.raises(SystemExit) as e:
+        generate_meerkat_json.main()
+    assert e.value.code == 1
+
+    # A single observation without the data required to ingest it exits with 42
+    monkeypatch.setattr("sys.argv", ["generate_meerkat_json", missing, "3", "-o", str(output_dir)])
+    with pytest.raises(SystemExit) as e:
+        generate_meerkat_json.main()
+    assert e.value.code == 42
+
+    monkeypatch.setattr("sys.argv", ["generate_meerkat_json", good, "3", "-o", str(output_dir)])
+    generate_meerkat_json.main()
+    assert os.path.exists(output_dir / "meertime.json")
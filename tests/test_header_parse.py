@@ -1,4 +1,5 @@
 import os
+import mmap
 
 from psrdb.utils import header
 
@@ -14,4 +15,35 @@ def test_get_obs_type():
     for header_file, obs_type in tests:
         obs_data = header.PTUSEHeader(header_file)
         obs_data.parse()
-        assert obs_data.obs_type == obs_type
\ No newline at end of file
+        assert obs_data.obs_type == obs_type
+
+def test_calibrator_matcher():
+    names = header.get_calibrator_names()
+    matcher = header.get_calibrator_matcher()
+    sources = list(names) + ["J0437-4715", "J1939-6342_N", "J0437-4715_O", "B1937+21_S", "J0408-6545", "xJ0408-6545", "J0408", ""]
+    for source in sources:
+        # Same result as the str.endswith check over the full catalogue
+        expected = source.endswith(header.CALIBRATION_LABELS) or source.endswith(names)
+        assert matcher.is_calibrator(source) == expected
+        assert (source in matcher) == expected
+
+
+def test_parse_key_values():
+    text = "SOURCE   J0437-4715 # the pulsar\n# comment line\n\n  NANT\t64 \nRA  04:37:15.8   extra  words\r\n"
+    expected = {"SOURCE": "J0437-4715", "NANT": "64", "RA": "04:37:15.8 extra words"}
+    assert header.parse_key_values(text) == expected
+    # DADA headers are padded with NUL bytes
+    assert header.parse_key_values(text.encode() + b"\0" * 100) == expected
+
+
+def test_key_value_store_from_text():
+    header_file = os.path.join(TEST_DATA_DIR, "fold_obs.header")
+    with open(header_file, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as header_mmap:
+            obs_data = header.PTUSEHeader.from_text(header_mmap)
+    obs_data.parse()
+    from_file = header.PTUSEHeader(header_file)
+    from_file.parse()
+    assert obs_data.cfg == from_file.cfg
+    assert obs_data.obs_type == from_file.obs_type == "fold"
+    assert obs_data.get("NOT_A_KEY") == "None"
@@ -0,0 +1,182 @@
+import json
+
+import pytest
+
+from psrdb.tables.observation import Observation
+from psrdb.tables.toa import Toa
+from psrdb.utils.mirror import Mirror
+
+
+class MockResponse:
+    def __init__(self, content):
+        self.content = json.dumps(content)
+        self.status_code = 200
+
+
+def node_utc_start(node):
+    return node.get("utcStart") or node.get("observation", {}).get("utcStart")
+
+
+class MockServer:
+    """Serves the nodes of a table that started at or after the utcStartGte filter."""
+
+    def __init__(self, table_name, nodes):
+        self.table_name = table_name
+        self.nodes = nodes
+        self.variables = []
+
+    def post(self, payload):
+        variables = json.loads(payload["variables"])
+        self.variables.append(variables)
+        utcs = variables.get("utcStartGte")
+        nodes = [node for node in self.nodes if utcs is None or node_utc_start(node) >= utcs]
+        return MockResponse({"data": {self.table_name: {
+            "pageInfo": {"hasNextPage": False, "endCursor": None},
+            "edges": [{"node": node} for node in nodes],
+        }}})
+
+
+def observation_node(id, pulsar, utc, band="LBAND", project="PTA"):
+    return {"id": id, "pulsar": {"name": pulsar}, "utcStart": utc, "band": band, "project": {"short": project}}
+
+
+def test_observation_sync(tmp_path):
+    mirror_path = str(tmp_path / "mirror.sqlite3")
+    server = MockServer("observation", [
+        observation_node("1", "J0437-4715", "2023-01-01T00:00:00+00:00"),
+        observation_node("2", "J1909-3744", "2023-01-10T00:00:00+00:00", band="UHF"),
+    ])
+    obs = Observation(server)
+
+    assert obs.sync(main_project="MeerTIME", mirror=mirror_path) == 2
+    assert server.variables[-1].get("utcStartGte") is None
+
+    # The next sync only fetches from the high-water mark less the lookback
+    server.nodes.append(observation_node("3", "J0437-4715", "2023-02-01T00:00:00+00:00"))
+    # Observation 2 is within the lookback so is fetched again
+    assert obs.sync(main_project="MeerTIME", mirror=mirror_path, lookback_days=1) == 2
+    assert server.variables[-1]["utcStartGte"] == "2023-01-09T00:00:00+00:00"
+    assert Mirror(mirror_path).high_water("observation", obs.list_filters(main_project="MeerTIME")) == "2023-02-01T00:00:00+00:00"
+
+    # Query the mirror with the same filters as list
+    mirror = Mirror(mirror_path)
+    nodes = mirror.list("observation", obs.list_filters(main_project="MeerTIME"))
+    assert [node["id"] for node in nodes] == ["1", "2", "3"]
+    nodes = mirror.list("observation", obs.list_filters(pulsar_name=["J0437-4715"], main_project="MeerTIME", utcs="2023-01-15-00:00:00"))
+    assert [node["id"] for node in nodes] == ["3"]
+    # Filters that aren't stored must match a synced query
+    with pytest.raises(RuntimeError, match="has been synced"):
+        mirror.list("observation", obs.list_filters(main_project="MeerTIME", obs_type="search"))
+    with pytest.raises(RuntimeError, match="has been synced"):
+        mirror.list("observation", obs.list_filters())
+
+    # Only the synced pulsars can be listed
+    Observation(server).sync(pulsar_name=["J1909-3744"], mirror=mirror_path)
+    nodes = mirror.list("observation", obs.list_filters(pulsar_name=["J1909-3744"]))
+    assert [node["id"] for node in nodes] == ["2"]
+    with pytest.raises(RuntimeError, match="only for some"):
+        mirror.list("observation", obs.list_filters(pulsar_name=["J0437-4715"]))
+    with pytest.raises(RuntimeError, match="only for some"):
+        mirror.list("observation", obs.list_filters())
+
+
+def test_sync_utc_range(tmp_path):
+    mirror_path = str(tmp_path / "mirror.sqlite3")
+    server = MockServer("observation", [
+        observation_node("1", "J0437-4715", "2020-01-01T00:00:00+00:00"),
+        observation_node("2", "J1909-3744", "2023-01-10T00:00:00+00:00"),
+    ])
+    obs = Observation(server)
+    obs.sync(main_project="MeerTIME", utcs="2023-01-01-00:00:00", mirror=mirror_path)
+
+    mirror = Mirror(mirror_path)
+    nodes = mirror.list("observation", obs.list_filters(main_project="MeerTIME", utcs="2023-01-05-00:00:00"))
+    assert [node["id"] for node in nodes] == ["2"]
+    # The 2020 observation was never synced so a list without the utc bound can't be answered
+    with pytest.raises(RuntimeError, match="utcStart range"):
+        mirror.list("observation", obs.list_filters(main_project="MeerTIME"))
+
+    # Syncing without the bound fetches all the rows again
+    obs.sync(main_project="MeerTIME", mirror=mirror_path)
+    assert server.variables[-1].get("utcStartGte") is None
+    nodes = mirror.list("observation", obs.list_filters(main_project="MeerTIME"))
+    assert [node["id"] for node in nodes] == ["1", "2"]
+
+
+def toa_node(id, archive, mjd, utc):
+    return {"id": id, "archive": archive, "mjd": mjd, "observation": {"utcStart": utc}}
+
+
+def test_toa_sync(tmp_path):
+    mirror_path = str(tmp_path / "mirror.sqlite3")
+    server = MockServer("toa", [
+        toa_node("1", "a.ar", 59945.5, "2023-01-01T12:00:00+00:00"),
+        toa_node("2", "b.ar", 59980.5, "2023-02-05T12:00:00+00:00"),
+    ])
+    toa = Toa(server)
+    assert toa.sync("J0437-4715", "PTA", nsub_type="1", obs_nchan=1, npol=1, mirror=mirror_path) == 2
+
+    mirror = Mirror(mirror_path)
+    filters = toa.list_filters(pulsar="J0437-4715", project_short="PTA", nsub_type="1", obs_nchan=1, npol=1)
+    assert [node["id"] for node in mirror.list("toa", filters)] == ["1", "2"]
+    # The observation's utcStart is the high-water mark
+    assert mirror.high_water("toa", filters) == "2023-02-05T12:00:00+00:00"
+    filters = toa.list_filters(pulsar="J0437-4715", project_short="PTA", nsub_type="1", obs_nchan=1, npol=1, utcs="2023-01-15-00:00:00")
+    assert [node["id"] for node in mirror.list("toa", filters)] == ["2"]
+
+    # The observation was reprocessed, replacing its ToA, and a new observation was processed
+    server.nodes = [
+        toa_node("1", "a.ar", 59945.5, "2023-01-01T12:00:00+00:00"),
+        toa_node("3", "b.ar", 59980.5, "2023-02-05T12:00:00+00:00"),
+        toa_node("4", "c.ar", 59990.5, "2023-02-15T12:00:00+00:00"),
+    ]
+    assert toa.sync("J0437-4715", "PTA", nsub_type="1", obs_nchan=1, npol=1, mirror=mirror_path, lookback_days=1) == 2
+    assert server.variables[-1]["utcStartGte"] == "2023-02-04T12:00:00+00:00"
+    filters = toa.list_filters(pulsar="J0437-4715", project_short="PTA", nsub_type="1", obs_nchan=1, npol=1)
+    # The replaced ToA was removed and the ToA before the window was kept
+    assert [node["id"] for node in mirror.list("toa", filters)] == ["1", "3", "4"]
+    filters = toa.list_filters(pulsar="J0437-4715", project_short="PTA", nsub_type="1", obs_nchan=4, npol=1)
+    with pytest.raises(RuntimeError):
+        mirror.list("toa", filters)
+
+
+def test_local_backend(tmp_path, capsys):
+    mirror_path = str(tmp_path / "mirror.sqlite3")
+    server = MockServer("observation", [
+        observation_node("1", "J0437-4715", "2023-01-01T00:00:00+00:00"),
+        observation_node("2", "J1909-3744", "2023-01-10T00:00:00+00:00", band="UHF"),
+    ])
+    Observation(server).sync(main_project="MeerTIME", mirror=mirror_path)
+    nrequests = len(server.variables)
+
+    obs = Observation(server)
+    obs.set_backend("local", mirror_path)
+    obs.get_dicts = True
+    obs.print_stdout = True
+    nodes = obs.list(pulsar_name=["J1909-3744"], main_project="MeerTIME", fields=["utcStart", "band"])
+    assert nodes == [{"utcStart": "2023-01-10T00:00:00+00:00", "band": "UHF"}]
+    assert capsys.readouterr().out == "utcStart\tband\n2023-01-10T00:00:00+00:00\tUHF\n"
+    # The list was answered without the server
+    assert len(server.variables) == nrequests
+
+
+def test_local_backend_cli(tmp_path, capsys, monkeypatch):
+    from psrdb.scripts import psrdb
+
+    mirror_path = str(tmp_path / "mirror.sqlite3")
+    server = MockServer("observation", [
+        observation_node("1", "J0437-4715", "2023-01-01T00:00:00+00:00"),
+        observation_node("2", "J1909-3744", "2023-01-10T00:00:00+00:00", band="UHF"),
+    ])
+    Observation(server).sync(main_project="MeerTIME", mirror=mirror_path)
+    capsys.readouterr()
+
+    # Neither the URL nor the token are needed to list from the mirror
+    monkeypatch.delenv("PSRDB_URL", raising=False)
+    monkeypatch.delenv("PSRDB_TOKEN", raising=False)
+    monkeypatch.setattr("sys.argv", [
+        "psrdb", "--backend", "local", "--mirror_path", mirror_path, "--fields", "utcStart,band",
+        "observation", "list", "--pulsar", "J1909-3744", "--obs_type", "fold",
+    ])
+    psrdb.main()
+    assert capsys.readouterr().out == "utcStart\tband\n2023-01-10T00:00:00+00:00\tUHF\n"
@@ -0,0 +1,46 @@
+import os
+import shutil
+from unittest.mock import patch
+
+from psrdb.utils.obs_index import ObservationIndex
+
+TEST_DATA_DIR = os.path.join(os.path.dirname(__file__), 'test_data')
+
+
+def make_observation(root, source, utc_start, beam, freq, files):
+    directory = root / source / utc_start / str(beam) / freq
+    directory.mkdir(parents=True)
+    shutil.copy(os.path.join(TEST_DATA_DIR, "fold_obs.header"), directory / "obs.header")
+    for name in files:
+        (directory / name).write_bytes(b"")
+    return directory
+
+
+def test_observation_index_update(tmp_path):
+    timing = tmp_path / "timing"
+    first = make_observation(timing, "J1705-1903", "2020-10-22-16:24:55", 3, "1284", ["a.ar", "b.ar"])
+    make_observation(timing, "J0437-4715", "2021-01-01-00:00:00", 1, "1284", ["c.ar"])
+    obs_index = ObservationIndex(str(tmp_path / "index.sqlite3"))
+
+    assert obs_index.update("timing", str(timing)) == (9, 0)
+    observation = obs_index.find(source="J1705-1903")[0]
+    assert observation["files"] == ["a.ar", "b.ar", "obs.header"]
+    assert observation["header"]["SOURCE"] == "J1705-1903"
+    assert observation["obs_type"] == "fold"
+    assert obs_index.files("timing", "J1705-1903", "2020-10-22-16:24:55", 3, "*.ar") == [str(first / "a.ar"), str(first / "b.ar")]
+
+    # Nothing has changed so no directories are listed and the headers are not parsed again
+    with patch("psrdb.utils.obs_index.PTUSEHeader", side_effect=AssertionError):
+        assert obs_index.update("timing", str(timing)) == (0, 9)
+
+    # Only the changed leaf directory is listed again
+    (first / "c.ar").write_bytes(b"")
+    os.utime(first, ns=(0, os.stat(first).st_mtime_ns + 1))
+    assert obs_index.update("timing", str(timing)) == (1, 8)
+    assert len(obs_index.files("timing", "J1705-1903", "2020-10-22-16:24:55", 3, "*.ar")) == 3
+
+    # Removed observations are removed from the index
+    shutil.rmtree(timing / "J0437-4715")
+    os.utime(timing, ns=(0, os.stat(timing).st_mtime_ns + 1))
+    obs_index.update("timing", str(timing))
+    assert [observation["source"] for observation in obs_index.find(tree="timing")] == ["J1705-1903"]
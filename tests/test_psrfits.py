@@ -0,0 +1,87 @@
+import pytest
+from unittest.mock import patch
+
+from psrdb.utils.psrfits import PSRFITS, PSRFITSError, parse_card_value
+from psrdb.utils.upload import generate_obs_length, get_archive_ephemeris, get_archive_metadata
+from psrdb.utils.archive_length import get_sf_length
+
+fits = pytest.importorskip("astropy.io.fits")
+np = pytest.importorskip("numpy")
+
+
+PAR_LINES = [
+    "PSRJ           J0437-4715",
+    "F0             173.68794581218   1.5e-11",
+    "DM             2.64",
+]
+
+
+def write_psrfits(path, tsubint):
+    primary = fits.PrimaryHDU()
+    primary.header["FITSTYPE"] = "PSRFITS"
+    primary.header["TELESCOP"] = "MeerKAT"
+    primary.header["SRC_NAME"] = "J0437-4715"
+    primary.header["OBSFREQ"] = 1284.0
+    primary.header["OBSBW"] = 856.0
+    primary.header["OBS_MODE"] = "PSR"
+    psrparam = fits.BinTableHDU.from_columns(
+        [fits.Column(name="PARAM", format="128A", array=np.array(PAR_LINES))],
+        name="PSRPARAM",
+    )
+    nsubint = len(tsubint)
+    subint = fits.BinTableHDU.from_columns(
+        [
+            fits.Column(name="INDEXVAL", format="1D", array=np.arange(nsubint, dtype=float)),
+            fits.Column(name="TSUBINT", format="1D", array=np.array(tsubint)),
+            fits.Column(name="DAT_FREQ", format="4E", array=np.zeros((nsubint, 4))),
+            fits.Column(name="DATA", format="1024I", dim="(256,1,4)", array=np.ones((nsubint, 4, 1, 256), dtype=np.int16)),
+        ],
+        name="SUBINT",
+    )
+    subint.header["NCHAN"] = 4
+    subint.header["NPOL"] = 1
+    subint.header["NBIN"] = 256
+    fits.HDUList([primary, psrparam, subint]).writeto(path)
+
+
+def test_parse_card_value():
+    assert parse_card_value("'MeerKAT '           / Telescope name") == "MeerKAT"
+    assert parse_card_value("'it''s'") == "it's"
+    assert parse_card_value("                   T / bool") is True
+    assert parse_card_value("                  42 / int") == 42
+    assert parse_card_value("          1.5D+03 / double") == 1500.0
+
+
+def test_psrfits_reader(tmp_path):
+    path = tmp_path / "obs.ar"
+    write_psrfits(path, [8.0, 8.0, 7.5])
+    with PSRFITS(str(path)) as psrfits:
+        assert psrfits.primary["SRC_NAME"] == "J0437-4715"
+        assert psrfits.nsubint == 3
+        assert psrfits.tsubint == [8.0, 8.0, 7.5]
+        assert psrfits.length == 23.5
+        assert psrfits.subint.read_column("DAT_FREQ")[0] == (0.0, 0.0, 0.0, 0.0)
+        assert psrfits.ephemeris_text() == "\n".join(PAR_LINES) + "\n"
+
+    not_fits = tmp_path / "obs.txt"
+    not_fits.write_text("not a fits file")
+    with pytest.raises(PSRFITSError):
+        PSRFITS(str(not_fits))
+
+
+def test_upload_psrfits_fast_path(tmp_path):
+    path = str(tmp_path / "freq.sum")
+    write_psrfits(path, [8.0, 8.0])
+    # Neither psrchive nor vap are needed for PSRFITS files
+    with patch("psrdb.utils.upload.load_archive", side_effect=AssertionError), \
+            patch("psrdb.utils.ephemeris.subprocess.run", side_effect=AssertionError), \
+            patch("psrdb.utils.archive_length.subprocess.run", side_effect=AssertionError), \
+            patch("psrdb.utils.archive_length.LENGTH_CACHE", str(tmp_path / "length.sqlite3")):
+        assert generate_obs_length(path) == 16.0
+        assert get_archive_ephemeris(path).startswith("PSRJ")
+        metadata = get_archive_metadata(path)
+        assert get_sf_length([path]) == 16.0
+    assert metadata["source"] == "J0437-4715"
+    assert metadata["telescope"] == "MeerKAT"
+    assert (metadata["nsubint"], metadata["nchan"], metadata["npol"], metadata["nbin"]) == (2, 4, 1, 256)
+    assert metadata["length"] == 16.0
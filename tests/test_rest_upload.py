@@ -0,0 +1,180 @@
+import os
+import re
+import json
+import hashlib
+import requests
+import responses
+from unittest.mock import patch
+from urllib.parse import parse_qsl
+
+from psrdb.graphql_client import GraphQLClient
+from psrdb.tables.pipeline_image import PipelineImage
+from psrdb.tables.template import Template
+from psrdb.utils.rest_upload import ChunkedUploader, MultipartFileEncoder
+
+
+TEST_URL = "https://test.example.com"
+
+
+def test_multipart_encoder_matches_requests(tmp_path):
+    image_path = tmp_path / "profile.png"
+    image_path.write_bytes(bytes(range(256)) * 10)
+    fields = {
+        "pipeline_run_id": 1,
+        "image_type": "profile",
+        "resolution": "high",
+        "cleaned": True,
+        "comment": None,
+    }
+    encoder = MultipartFileEncoder(fields, "image_upload", str(image_path), boundary="testboundary")
+
+    with open(image_path, "rb") as image_file:
+        request = requests.Request(
+            "POST",
+            TEST_URL,
+            data=fields,
+            files={"image_upload": image_file},
+        ).prepare()
+    boundary = request.headers["Content-Type"].split("boundary=")[1]
+    expected = request.body.replace(boundary.encode(), b"testboundary")
+
+    # Read in awkward block sizes to cross the part boundaries
+    body = b""
+    while True:
+        chunk = encoder.read(100)
+        if not chunk:
+            break
+        body += chunk
+    assert body == expected
+    assert len(encoder) == len(expected)
+    assert encoder.content_type == "multipart/form-data; boundary=testboundary"
+
+
+@responses.activate
+def test_pipeline_image_create_many(tmp_path):
+    images = []
+    for i, image_type in enumerate(["profile", "phase-time", "phase-freq"]):
+        image_path = tmp_path / f"{image_type}.png"
+        image_path.write_bytes(image_type.encode())
+        images.append((str(image_path), image_type, "high", bool(i % 2)))
+
+    attempts = {}
+
+    def callback(request):
+        assert request.headers["Authorization"] == "Bearer token"
+        body = request.body if isinstance(request.body, bytes) else request.body.read()
+        image_type = body.split(b'name="image_type"\r\n\r\n')[1].split(b"\r\n")[0].decode()
+        attempts[image_type] = attempts.get(image_type, 0) + 1
+        # Fail the first phase-time upload to check it is retried on its own
+        if image_type == "phase-time" and attempts[image_type] == 1:
+            return (503, {}, "")
+        return (201, {}, json.dumps({"errors": None, "id": image_type}))
+
+    responses.add_callback(responses.POST, f"{TEST_URL}/upload/image/", callback=callback)
+
+    client = GraphQLClient(TEST_URL, "token")
+    with patch("psrdb.utils.rest_upload.time.sleep"):
+        image_responses = PipelineImage(client).create_many(1, images)
+
+    assert [json.loads(response.content)["id"] for response in image_responses] == ["profile", "phase-time", "phase-freq"]
+    assert attempts == {"profile": 1, "phase-time": 2, "phase-freq": 1}
+
+
+@responses.activate
+def test_template_create_deduplicate(tmp_path):
+    template_path = tmp_path / "J0437-4715.std"
+    template_path.write_bytes(b"template data")
+    responses.add(
+        responses.POST,
+        f"{TEST_URL}/upload/template/",
+        json={"errors": None, "id": 5},
+        status=201,
+    )
+
+    client = GraphQLClient(TEST_URL, "token")
+    template = Template(client)
+    with patch("psrdb.utils.rest_upload.UPLOAD_INDEX", str(tmp_path / "upload_index.sqlite3")):
+        ids = [
+            json.loads(template.create("J0437-4715", "LBAND", str(template_path), project_short="PTA", deduplicate=True).content)["id"]
+            for _ in range(2)
+        ]
+        # A different band is a different Template so must still be uploaded
+        template.create("J0437-4715", "SBAND", str(template_path), project_short="PTA", deduplicate=True)
+
+    assert ids == [5, 5]
+    assert len(responses.calls) == 2
+
+
+class ChunkedUploadServer:
+    """Local stand-in for the chunked upload protocol of the REST API."""
+
+    def __init__(self, fail_offsets=()):
+        self.uploads = {}
+        self.fail_offsets = set(fail_offsets)
+        self.part_requests = []
+        self.created = {}
+
+    def register(self):
+        responses.add_callback(responses.POST, f"{TEST_URL}/upload/chunked/", callback=self.start)
+        responses.add_callback(
+            responses.PUT,
+            re.compile(f"{TEST_URL}/upload/chunked/[0-9a-f]+/"),
+            callback=self.part,
+        )
+        responses.add_callback(responses.POST, f"{TEST_URL}/upload/template/", callback=self.complete)
+
+    def start(self, request):
+        payload = json.loads(request.body)
+        for upload_id, upload in self.uploads.items():
+            if upload["sha256"] == payload["sha256"]:
+                break
+        else:
+            upload_id = f"{len(self.uploads):08x}"
+            self.uploads[upload_id] = dict(payload, parts={})
+        return (200, {}, json.dumps({"upload_id": upload_id, "received": sorted(self.uploads[upload_id]["parts"])}))
+
+    def part(self, request):
+        upload_id = request.url.rstrip("/").split("/")[-1]
+        offset = int(request.headers["Content-Range"].split()[1].split("-")[0])
+        self.part_requests.append(offset)
+        if offset in self.fail_offsets:
+            self.fail_offsets.remove(offset)
+            raise requests.exceptions.ConnectionError("Connection dropped")
+        self.uploads[upload_id]["parts"][offset] = request.body
+        return (201, {}, "")
+
+    def complete(self, request):
+        fields = dict(parse_qsl(request.body))
+        upload = self.uploads[fields["chunked_upload_id"]]
+        data = b"".join(upload["parts"][offset] for offset in sorted(upload["parts"]))
+        if hashlib.sha256(data).hexdigest() != upload["sha256"]:
+            return (400, {}, json.dumps({"errors": "Checksum mismatch", "id": None}))
+        self.created[fields["pulsar_name"]] = data
+        return (201, {}, json.dumps({"errors": None, "id": 7}))
+
+
+@responses.activate
+def test_template_create_chunked_resume(tmp_path):
+    template_path = tmp_path / "J0437-4715.std"
+    template_data = os.urandom(10 * 1000 + 123)
+    template_path.write_bytes(template_data)
+    server = ChunkedUploadServer(fail_offsets=[3000])
+    server.register()
+
+    client = GraphQLClient(TEST_URL, "token")
+    template = Template(client)
+    # Simulate an earlier interrupted upload that sent the first two parts
+    with patch("psrdb.utils.rest_upload.time.sleep"):
+        uploader = ChunkedUploader(client, chunk_size=1000)
+        upload_id = json.loads(uploader.start(str(template_path), hashlib.sha256(template_data).hexdigest()).content)["upload_id"]
+        for offset in (0, 1000):
+            uploader.upload_part(upload_id, str(template_path), offset)
+        server.part_requests = []
+
+        response = template.create("J0437-4715", "LBAND", str(template_path), project_short="PTA", chunk_size=1000)
+
+    assert response.status_code == 201
+    assert json.loads(response.content)["id"] == 7
+    assert server.created["J0437-4715"] == template_data
+    # Only the missing parts were sent, and the dropped part was sent twice
+    assert sorted(server.part_requests) == [2000, 3000, 3000] + list(range(4000, 11000, 1000))
@@ -29,4 +29,64 @@ def test_toa_line_to_dict_to_line():
                 input_toa_line = toa_line.rstrip("\n")
                 toa_dict = toa_line_to_dict(input_toa_line)
                 output_toa_line = toa_dict_to_line(toa_dict)
-                assert input_toa_line == output_toa_line
\ No newline at end of file
+                assert input_toa_line == output_toa_line
+
+
+def test_binary_toa_round_trip(tmp_path):
+    from psrdb.utils.binary_toa import BinaryTOAs, binary_to_tim, tim_to_binary
+
+    for test in os.listdir(TEST_DATA_DIR):
+        if not test.endswith(".tim"):
+            continue
+        toa_file = os.path.join(TEST_DATA_DIR, test)
+        binary_file = str(tmp_path / "toas.toab")
+        tim_file = str(tmp_path / "toas.tim")
+        ntoa = tim_to_binary(toa_file, binary_file)
+        assert binary_to_tim(binary_file, tim_file) == ntoa
+        with open(toa_file) as f:
+            input_lines = [line.rstrip("\n") for line in f if "FORMAT" not in line]
+        with open(tim_file) as f:
+            output_lines = [line.rstrip("\n") for line in f if "FORMAT" not in line]
+        assert input_lines == output_lines
+
+        toas = BinaryTOAs(binary_file)
+        assert len(toas) == ntoa
+        # Selecting ToAs uses the columns directly
+        mjd = toas.mjd
+        middle = float(mjd.min() + mjd.max()) / 2
+        late = toas.select(mjd_start=middle)
+        assert list(late) == [i for i in range(ntoa) if mjd[i] >= middle]
+        assert all(toa_dict["archive"] for toa_dict in toas.toa_dicts(late))
+        # Per-ToA numeric flags are float columns rather than strings in the header
+        assert "snr" not in toas.header["flags"]
+        assert toas.flag("snr").dtype == float
+        assert "fe" in toas.header["flags"]
+
+
+def test_binary_toa_numeric_flags(tmp_path):
+    from psrdb.utils.binary_toa import BinaryTOAs, write_binary_toas
+
+    toa_dicts = [
+        {"archive": "a.ar", "freq_MHz": 1284.0, "mjd": "59945.5", "mjd_err": 1.0, "telescope": "meerkat", "gof": "0.982"},
+        {"archive": "b.ar", "freq_MHz": 1284.0, "mjd": "59946.5", "mjd_err": 1.0, "telescope": "meerkat", "gof": "1.2e+03", "nbin": "1024", "tobs": "240.0"},
+        {"archive": "c.ar", "freq_MHz": 1284.0, "mjd": "59947.5", "mjd_err": 1.0, "telescope": "meerkat", "gof": "5", "nbin": "1.0240", "tobs": "96.00"},
+        {"archive": "d.ar", "freq_MHz": 1284.0, "mjd": "59948.5", "mjd_err": 1.0, "telescope": "meerkat", "fe": "KAT"},
+    ]
+    path = str(tmp_path / "toas.toab")
+    write_binary_toas(toa_dicts, path)
+    toas = BinaryTOAs(path)
+    # Values written differently keep their text and flags that are mostly written differently are dictionary encoded
+    assert toas.header["numeric_flags"] == {"gof": ["1.2e+03"], "nbin": ["1.0240"]}
+    assert toas.header["flags"] == {"tobs": ["240.0", "96.00"], "fe": ["KAT"]}
+    gof = toas.flag("gof")
+    assert gof[:3].tolist() == [0.982, 1200.0, 5.0] and gof[3] != gof[3]
+    assert toas.flag_names == ["gof", "nbin", "tobs", "fe"]
+    assert [
+        {key: value for key, value in toa_dict.items() if key in toas.flag_names}
+        for toa_dict in toas.toa_dicts()
+    ] == [
+        {"gof": "0.982"},
+        {"gof": "1.2e+03", "nbin": "1024", "tobs": "240.0"},
+        {"gof": "5", "nbin": "1.0240", "tobs": "96.00"},
+        {"fe": "KAT"},
+    ]
@@ -0,0 +1,98 @@
+import os
+
+from psrdb.utils import upload
+from psrdb.utils.upload import ArchiveMetadataPool
+
+
+class StubArchive:
+    """Stands in for a psrchive Archive."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def get_source(self):
+        return os.path.basename(self.path).split("_")[0]
+
+    def get_telescope(self):
+        return "MeerKAT"
+
+    def get_centre_frequency(self):
+        return 1284.0
+
+    def get_bandwidth(self):
+        return 856.0
+
+    def get_nsubint(self):
+        return 2
+
+    def get_nchan(self):
+        return 1
+
+    def get_npol(self):
+        return 1
+
+    def get_nbin(self):
+        return 1024
+
+    def integration_length(self):
+        return 16.0
+
+
+def use_stub_archive_reader():
+    """Replace psrchive and vap in a worker process."""
+    upload.load_archive = StubArchive
+    upload.archive_ephemeris_text = lambda archive, disk_cache=False: f"PSRJ {os.path.basename(archive).split('_')[0]}\n"
+
+
+class StubEphemeris:
+    """Stands in for the psrchive Parameters of an archive."""
+
+    def __init__(self, text):
+        self.text = text
+
+    def unload(self, path):
+        with open(path, "w") as f:
+            f.write(self.text)
+
+
+class StubArchiveWithEphemeris(StubArchive):
+    def get_ephemeris(self):
+        return StubEphemeris(f"PSRJ {self.get_source()}\nDM 2.6\n")
+
+
+def archive_source(archive):
+    return upload.get_archive_metadata(archive)["source"]
+
+
+def test_archive_metadata_pool(tmp_path):
+    archives = []
+    for source in ("J0437-4715", "J1909-3744", "J1713+0747"):
+        path = tmp_path / f"{source}_freq.sum"
+        # Not PSRFITS so the metadata comes from the (stub) archive reader
+        path.write_text("not a fits file")
+        archives.append(str(path))
+
+    with ArchiveMetadataPool(processes=2, initializer=use_stub_archive_reader) as pool:
+        metadata = pool.map(archives)
+        future = pool.submit(archives[0])
+        sources = [pool.run(archive_source, archive) for archive in archives]
+        assert future.result()["ephemeris"] == "PSRJ J0437-4715\n"
+        assert [source.result() for source in sources] == ["J0437-4715", "J1909-3744", "J1713+0747"]
+
+    assert [m["archive"] for m in metadata] == archives
+    assert [m["source"] for m in metadata] == ["J0437-4715", "J1909-3744", "J1713+0747"]
+    assert metadata[1]["length"] == 16.0
+    assert metadata[1]["ephemeris"] == "PSRJ J1909-3744\n"
+
+
+def test_archive_metadata_loaded_ephemeris(tmp_path, monkeypatch):
+    path = tmp_path / "J0437-4715_freq.sum"
+    path.write_text("not a fits file")
+
+    def vap(archive, disk_cache=False):
+        raise AssertionError("vap should not be run for an archive with an ephemeris")
+
+    monkeypatch.setattr(upload, "load_archive", StubArchiveWithEphemeris)
+    monkeypatch.setattr(upload, "archive_ephemeris_text", vap)
+    # The ephemeris is unloaded from the archive loaded for the header information
+    assert upload.get_archive_metadata(str(path))["ephemeris"] == "PSRJ J0437-4715\nDM 2.6\n"